@@ -0,0 +1 @@
+"""Helper modules for the Contido Pulumi program."""
@@ -0,0 +1,138 @@
+"""ContidoBucket: one S3 bucket with its standard companion resources.
+
+Every Contido bucket is AES256-encrypted and blocks public access; CORS,
+versioning, lifecycle rules, Transfer Acceleration and event notifications
+are opt-in. ``region`` places the bucket outside the stack's region (the
+cross-region replicas, see ``contido.replication``).
+
+Child resources keep the names they had when they were declared at the stack
+root (``<name>-bucket``, ``<name>-encryption``, ...) and carry an alias to
+their old root-level URN, so moving an existing stack onto the component is a
+no-op for ``pulumi up``.
+"""
+
+from typing import Mapping, Optional, Sequence
+
+import pulumi
+import pulumi_aws as aws
+
+DEFAULT_CORS_RULES = (
+    aws.s3.BucketCorsConfigurationCorsRuleArgs(
+        allowed_headers=["*"],
+        allowed_methods=["HEAD", "GET", "PUT", "POST"],
+        allowed_origins=["*"],
+        expose_headers=[],
+    ),
+)
+
+
+class ContidoBucket(pulumi.ComponentResource):
+    bucket: aws.s3.Bucket
+    cors: Optional[aws.s3.BucketCorsConfiguration]
+    versioning: Optional[aws.s3.BucketVersioningV2]
+    lifecycle: Optional[aws.s3.BucketLifecycleConfiguration]
+    accelerate: Optional[aws.s3.BucketAccelerateConfiguration]
+    notification: Optional[aws.s3.BucketNotification]
+
+    def __init__(self,
+                 name: str,
+                 bucket_name: str,
+                 tags: Mapping[str, str],
+                 cors: bool = True,
+                 versioning: bool = False,
+                 lifecycle_rules: Optional[Sequence[aws.s3.BucketLifecycleConfigurationRuleArgs]] = None,
+                 object_ownership: str = "BucketOwnerEnforced",
+                 transfer_acceleration: bool = False,
+                 region: Optional[str] = None,
+                 opts: Optional[pulumi.ResourceOptions] = None):
+        if transfer_acceleration and "." in bucket_name:
+            raise ValueError(f"Transfer Acceleration does not support bucket names with dots: {bucket_name!r}")
+        super().__init__("contido:storage:Bucket", name, None, opts)
+        self._key = name
+        self._region = region
+
+        self.bucket = aws.s3.Bucket(f"{name}-bucket",
+            bucket=bucket_name,
+            region=region,
+            tags=tags,
+            opts=self._child_opts())
+
+        aws.s3.BucketServerSideEncryptionConfiguration(f"{name}-encryption",
+            bucket=self.bucket.id,
+            region=region,
+            rules=[aws.s3.BucketServerSideEncryptionConfigurationRuleArgs(
+                apply_server_side_encryption_by_default=aws.s3.BucketServerSideEncryptionConfigurationRuleApplyServerSideEncryptionByDefaultArgs(
+                    sse_algorithm="AES256",
+                ),
+            )],
+            opts=self._child_opts())
+
+        self.cors = aws.s3.BucketCorsConfiguration(f"{name}-cors",
+            bucket=self.bucket.id,
+            region=region,
+            cors_rules=list(DEFAULT_CORS_RULES),
+            opts=self._child_opts()) if cors else None
+
+        self.versioning = aws.s3.BucketVersioningV2(f"{name}-versioning",
+            bucket=self.bucket.id,
+            region=region,
+            versioning_configuration=aws.s3.BucketVersioningV2VersioningConfigurationArgs(
+                status="Enabled",
+            ),
+            opts=self._child_opts()) if versioning else None
+
+        aws.s3.BucketPublicAccessBlock(f"{name}-public-access",
+            bucket=self.bucket.id,
+            region=region,
+            block_public_acls=True,
+            block_public_policy=True,
+            ignore_public_acls=True,
+            restrict_public_buckets=True,
+            opts=self._child_opts())
+
+        aws.s3.BucketOwnershipControls(f"{name}-ownership",
+            bucket=self.bucket.id,
+            region=region,
+            rule=aws.s3.BucketOwnershipControlsRuleArgs(
+                object_ownership=object_ownership,
+            ),
+            opts=self._child_opts())
+
+        self.accelerate = aws.s3.BucketAccelerateConfiguration(f"{name}-accelerate",
+            bucket=self.bucket.id,
+            region=region,
+            status="Enabled",
+            opts=self._child_opts()) if transfer_acceleration else None
+
+        # Lifecycle rules on noncurrent versions need versioning in place first.
+        self.lifecycle = aws.s3.BucketLifecycleConfiguration(f"{name}-lifecycle",
+            bucket=self.bucket.id,
+            region=region,
+            rules=list(lifecycle_rules),
+            opts=self._child_opts(depends_on=[self.versioning] if self.versioning else None)) if lifecycle_rules else None
+
+        self.notification = None
+
+        self.register_outputs({
+            "bucket_name": self.bucket.id,
+            "arn": self.bucket.arn,
+        })
+
+    def _child_opts(self, depends_on: Optional[Sequence[pulumi.Resource]] = None) -> pulumi.ResourceOptions:
+        return pulumi.ResourceOptions(
+            parent=self,
+            aliases=[pulumi.Alias(parent=pulumi.ROOT_STACK_RESOURCE)],
+            depends_on=depends_on)
+
+    def notify(self,
+               queues: Sequence[aws.s3.BucketNotificationQueueArgs],
+               depends_on: Optional[Sequence[pulumi.Resource]] = None) -> aws.s3.BucketNotification:
+        """Attach the bucket's single S3 event notification configuration."""
+        if self.notification is not None:
+            raise ValueError(f"Bucket {self._key!r} already has a notification configuration")
+        self.notification = aws.s3.BucketNotification(f"{self._key}-notification",
+            bucket=self.bucket.id,
+            region=self._region,
+            queues=list(queues),
+            opts=self._child_opts(depends_on=depends_on))
+        return self.notification
@@ -0,0 +1,464 @@
+"""CloudFront origin access, Origin Shield and per-path cache behaviors.
+
+Configured through the ``cdn`` config object; each distribution (``proxy``,
+``thumbnail``, ``asset``) has its own entry::
+
+    cdn:
+      enabled: true                 # false: no distributions, origin access or DNS records
+      origin_access: oac            # oai (default) | oac-grant | oac-migrate | oac
+      mam_mode: unified             # split (default) | unified-migrate | unified
+      cache_policy:                 # replaces the CachingOptimized managed policy
+        default_ttl: 86400
+        query_strings: none         # none | all | [names] | {except: [names]}
+        headers: [Origin]
+        cookies: none
+      origin_request_policy:        # replaces the CORS-S3Origin managed policy
+        headers: [Origin, Access-Control-Request-Method, Access-Control-Request-Headers]
+      proxy:
+        price_class: PriceClass_200
+        http_version: http2and3
+        origin_shield_region: ap-south-1
+        cache_behaviors:
+          - path_pattern: "*.ts"
+            min_ttl: 86400
+            default_ttl: 31536000
+            max_ttl: 31536000
+          - path_pattern: "*.m3u8"
+            default_ttl: 5
+            max_ttl: 10
+
+Moving from legacy origin access identities to Origin Access Control takes
+three updates, each deployed before the next: ``oac-grant`` creates the OACs
+and grants the existing distributions (``AWS:SourceArn``) read access while
+their origins stay on the OAIs, ``oac-migrate`` switches the origins to OAC,
+and ``oac`` drops the OAIs. Granting first matters because a bucket policy
+that names a distribution can only be written after that distribution's
+update has deployed, by which time its edges already sign with OAC.
+
+``mam_mode: unified`` serves proxies and thumbnails from one MAM distribution:
+proxies stay at the root (``/clip.mp4`` -> ``proxy/clip.mp4``) and thumbnails
+move under ``/thumbnail/``. The unified distribution takes over the proxy
+distribution and its DNS record in place; ``unified-migrate`` keeps the old
+thumbnail distribution up until clients have switched to the new paths.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, List, Mapping, Optional, Sequence, Tuple
+
+import pulumi
+import pulumi_aws as aws
+
+from contido import policies
+
+DISTRIBUTIONS = ("proxy", "thumbnail", "asset")
+ORIGIN_ACCESS_MODES = ("oai", "oac-grant", "oac-migrate", "oac")
+PRICE_CLASSES = ("PriceClass_All", "PriceClass_200", "PriceClass_100")
+HTTP_VERSIONS = ("http1.1", "http2", "http2and3", "http3")
+
+# AWS managed policies used when no cache/origin request policy is configured.
+MANAGED_CACHING_OPTIMIZED = "658327ea-f89d-4fab-a63d-7e88639e58f6"
+MANAGED_CORS_S3_ORIGIN = "216adef5-5c7f-47e4-b989-5492eafa07d3"
+
+# Forwarding behaviors CloudFront accepts per policy type and parameter.
+_CACHE_KEY_BEHAVIORS = {
+    "query_strings": ("none", "whitelist", "allExcept", "all"),
+    "headers": ("none", "whitelist"),
+    "cookies": ("none", "whitelist", "allExcept", "all"),
+}
+_ORIGIN_REQUEST_BEHAVIORS = {
+    "query_strings": ("none", "whitelist", "allExcept", "all"),
+    "headers": ("none", "whitelist", "allViewer", "allViewerAndWhitelistCloudFront", "allExcept"),
+    "cookies": ("none", "whitelist", "allExcept", "all"),
+}
+MAM_MODES = ("split", "unified-migrate", "unified")
+
+# Regions where CloudFront offers Origin Shield.
+ORIGIN_SHIELD_REGIONS = (
+    "us-east-1", "us-east-2", "us-west-1", "us-west-2",
+    "ap-south-1", "ap-northeast-1", "ap-northeast-2", "ap-southeast-1", "ap-southeast-2",
+    "eu-central-1", "eu-west-1", "eu-west-2", "sa-east-1",
+)
+
+
+@dataclass(frozen=True)
+class CacheBehavior:
+    path_pattern: str
+    min_ttl: int = 0
+    default_ttl: int = 86400
+    max_ttl: int = 31536000
+
+
+@dataclass(frozen=True)
+class Forwarding:
+    """Which query strings, headers or cookies a policy includes."""
+    behavior: str = "none"
+    items: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class CachePolicySettings:
+    min_ttl: int = 0
+    default_ttl: int = 86400
+    max_ttl: int = 31536000
+    brotli: bool = True
+    gzip: bool = True
+    query_strings: Forwarding = Forwarding()
+    headers: Forwarding = Forwarding()
+    cookies: Forwarding = Forwarding()
+
+
+@dataclass(frozen=True)
+class OriginRequestPolicySettings:
+    query_strings: Forwarding = Forwarding()
+    headers: Forwarding = Forwarding()
+    cookies: Forwarding = Forwarding()
+
+
+@dataclass(frozen=True)
+class DistributionSettings:
+    price_class: str = "PriceClass_All"
+    http_version: str = "http2"
+    origin_shield_region: Optional[str] = None
+    cache_behaviors: Tuple[CacheBehavior, ...] = ()
+
+
+@dataclass(frozen=True)
+class CdnSettings:
+    enabled: bool = True
+    origin_access: str = "oai"
+    mam_mode: str = "split"
+    cache_policy: Optional[CachePolicySettings] = None
+    origin_request_policy: Optional[OriginRequestPolicySettings] = None
+    distributions: Mapping[str, DistributionSettings] = field(default_factory=dict)
+
+    def distribution(self, name: str) -> DistributionSettings:
+        return self.distributions.get(name) or DistributionSettings()
+
+    @property
+    def uses_oai(self) -> bool:
+        """Whether the origin access identities exist (and are trusted by the buckets)."""
+        return self.origin_access in ("oai", "oac-grant", "oac-migrate")
+
+    @property
+    def uses_oac(self) -> bool:
+        """Whether the OACs exist and the buckets trust the distributions."""
+        return self.origin_access in ("oac-grant", "oac-migrate", "oac")
+
+    @property
+    def oac_origins(self) -> bool:
+        """Whether the S3 origins sign with OAC instead of an OAI."""
+        return self.origin_access in ("oac-migrate", "oac")
+
+    @property
+    def unified_mam(self) -> bool:
+        return self.mam_mode != "split"
+
+    @property
+    def thumbnail_distribution(self) -> bool:
+        """Whether the standalone thumbnail distribution still exists."""
+        return self.mam_mode != "unified"
+
+
+_DISTRIBUTION_KEYS = {"price_class", "http_version", "origin_shield_region", "cache_behaviors"}
+_BEHAVIOR_KEYS = {"path_pattern", "min_ttl", "default_ttl", "max_ttl"}
+_CACHE_POLICY_KEYS = {"min_ttl", "default_ttl", "max_ttl", "brotli", "gzip", "query_strings", "headers", "cookies"}
+_ORIGIN_REQUEST_POLICY_KEYS = {"query_strings", "headers", "cookies"}
+
+
+def _require_int(name: str, value: Any) -> None:
+    if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+        raise ValueError(f"{name} must be a non-negative integer, got {value!r}")
+
+
+def _require_ttls(label: str, min_ttl: Any, default_ttl: Any, max_ttl: Any) -> None:
+    for ttl, value in (("min_ttl", min_ttl), ("default_ttl", default_ttl), ("max_ttl", max_ttl)):
+        _require_int(f"{label}.{ttl}", value)
+    if not min_ttl <= default_ttl <= max_ttl:
+        raise ValueError(f"{label}: TTLs must satisfy min_ttl <= default_ttl <= max_ttl")
+
+
+def _parse_forwarding(label: str, raw: Any, allowed: Sequence[str]) -> Forwarding:
+    """``none``/``all``/... as a string, a list to whitelist, or ``{except: [...]}``."""
+    if raw is None:
+        forwarding = Forwarding()
+    elif isinstance(raw, str):
+        forwarding = Forwarding(behavior=raw)
+    elif isinstance(raw, list):
+        forwarding = Forwarding(behavior="whitelist" if raw else "none", items=tuple(raw))
+    elif isinstance(raw, Mapping) and set(raw) == {"except"}:
+        forwarding = Forwarding(behavior="allExcept", items=tuple(raw["except"] or ()))
+    else:
+        raise ValueError(f"{label} must be a behavior name, a list or {{except: [...]}}, got {raw!r}")
+    if forwarding.behavior not in allowed:
+        raise ValueError(f"{label} must be one of {list(allowed)}, got {forwarding.behavior!r}")
+    if forwarding.behavior in ("whitelist", "allExcept") and not forwarding.items:
+        raise ValueError(f"{label}: {forwarding.behavior} needs at least one name")
+    if not all(isinstance(item, str) and item for item in forwarding.items):
+        raise ValueError(f"{label}: names must be non-empty strings")
+    return forwarding
+
+
+def _parse_cache_policy(raw: Mapping[str, Any]) -> CachePolicySettings:
+    unknown = set(raw) - _CACHE_POLICY_KEYS
+    if unknown:
+        raise ValueError(f"cdn.cache_policy: unknown keys {sorted(unknown)}")
+    defaults = CachePolicySettings()
+    settings = CachePolicySettings(
+        min_ttl=raw.get("min_ttl", defaults.min_ttl),
+        default_ttl=raw.get("default_ttl", defaults.default_ttl),
+        max_ttl=raw.get("max_ttl", defaults.max_ttl),
+        brotli=raw.get("brotli", defaults.brotli),
+        gzip=raw.get("gzip", defaults.gzip),
+        **{key: _parse_forwarding(f"cdn.cache_policy.{key}", raw.get(key), allowed)
+           for key, allowed in _CACHE_KEY_BEHAVIORS.items()},
+    )
+    _require_ttls("cdn.cache_policy", settings.min_ttl, settings.default_ttl, settings.max_ttl)
+    for key in ("brotli", "gzip"):
+        if not isinstance(getattr(settings, key), bool):
+            raise ValueError(f"cdn.cache_policy.{key} must be a boolean")
+    return settings
+
+
+def _parse_origin_request_policy(raw: Mapping[str, Any]) -> OriginRequestPolicySettings:
+    unknown = set(raw) - _ORIGIN_REQUEST_POLICY_KEYS
+    if unknown:
+        raise ValueError(f"cdn.origin_request_policy: unknown keys {sorted(unknown)}")
+    return OriginRequestPolicySettings(**{
+        key: _parse_forwarding(f"cdn.origin_request_policy.{key}", raw.get(key), allowed)
+        for key, allowed in _ORIGIN_REQUEST_BEHAVIORS.items()
+    })
+
+
+def _parse_distribution(name: str, raw: Mapping[str, Any]) -> DistributionSettings:
+    unknown = set(raw) - _DISTRIBUTION_KEYS
+    if unknown:
+        raise ValueError(f"cdn.{name}: unknown keys {sorted(unknown)}")
+
+    price_class = raw.get("price_class", "PriceClass_All")
+    if price_class not in PRICE_CLASSES:
+        raise ValueError(f"cdn.{name}.price_class must be one of {list(PRICE_CLASSES)}, got {price_class!r}")
+    http_version = raw.get("http_version", "http2")
+    if http_version not in HTTP_VERSIONS:
+        raise ValueError(f"cdn.{name}.http_version must be one of {list(HTTP_VERSIONS)}, got {http_version!r}")
+
+    region = raw.get("origin_shield_region") or None
+    if region is not None and region not in ORIGIN_SHIELD_REGIONS:
+        raise ValueError(f"cdn.{name}.origin_shield_region {region!r} does not offer Origin Shield")
+
+    behaviors = []
+    for index, entry in enumerate(raw.get("cache_behaviors") or []):
+        label = f"cdn.{name}.cache_behaviors[{index}]"
+        unknown = set(entry) - _BEHAVIOR_KEYS
+        if unknown:
+            raise ValueError(f"{label}: unknown keys {sorted(unknown)}")
+        if not entry.get("path_pattern"):
+            raise ValueError(f"{label}: path_pattern is required")
+        behavior = CacheBehavior(**entry)
+        _require_ttls(label, behavior.min_ttl, behavior.default_ttl, behavior.max_ttl)
+        behaviors.append(behavior)
+
+    patterns = [behavior.path_pattern for behavior in behaviors]
+    duplicates = sorted({pattern for pattern in patterns if patterns.count(pattern) > 1})
+    if duplicates:
+        raise ValueError(f"cdn.{name}.cache_behaviors: duplicate path patterns {duplicates}")
+    return DistributionSettings(
+        price_class=price_class,
+        http_version=http_version,
+        origin_shield_region=region,
+        cache_behaviors=tuple(behaviors),
+    )
+
+
+def parse_cdn_settings(raw: Optional[Mapping[str, Any]]) -> CdnSettings:
+    """Validate the ``cdn`` config object."""
+    raw = dict(raw or {})
+    enabled = raw.pop("enabled", True)
+    if not isinstance(enabled, bool):
+        raise ValueError(f"cdn.enabled must be a boolean, got {enabled!r}")
+    origin_access = raw.pop("origin_access", "oai")
+    if origin_access not in ORIGIN_ACCESS_MODES:
+        raise ValueError(f"cdn.origin_access must be one of {list(ORIGIN_ACCESS_MODES)}, got {origin_access!r}")
+    mam_mode = raw.pop("mam_mode", "split")
+    if mam_mode not in MAM_MODES:
+        raise ValueError(f"cdn.mam_mode must be one of {list(MAM_MODES)}, got {mam_mode!r}")
+    cache_policy = raw.pop("cache_policy", None)
+    origin_request_policy = raw.pop("origin_request_policy", None)
+    unknown = set(raw) - set(DISTRIBUTIONS)
+    if unknown:
+        raise ValueError(f"cdn: unknown keys {sorted(unknown)}")
+    return CdnSettings(
+        enabled=enabled,
+        origin_access=origin_access,
+        mam_mode=mam_mode,
+        cache_policy=None if cache_policy is None else _parse_cache_policy(cache_policy),
+        origin_request_policy=None if origin_request_policy is None else _parse_origin_request_policy(origin_request_policy),
+        distributions={name: _parse_distribution(name, entry or {}) for name, entry in raw.items()},
+    )
+
+
+def origin_shield(settings: DistributionSettings) -> Optional[aws.cloudfront.DistributionOriginOriginShieldArgs]:
+    """Origin Shield block for an origin, or None when disabled."""
+    if not settings.origin_shield_region:
+        return None
+    return aws.cloudfront.DistributionOriginOriginShieldArgs(
+        enabled=True,
+        origin_shield_region=settings.origin_shield_region,
+    )
+
+
+def _items(forwarding: Forwarding, args_type: Any) -> Any:
+    return args_type(items=list(forwarding.items)) if forwarding.items else None
+
+
+def _cache_key_args(settings: CachePolicySettings) -> aws.cloudfront.CachePolicyParametersInCacheKeyAndForwardedToOriginArgs:
+    return aws.cloudfront.CachePolicyParametersInCacheKeyAndForwardedToOriginArgs(
+        enable_accept_encoding_brotli=settings.brotli,
+        enable_accept_encoding_gzip=settings.gzip,
+        cookies_config=aws.cloudfront.CachePolicyParametersInCacheKeyAndForwardedToOriginCookiesConfigArgs(
+            cookie_behavior=settings.cookies.behavior,
+            cookies=_items(settings.cookies,
+                          aws.cloudfront.CachePolicyParametersInCacheKeyAndForwardedToOriginCookiesConfigCookiesArgs),
+        ),
+        headers_config=aws.cloudfront.CachePolicyParametersInCacheKeyAndForwardedToOriginHeadersConfigArgs(
+            header_behavior=settings.headers.behavior,
+            headers=_items(settings.headers,
+                          aws.cloudfront.CachePolicyParametersInCacheKeyAndForwardedToOriginHeadersConfigHeadersArgs),
+        ),
+        query_strings_config=aws.cloudfront.CachePolicyParametersInCacheKeyAndForwardedToOriginQueryStringsConfigArgs(
+            query_string_behavior=settings.query_strings.behavior,
+            query_strings=_items(settings.query_strings,
+                                aws.cloudfront.CachePolicyParametersInCacheKeyAndForwardedToOriginQueryStringsConfigQueryStringsArgs),
+        ),
+    )
+
+
+def create_cache_policy(resource_name: str, name: str, settings: CachePolicySettings) -> aws.cloudfront.CachePolicy:
+    """Cache policy for the default behaviors, from ``cdn.cache_policy``."""
+    return aws.cloudfront.CachePolicy(resource_name,
+        name=name,
+        comment=f"Default cache policy for {name}",
+        min_ttl=settings.min_ttl,
+        default_ttl=settings.default_ttl,
+        max_ttl=settings.max_ttl,
+        parameters_in_cache_key_and_forwarded_to_origin=_cache_key_args(settings))
+
+
+def create_origin_request_policy(resource_name: str,
+                                 name: str,
+                                 settings: OriginRequestPolicySettings) -> aws.cloudfront.OriginRequestPolicy:
+    """Origin request policy from ``cdn.origin_request_policy``."""
+    return aws.cloudfront.OriginRequestPolicy(resource_name,
+        name=name,
+        comment=f"Origin request policy for {name}",
+        cookies_config=aws.cloudfront.OriginRequestPolicyCookiesConfigArgs(
+            cookie_behavior=settings.cookies.behavior,
+            cookies=_items(settings.cookies, aws.cloudfront.OriginRequestPolicyCookiesConfigCookiesArgs),
+        ),
+        headers_config=aws.cloudfront.OriginRequestPolicyHeadersConfigArgs(
+            header_behavior=settings.headers.behavior,
+            headers=_items(settings.headers, aws.cloudfront.OriginRequestPolicyHeadersConfigHeadersArgs),
+        ),
+        query_strings_config=aws.cloudfront.OriginRequestPolicyQueryStringsConfigArgs(
+            query_string_behavior=settings.query_strings.behavior,
+            query_strings=_items(settings.query_strings, aws.cloudfront.OriginRequestPolicyQueryStringsConfigQueryStringsArgs),
+        ))
+
+
+def ordered_cache_behaviors(resource_name: str,
+                            policy_name: str,
+                            settings: DistributionSettings,
+                            target_origin_id: str,
+                            origin_request_policy_id: pulumi.Input[str],
+                            response_headers_policy_id: str,
+                            path_prefix: str = "",
+                            default_cache_policy_id: Optional[pulumi.Input[str]] = None,
+                            cache_key: Optional[CachePolicySettings] = None,
+                            realtime_log_config_arn: Optional[pulumi.Input[str]] = None,
+                            viewer_request_function_arn: Optional[pulumi.Input[str]] = None) -> Optional[List[aws.cloudfront.DistributionOrderedCacheBehaviorArgs]]:
+    """Create a cache policy per path pattern and the behaviors that use them.
+
+    Behaviors are evaluated in the configured order, so list the most specific
+    patterns first. Each policy has the behavior's TTLs and the cache key of
+    ``cache_key`` (no query strings, headers or cookies by default). With
+    ``path_prefix`` every pattern is nested under the prefix and a final
+    ``<prefix>*`` behavior using ``default_cache_policy_id`` routes the rest of
+    the prefix to ``target_origin_id``. ``viewer_request_function_arn`` is a
+    CloudFront Function run on every behavior's viewer requests.
+    """
+    cache_key = cache_key or CachePolicySettings()
+
+    def behavior_args(path_pattern: str, cache_policy_id: pulumi.Input[str]) -> aws.cloudfront.DistributionOrderedCacheBehaviorArgs:
+        return aws.cloudfront.DistributionOrderedCacheBehaviorArgs(
+            path_pattern=path_pattern,
+            allowed_methods=["GET", "HEAD"],
+            cached_methods=["GET", "HEAD"],
+            target_origin_id=target_origin_id,
+            compress=True,
+            viewer_protocol_policy="redirect-to-https",
+            cache_policy_id=cache_policy_id,
+            origin_request_policy_id=origin_request_policy_id,
+            response_headers_policy_id=response_headers_policy_id,
+            realtime_log_config_arn=realtime_log_config_arn,
+            function_associations=[aws.cloudfront.DistributionOrderedCacheBehaviorFunctionAssociationArgs(
+                event_type="viewer-request",
+                function_arn=viewer_request_function_arn,
+            )] if viewer_request_function_arn else None,
+        )
+
+    behaviors = []
+    for index, behavior in enumerate(settings.cache_behaviors):
+        cache_policy = aws.cloudfront.CachePolicy(f"{resource_name}-behavior-{index}",
+            name=f"{policy_name}-{index}",
+            comment=f"TTLs for {behavior.path_pattern}",
+            min_ttl=behavior.min_ttl,
+            default_ttl=behavior.default_ttl,
+            max_ttl=behavior.max_ttl,
+            parameters_in_cache_key_and_forwarded_to_origin=_cache_key_args(cache_key))
+        path_pattern = path_prefix + behavior.path_pattern.lstrip("/") if path_prefix else behavior.path_pattern
+        behaviors.append(behavior_args(path_pattern, cache_policy.id))
+    if path_prefix:
+        behaviors.append(behavior_args(f"{path_prefix}*", default_cache_policy_id))
+    return behaviors or None
+
+
+def create_origin_access_control(resource_name: str, name: str, origin_type: str = "s3") -> aws.cloudfront.OriginAccessControl:
+    """SigV4-signing Origin Access Control for S3 (or a Lambda function URL)."""
+    return aws.cloudfront.OriginAccessControl(resource_name,
+        name=name,
+        description=f"Origin access control for {name}",
+        origin_access_control_origin_type=origin_type,
+        signing_behavior="always",
+        signing_protocol="sigv4")
+
+
+def bucket_read_policy(bucket_arn: pulumi.Input[str],
+                       oai_arns: Sequence[pulumi.Input[str]] = (),
+                       distribution_arns: Sequence[pulumi.Input[str]] = ()) -> pulumi.Output[str]:
+    """Bucket policy letting CloudFront read objects via OAIs and/or OAC."""
+    statements = [policies.statement("s3:GetObject", policies.objects(bucket_arn), principal={"AWS": oai})
+                  for oai in oai_arns]
+    if distribution_arns:
+        statements.append(policies.statement("s3:GetObject", policies.objects(bucket_arn),
+            sid="AllowCloudFrontOriginAccessControl",
+            principal={"Service": "cloudfront.amazonaws.com"},
+            condition={"StringEquals": {"AWS:SourceArn": list(distribution_arns)}}))
+    return policies.policy_document(statements, limit=policies.BUCKET_POLICY_LIMIT)
+
+
+def failover_origin_group(origin_id: str,
+                          primary_origin_id: str,
+                          failover_origin_id: str,
+                          status_codes: Sequence[int]) -> aws.cloudfront.DistributionOriginGroupArgs:
+    """Origin group retrying ``status_codes`` from the primary against the failover origin."""
+    return aws.cloudfront.DistributionOriginGroupArgs(
+        origin_id=origin_id,
+        failover_criteria=aws.cloudfront.DistributionOriginGroupFailoverCriteriaArgs(
+            status_codes=list(status_codes),
+        ),
+        members=[
+            aws.cloudfront.DistributionOriginGroupMemberArgs(origin_id=primary_origin_id),
+            aws.cloudfront.DistributionOriginGroupMemberArgs(origin_id=failover_origin_id),
+        ],
+    )
@@ -0,0 +1,207 @@
+"""CloudFront additional metrics, cache alarms and real-time logs.
+
+Enabled by the ``cdn_monitoring`` config object; every key is optional::
+
+    cdn_monitoring:
+      cache_hit_rate: 80            # alarm when the hit rate drops below (%)
+      origin_latency_ms: 500        # alarm when p90 origin latency exceeds (ms)
+      error_rate_5xx: 1             # alarm when the 5xx rate exceeds (%)
+      period: 300
+      evaluation_periods: 3
+      alarm_actions:                # must live in us-east-1, like the metrics
+        - arn:aws:sns:us-east-1:909463554763:cdn-alerts
+      realtime_logs:                # optional Kinesis stream of sampled requests
+        sampling_rate: 10
+        shard_count: 1
+
+CloudFront publishes its metrics in us-east-1, so the alarms are created there
+whatever the stack region. ``CacheHitRate`` and ``OriginLatency`` only exist
+once additional metrics are enabled, which this module does per distribution.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Mapping, Optional, Tuple
+
+import pulumi
+import pulumi_aws as aws
+
+from contido import policies
+
+METRICS_REGION = "us-east-1"
+
+DEFAULT_LOG_FIELDS = (
+    "timestamp",
+    "c-ip",
+    "cs-host",
+    "cs-uri-stem",
+    "cs-uri-query",
+    "sc-status",
+    "sc-bytes",
+    "time-taken",
+    "x-edge-location",
+    "x-edge-result-type",
+    "x-edge-response-result-type",
+    "cache-behavior-path-pattern",
+)
+
+
+@dataclass(frozen=True)
+class RealtimeLogSettings:
+    sampling_rate: int = 100
+    shard_count: int = 1
+    retention_hours: int = 24
+    fields: Tuple[str, ...] = DEFAULT_LOG_FIELDS
+
+
+@dataclass(frozen=True)
+class CdnMonitoringSettings:
+    cache_hit_rate: float = 70.0
+    origin_latency_ms: float = 1000.0
+    error_rate_5xx: float = 1.0
+    period: int = 300
+    evaluation_periods: int = 3
+    alarm_actions: Tuple[str, ...] = ()
+    realtime_logs: Optional[RealtimeLogSettings] = None
+
+
+_KEYS = {"cache_hit_rate", "origin_latency_ms", "error_rate_5xx", "period", "evaluation_periods",
+         "alarm_actions", "realtime_logs"}
+_LOG_KEYS = {"sampling_rate", "shard_count", "retention_hours", "fields"}
+
+
+def _require_int(name: str, value: Any, low: int, high: int) -> None:
+    if not isinstance(value, int) or isinstance(value, bool) or not low <= value <= high:
+        raise ValueError(f"cdn_monitoring.{name} must be an integer in [{low}, {high}], got {value!r}")
+
+
+def _require_number(name: str, value: Any, low: float, high: Optional[float] = None) -> None:
+    if (not isinstance(value, (int, float)) or isinstance(value, bool) or value < low
+            or (high is not None and value > high)):
+        bounds = f"[{low}, {high}]" if high is not None else f">= {low}"
+        raise ValueError(f"cdn_monitoring.{name} must be a number {bounds}, got {value!r}")
+
+
+def _parse_realtime_logs(raw: Mapping[str, Any]) -> RealtimeLogSettings:
+    unknown = set(raw) - _LOG_KEYS
+    if unknown:
+        raise ValueError(f"cdn_monitoring.realtime_logs: unknown keys {sorted(unknown)}")
+    settings = RealtimeLogSettings(**{**raw, "fields": tuple(raw.get("fields") or DEFAULT_LOG_FIELDS)})
+    _require_int("realtime_logs.sampling_rate", settings.sampling_rate, 1, 100)
+    _require_int("realtime_logs.shard_count", settings.shard_count, 1, 500)
+    _require_int("realtime_logs.retention_hours", settings.retention_hours, 24, 8760)
+    if not all(isinstance(name, str) and name for name in settings.fields):
+        raise ValueError("cdn_monitoring.realtime_logs.fields must be non-empty field names")
+    return settings
+
+
+def parse_monitoring_settings(raw: Optional[Mapping[str, Any]]) -> Optional[CdnMonitoringSettings]:
+    """Validate ``cdn_monitoring``; None when the object is absent."""
+    if raw is None:
+        return None
+    raw = dict(raw)
+    unknown = set(raw) - _KEYS
+    if unknown:
+        raise ValueError(f"cdn_monitoring: unknown keys {sorted(unknown)}")
+
+    realtime_logs = raw.pop("realtime_logs", None)
+    alarm_actions = tuple(raw.pop("alarm_actions", None) or ())
+    settings = CdnMonitoringSettings(
+        alarm_actions=alarm_actions,
+        realtime_logs=None if realtime_logs is None else _parse_realtime_logs(realtime_logs or {}),
+        **raw,
+    )
+    _require_number("cache_hit_rate", settings.cache_hit_rate, 0, 100)
+    _require_number("origin_latency_ms", settings.origin_latency_ms, 0)
+    _require_number("error_rate_5xx", settings.error_rate_5xx, 0, 100)
+    _require_int("period", settings.period, 60, 86400)
+    if settings.period % 60:
+        raise ValueError(f"cdn_monitoring.period must be a multiple of 60, got {settings.period!r}")
+    _require_int("evaluation_periods", settings.evaluation_periods, 1, 100)
+    for arn in settings.alarm_actions:
+        if not arn.startswith(f"arn:aws:sns:{METRICS_REGION}:"):
+            raise ValueError(f"cdn_monitoring.alarm_actions must be SNS topics in {METRICS_REGION}, got {arn!r}")
+    return settings
+
+
+def create_realtime_log_config(resource_name: str,
+                               name: str,
+                               settings: RealtimeLogSettings,
+                               tags: Mapping[str, str]) -> aws.cloudfront.RealtimeLogConfig:
+    """Kinesis stream, the role CloudFront writes with, and the log config."""
+    stream = aws.kinesis.Stream(f"{resource_name}-stream",
+        name=name,
+        shard_count=settings.shard_count,
+        retention_period=settings.retention_hours,
+        encryption_type="KMS",
+        kms_key_id="alias/aws/kinesis",
+        tags=tags)
+
+    role = aws.iam.Role(f"{resource_name}-role",
+        name=f"{name}-realtime-logs",
+        assume_role_policy=policies.policy_document([
+            policies.statement("sts:AssumeRole", principal={"Service": "cloudfront.amazonaws.com"}),
+        ], limit=policies.ROLE_TRUST_POLICY_LIMIT),
+        tags=tags)
+
+    aws.iam.RolePolicy(f"{resource_name}-policy",
+        role=role.id,
+        policy=policies.policy_document([
+            policies.statement(["kinesis:DescribeStreamSummary", "kinesis:DescribeStream",
+                                "kinesis:PutRecord", "kinesis:PutRecords"], stream.arn),
+        ], limit=policies.INLINE_ROLE_POLICY_LIMIT))
+
+    return aws.cloudfront.RealtimeLogConfig(resource_name,
+        name=name,
+        sampling_rate=settings.sampling_rate,
+        fields=list(settings.fields),
+        endpoint=aws.cloudfront.RealtimeLogConfigEndpointArgs(
+            stream_type="Kinesis",
+            kinesis_stream_config=aws.cloudfront.RealtimeLogConfigEndpointKinesisStreamConfigArgs(
+                role_arn=role.arn,
+                stream_arn=stream.arn,
+            ),
+        ))
+
+
+def monitor_distribution(resource_name: str,
+                         distribution: aws.cloudfront.Distribution,
+                         name: str,
+                         settings: CdnMonitoringSettings,
+                         tags: Mapping[str, str]) -> None:
+    """Enable additional metrics and alarm on hit rate, origin latency and 5xx rate."""
+    aws.cloudfront.MonitoringSubscription(f"{resource_name}-monitoring",
+        distribution_id=distribution.id,
+        monitoring_subscription=aws.cloudfront.MonitoringSubscriptionMonitoringSubscriptionArgs(
+            realtime_metrics_subscription_config=aws.cloudfront.MonitoringSubscriptionMonitoringSubscriptionRealtimeMetricsSubscriptionConfigArgs(
+                realtime_metrics_subscription_status="Enabled",
+            ),
+        ))
+
+    alarms = (
+        ("cache-hit-rate", "CacheHitRate", {"statistic": "Average"}, "LessThanThreshold", settings.cache_hit_rate,
+         f"{name}: cache hit rate below {settings.cache_hit_rate}%"),
+        ("origin-latency", "OriginLatency", {"extended_statistic": "p90"}, "GreaterThanThreshold", settings.origin_latency_ms,
+         f"{name}: p90 origin latency above {settings.origin_latency_ms} ms"),
+        ("5xx-rate", "5xxErrorRate", {"statistic": "Average"}, "GreaterThanThreshold", settings.error_rate_5xx,
+         f"{name}: 5xx error rate above {settings.error_rate_5xx}%"),
+    )
+    for suffix, metric, statistic, comparison, threshold, description in alarms:
+        aws.cloudwatch.MetricAlarm(f"{resource_name}-{suffix}-alarm",
+            name=f"{name}-{suffix}",
+            alarm_description=description,
+            region=METRICS_REGION,
+            namespace="AWS/CloudFront",
+            metric_name=metric,
+            dimensions={"DistributionId": distribution.id, "Region": "Global"},
+            period=settings.period,
+            evaluation_periods=settings.evaluation_periods,
+            comparison_operator=comparison,
+            threshold=threshold,
+            # Idle distributions publish no datapoints; that is not an outage.
+            treat_missing_data="notBreaching",
+            alarm_actions=list(settings.alarm_actions),
+            ok_actions=list(settings.alarm_actions),
+            tags=tags,
+            **statistic)
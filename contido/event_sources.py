@@ -0,0 +1,98 @@
+"""SQS -> Lambda event source mapping settings.
+
+Each Lambda function reads its batching, partial batch failure reporting and
+concurrency cap from its own config object (``sync_event_source`` and
+``ingest_event_source``), e.g.::
+
+    ingest_event_source:
+      batch_size: 25
+      maximum_batching_window_in_seconds: 10
+      report_batch_item_failures: true
+      maximum_concurrency: 20
+
+Unset keys keep the baseline mapping: the top-level ``batch_size`` config
+value (default 1) for both functions, no batching window and no partial batch
+failure reporting. Mappings on FIFO queues take at most 10 messages per batch
+and no batching window.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Mapping, Optional
+
+import pulumi_aws as aws
+
+
+@dataclass(frozen=True)
+class EventSourceSettings:
+    batch_size: int = 1
+    maximum_batching_window_in_seconds: int = 0
+    # Opt-in: the function must then return the failed message IDs.
+    report_batch_item_failures: bool = False
+    # Leaves account concurrency for the other services during ingest bursts.
+    maximum_concurrency: Optional[int] = 50
+
+    def mapping_args(self) -> Dict[str, Any]:
+        """Keyword arguments for ``aws.lambda_.EventSourceMapping``."""
+        return {
+            "batch_size": self.batch_size,
+            # Omitted when zero: FIFO event sources reject the setting entirely.
+            "maximum_batching_window_in_seconds": self.maximum_batching_window_in_seconds or None,
+            "function_response_types": ["ReportBatchItemFailures"] if self.report_batch_item_failures else None,
+            "scaling_config": aws.lambda_.EventSourceMappingScalingConfigArgs(
+                maximum_concurrency=self.maximum_concurrency,
+            ) if self.maximum_concurrency is not None else None,
+        }
+
+
+_KEYS = {
+    "batch_size",
+    "maximum_batching_window_in_seconds",
+    "report_batch_item_failures",
+    "maximum_concurrency",
+}
+
+
+def _require_int(name: str, value: Any, low: int, high: int) -> None:
+    if not isinstance(value, int) or isinstance(value, bool) or not low <= value <= high:
+        raise ValueError(f"{name} must be an integer in [{low}, {high}], got {value!r}")
+
+
+def resolve_event_source_settings(name: str,
+                                  raw: Optional[Mapping[str, Any]],
+                                  batch_size: Optional[int] = None,
+                                  fifo: bool = False) -> EventSourceSettings:
+    """Merge the ``<name>`` config object over the defaults and validate it.
+
+    ``fifo`` marks a mapping on a FIFO queue.
+    """
+    raw = dict(raw or {})
+    unknown = set(raw) - _KEYS
+    if unknown:
+        raise ValueError(f"{name}: unknown keys {sorted(unknown)}")
+
+    settings = EventSourceSettings()
+    if batch_size is not None:
+        settings = replace(settings, batch_size=batch_size)
+    if fifo:
+        settings = replace(settings, maximum_batching_window_in_seconds=0)
+    settings = replace(settings, **raw)
+
+    # Limits for SQS standard queues.
+    _require_int(f"{name}.batch_size", settings.batch_size, 1, 10000)
+    _require_int(f"{name}.maximum_batching_window_in_seconds",
+                 settings.maximum_batching_window_in_seconds, 0, 300)
+    if settings.batch_size > 10 and settings.maximum_batching_window_in_seconds < 1:
+        raise ValueError(f"{name}: a batch_size above 10 requires "
+                         "maximum_batching_window_in_seconds of at least 1")
+    # FIFO queue limits.
+    if fifo:
+        _require_int(f"{name}.batch_size", settings.batch_size, 1, 10)
+        if settings.maximum_batching_window_in_seconds:
+            raise ValueError(f"{name}: maximum_batching_window_in_seconds is not supported on FIFO queues")
+    if not isinstance(settings.report_batch_item_failures, bool):
+        raise ValueError(f"{name}.report_batch_item_failures must be a boolean")
+    if settings.maximum_concurrency is not None:
+        _require_int(f"{name}.maximum_concurrency", settings.maximum_concurrency, 2, 1000)
+    return settings
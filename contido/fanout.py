@@ -0,0 +1,279 @@
+"""Run ``pulumi preview`` or ``pulumi up`` across many client stacks at once.
+
+The clients manifest lists one entry per stack plus shared defaults::
+
+    # clients.yaml
+    backend_url: s3://contido-pulumi-state      # optional, e.g. file://~/.pulumi-local
+    defaults:
+      aws:region: ap-south-1
+      account_id: "909463554763"
+    stacks:
+      - name: acme-prod
+        config:
+          client: acme
+          env: prod
+      - name: globex-dev
+        config:
+          client: globex
+          env: dev
+          batch_size: 25
+
+Usage::
+
+    python -m contido.fanout clients.yaml preview --workers 8
+    python -m contido.fanout clients.yaml up --fail-fast --only acme-prod
+
+Each stack writes its engine output to ``<log-dir>/<stack>.log``; a summary
+table is printed at the end and the exit code is non-zero if any stack failed.
+
+Every stack runs in its own temporary workspace that links to the program,
+so the manifest config never lands in the repo's ``Pulumi.<stack>.yaml``
+files and parallel stacks cannot overwrite each other's settings. A relative
+``file://`` backend is therefore made absolute first: against the manifest's
+directory for ``backend_url``, against the current directory for
+``--backend-url``.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+import yaml
+
+OPERATIONS = ("preview", "up")
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Name of the link to the program inside each stack's workspace; Pulumi only
+# accepts a ``main`` below the project directory.
+PROGRAM_LINK = "program"
+
+
+@dataclass(frozen=True)
+class StackSpec:
+    name: str
+    config: Mapping[str, Any] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class Manifest:
+    stacks: List[StackSpec]
+    backend_url: Optional[str] = None
+
+
+@dataclass
+class StackResult:
+    name: str
+    status: str  # "succeeded", "failed" or "skipped"
+    seconds: float = 0.0
+    summary: str = ""
+    log_path: Optional[str] = None
+
+
+def absolute_backend_url(backend_url: Optional[str], base_dir: str) -> Optional[str]:
+    """Resolve a relative ``file://`` backend against ``base_dir``; other URLs are returned unchanged."""
+    if not backend_url or not backend_url.startswith("file://"):
+        return backend_url
+    location, separator, query = backend_url[len("file://"):].partition("?")
+    location = os.path.expanduser(location)
+    if not os.path.isabs(location):
+        location = os.path.normpath(os.path.join(os.path.abspath(base_dir), location))
+    return f"file://{location}{separator}{query}"
+
+
+def load_manifest(path: str) -> Manifest:
+    """Parse a clients manifest and merge ``defaults`` into every stack."""
+    with open(path) as handle:
+        raw = yaml.safe_load(handle) or {}
+    unknown = set(raw) - {"backend_url", "defaults", "stacks"}
+    if unknown:
+        raise ValueError(f"{path}: unknown keys {sorted(unknown)}")
+
+    defaults = raw.get("defaults") or {}
+    stacks = []
+    seen = set()
+    for index, entry in enumerate(raw.get("stacks") or []):
+        if "name" not in entry:
+            raise ValueError(f"{path}: stacks[{index}] has no name")
+        if entry["name"] in seen:
+            raise ValueError(f"{path}: duplicate stack {entry['name']!r}")
+        seen.add(entry["name"])
+        stacks.append(StackSpec(name=entry["name"], config={**defaults, **(entry.get("config") or {})}))
+    if not stacks:
+        raise ValueError(f"{path}: no stacks listed")
+    return Manifest(stacks=stacks,
+                    backend_url=absolute_backend_url(raw.get("backend_url"), os.path.dirname(path) or "."))
+
+
+def _format_changes(changes: Optional[Mapping[Any, int]]) -> str:
+    counts = {getattr(op, "value", op): count for op, count in (changes or {}).items()}
+    return ", ".join(f"{op}={count}" for op, count in sorted(counts.items()))
+
+
+def project_settings(program_dir: str = PROJECT_DIR) -> Any:
+    """The ``Pulumi.yaml`` of ``program_dir`` for a workspace that links to it as ``PROGRAM_LINK``."""
+    from pulumi import automation as auto
+
+    with open(os.path.join(program_dir, "Pulumi.yaml")) as handle:
+        project = yaml.safe_load(handle)
+    runtime = project["runtime"]
+    if isinstance(runtime, Mapping):
+        options = dict(runtime.get("options") or {})
+        # A relative virtualenv would resolve against the temporary workspace.
+        if options.get("virtualenv") and not os.path.isabs(options["virtualenv"]):
+            options["virtualenv"] = os.path.join(program_dir, options["virtualenv"])
+        runtime = auto.ProjectRuntimeInfo(name=runtime["name"], options=options or None)
+    return auto.ProjectSettings(
+        name=project["name"],
+        runtime=runtime,
+        main=os.path.normpath(os.path.join(PROGRAM_LINK, project.get("main") or "")),
+        description=project.get("description"),
+    )
+
+
+@contextlib.contextmanager
+def isolated_workspace(stack_name: str, program_dir: str = PROJECT_DIR) -> Iterator[Tuple[str, Any]]:
+    """A temporary project directory linking to ``program_dir``, and its project settings.
+
+    The workspace writes ``Pulumi.yaml`` and ``Pulumi.<stack>.yaml`` there;
+    both are removed afterwards, the stack state lives in the backend.
+    """
+    with tempfile.TemporaryDirectory(prefix=f"fanout-{stack_name}-") as work_dir:
+        os.symlink(program_dir, os.path.join(work_dir, PROGRAM_LINK), target_is_directory=True)
+        yield work_dir, project_settings(program_dir)
+
+
+def run_stack(spec: StackSpec, operation: str, log_path: str,
+              backend_url: Optional[str] = None, program_dir: str = PROJECT_DIR) -> StackResult:
+    """Select (or create) one stack in an isolated workspace, apply its config and run ``operation``."""
+    from pulumi import automation as auto
+
+    # Pulumi would resolve a relative file:// backend inside the temporary
+    # workspace and the state would be deleted with it.
+    backend_url = absolute_backend_url(backend_url, os.getcwd())
+    env_vars = {"PULUMI_BACKEND_URL": backend_url} if backend_url else None
+    started = time.monotonic()
+    with open(log_path, "w") as log, isolated_workspace(spec.name, program_dir) as (work_dir, settings):
+        try:
+            stack = auto.create_or_select_stack(
+                stack_name=spec.name,
+                work_dir=work_dir,
+                opts=auto.LocalWorkspaceOptions(env_vars=env_vars, project_settings=settings),
+            )
+            stack.set_all_config({
+                key: auto.ConfigValue(value=value if isinstance(value, str) else json.dumps(value))
+                for key, value in spec.config.items()
+            })
+            if operation == "preview":
+                result = stack.preview(on_output=lambda line: log.write(line + "\n"))
+                summary = _format_changes(result.change_summary)
+            else:
+                result = stack.up(on_output=lambda line: log.write(line + "\n"))
+                summary = _format_changes(result.summary.resource_changes)
+        except Exception as exc:  # the engine error is in the log; keep the table short
+            log.write(f"\n{type(exc).__name__}: {exc}\n")
+            return StackResult(spec.name, "failed", time.monotonic() - started,
+                               str(exc).strip().splitlines()[-1] if str(exc).strip() else type(exc).__name__,
+                               log_path)
+    return StackResult(spec.name, "succeeded", time.monotonic() - started, summary, log_path)
+
+
+def fan_out(specs: Iterable[StackSpec],
+            operation: str,
+            log_dir: str,
+            workers: int = 4,
+            fail_fast: bool = False,
+            backend_url: Optional[str] = None,
+            runner: Callable[..., StackResult] = run_stack) -> List[StackResult]:
+    """Run ``operation`` on every stack with at most ``workers`` in flight.
+
+    With ``fail_fast`` no new stack is started after the first failure; stacks
+    already running are allowed to finish and the rest are reported as
+    skipped. ``runner`` is injectable so the scheduling can be exercised
+    without the Pulumi CLI.
+    """
+    if operation not in OPERATIONS:
+        raise ValueError(f"operation must be one of {OPERATIONS}, got {operation!r}")
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    os.makedirs(log_dir, exist_ok=True)
+
+    pending = list(specs)
+    results: Dict[str, StackResult] = {}
+    order = [spec.name for spec in pending]
+    stopped = False
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        running: Dict[Future, StackSpec] = {}
+        while pending or running:
+            while pending and len(running) < workers and not stopped:
+                spec = pending.pop(0)
+                log_path = os.path.join(log_dir, f"{spec.name}.log")
+                running[pool.submit(runner, spec, operation, log_path, backend_url)] = spec
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                spec = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    result = StackResult(spec.name, "failed", summary=str(exc))
+                results[spec.name] = result
+                if result.status == "failed" and fail_fast:
+                    stopped = True
+
+    for spec in pending:
+        results[spec.name] = StackResult(spec.name, "skipped", summary="not started after an earlier failure")
+    return [results[name] for name in order]
+
+
+def format_summary(results: Iterable[StackResult]) -> str:
+    """Render results as a fixed-width table."""
+    rows = [("STACK", "STATUS", "SECONDS", "CHANGES")]
+    rows += [(r.name, r.status, f"{r.seconds:.1f}", r.summary) for r in results]
+    widths = [max(len(row[col]) for row in rows) for col in range(3)]
+    return "\n".join(
+        f"{row[0]:<{widths[0]}}  {row[1]:<{widths[1]}}  {row[2]:>{widths[2]}}  {row[3]}".rstrip()
+        for row in rows)
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("manifest", help="Clients manifest (YAML)")
+    parser.add_argument("operation", choices=OPERATIONS)
+    parser.add_argument("--workers", type=int, default=4, help="Stacks to run in parallel")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--fail-fast", dest="fail_fast", action="store_true",
+                      help="Start no new stacks after the first failure")
+    mode.add_argument("--continue-on-error", dest="fail_fast", action="store_false",
+                      help="Run every stack regardless of failures (default)")
+    parser.add_argument("--only", action="append", help="Limit to these stacks (repeatable)")
+    parser.add_argument("--backend-url", default=None, help="Override the manifest backend, e.g. file://./.state "
+                        "(relative to the current directory)")
+    parser.add_argument("--log-dir", default="fanout-logs", help="Directory for per-stack logs")
+    args = parser.parse_args(argv)
+
+    manifest = load_manifest(args.manifest)
+    specs = manifest.stacks
+    if args.only:
+        unknown = set(args.only) - {spec.name for spec in specs}
+        if unknown:
+            parser.error(f"unknown stacks {sorted(unknown)}")
+        specs = [spec for spec in specs if spec.name in args.only]
+
+    results = fan_out(specs, args.operation, args.log_dir,
+                      workers=args.workers,
+                      fail_fast=args.fail_fast,
+                      backend_url=absolute_backend_url(args.backend_url, os.getcwd()) or manifest.backend_url)
+    print(format_summary(results))
+    return 0 if all(result.status == "succeeded" for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""Lambda sizing, versioning, the ``live`` alias and provisioned concurrency.
+
+Each container function is sized by its own config keys, falling back to the
+shared ``memory_size``, ``ephemeral_storage_size`` and ``lambda_timeout``
+values::
+
+    sync_architecture: arm64
+    sync_memory_size: 512
+    ingest_memory_size: 3008
+    ingest_ephemeral_storage_size: 10240
+    ingest_timeout: 900
+
+It also reads an optional deployment object
+(``sync_deployment`` / ``ingest_deployment``)::
+
+    ingest_deployment:
+      publish: true                  # publish versions and create the `live` alias
+      provisioned_concurrency: 2     # warm environments on `live` (0 = none)
+      schedule:                      # optional business-hours scaling
+        timezone: Asia/Kolkata
+        scale_up: "cron(0 9 ? * MON-FRI *)"
+        scale_down: "cron(0 20 ? * MON-FRI *)"
+        business_hours: 10
+        off_hours: 2
+
+Without ``publish`` the function is deployed as before and invoked at
+``$LATEST``.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Mapping, Optional
+
+import pulumi
+import pulumi_aws as aws
+
+ALIAS_NAME = "live"
+
+ARCHITECTURES = ("x86_64", "arm64")
+
+
+@dataclass(frozen=True)
+class FunctionSizing:
+    architecture: str = "x86_64"
+    memory_size: int = 1024
+    ephemeral_storage_size: int = 2048
+    timeout: int = 900
+
+    def function_args(self) -> Mapping[str, Any]:
+        """Keyword arguments for ``aws.lambda_.Function``."""
+        return {
+            "architectures": [self.architecture],
+            "memory_size": self.memory_size,
+            "ephemeral_storage": aws.lambda_.FunctionEphemeralStorageArgs(
+                size=self.ephemeral_storage_size,
+            ),
+            "timeout": self.timeout,
+        }
+
+
+@dataclass(frozen=True)
+class ConcurrencySchedule:
+    scale_up: str
+    scale_down: str
+    business_hours: int
+    off_hours: int
+    timezone: str = "UTC"
+
+
+@dataclass(frozen=True)
+class DeploymentSettings:
+    publish: bool = False
+    provisioned_concurrency: int = 0
+    schedule: Optional[ConcurrencySchedule] = None
+
+
+_KEYS = {"publish", "provisioned_concurrency", "schedule"}
+_SCHEDULE_KEYS = {"scale_up", "scale_down", "business_hours", "off_hours", "timezone"}
+
+
+def _require_int(name: str, value: Any, low: int) -> None:
+    if not isinstance(value, int) or isinstance(value, bool) or value < low:
+        raise ValueError(f"{name} must be an integer >= {low}, got {value!r}")
+
+
+def _require_range(name: str, value: Any, low: int, high: int) -> None:
+    if not isinstance(value, int) or isinstance(value, bool) or not low <= value <= high:
+        raise ValueError(f"{name} must be an integer in [{low}, {high}], got {value!r}")
+
+
+def resolve_function_sizing(name: str, values: Mapping[str, Any], defaults: FunctionSizing) -> FunctionSizing:
+    """Read ``<name>_architecture``/``_memory_size``/``_ephemeral_storage_size``/``_timeout``."""
+    architecture = values.get(f"{name}_architecture")
+    memory_size = values.get(f"{name}_memory_size")
+    ephemeral_storage_size = values.get(f"{name}_ephemeral_storage_size")
+    timeout = values.get(f"{name}_timeout")
+    sizing = FunctionSizing(
+        architecture=defaults.architecture if architecture is None else architecture,
+        memory_size=defaults.memory_size if memory_size is None else memory_size,
+        ephemeral_storage_size=defaults.ephemeral_storage_size if ephemeral_storage_size is None else ephemeral_storage_size,
+        timeout=defaults.timeout if timeout is None else timeout,
+    )
+
+    # Lambda service limits.
+    if sizing.architecture not in ARCHITECTURES:
+        raise ValueError(f"{name}_architecture must be one of {list(ARCHITECTURES)}, got {sizing.architecture!r}")
+    _require_range(f"{name}_memory_size", sizing.memory_size, 128, 10240)
+    _require_range(f"{name}_ephemeral_storage_size", sizing.ephemeral_storage_size, 512, 10240)
+    _require_range(f"{name}_timeout", sizing.timeout, 1, 900)
+    return sizing
+
+
+def resolve_deployment_settings(name: str, raw: Optional[Mapping[str, Any]]) -> DeploymentSettings:
+    """Validate the ``<name>`` deployment config object."""
+    raw = dict(raw or {})
+    unknown = set(raw) - _KEYS
+    if unknown:
+        raise ValueError(f"{name}: unknown keys {sorted(unknown)}")
+
+    publish = raw.get("publish", False)
+    if not isinstance(publish, bool):
+        raise ValueError(f"{name}.publish must be a boolean")
+    provisioned = raw.get("provisioned_concurrency", 0)
+    _require_int(f"{name}.provisioned_concurrency", provisioned, 0)
+
+    schedule = None
+    if raw.get("schedule"):
+        schedule_raw = dict(raw["schedule"])
+        unknown = set(schedule_raw) - _SCHEDULE_KEYS
+        if unknown:
+            raise ValueError(f"{name}.schedule: unknown keys {sorted(unknown)}")
+        missing = {"scale_up", "scale_down", "business_hours", "off_hours"} - set(schedule_raw)
+        if missing:
+            raise ValueError(f"{name}.schedule: missing {sorted(missing)}")
+        schedule = ConcurrencySchedule(**schedule_raw)
+        _require_int(f"{name}.schedule.business_hours", schedule.business_hours, 1)
+        _require_int(f"{name}.schedule.off_hours", schedule.off_hours, 1)
+        if schedule.off_hours > schedule.business_hours:
+            raise ValueError(f"{name}.schedule.off_hours must not exceed business_hours")
+        for field in ("scale_up", "scale_down"):
+            expression = getattr(schedule, field)
+            if not isinstance(expression, str) or not expression.startswith(("cron(", "rate(", "at(")):
+                raise ValueError(f"{name}.schedule.{field} must be a cron(), rate() or at() expression")
+
+    if (provisioned or schedule) and not publish:
+        raise ValueError(f"{name}: provisioned concurrency requires publish: true")
+    if schedule and not provisioned:
+        provisioned = schedule.off_hours
+    return DeploymentSettings(publish=publish, provisioned_concurrency=provisioned, schedule=schedule)
+
+
+def create_live_alias(resource_name: str,
+                      function: aws.lambda_.Function,
+                      settings: DeploymentSettings,
+                      tags: Mapping[str, str]) -> Optional[aws.lambda_.Alias]:
+    """Point the ``live`` alias at the latest published version and keep it warm."""
+    if not settings.publish:
+        return None
+
+    alias = aws.lambda_.Alias(f"{resource_name}-{ALIAS_NAME}",
+        name=ALIAS_NAME,
+        function_name=function.name,
+        function_version=function.version)
+
+    if not settings.provisioned_concurrency:
+        return alias
+
+    # Scheduled scaling owns the warm capacity once it is enabled.
+    provisioned = aws.lambda_.ProvisionedConcurrencyConfig(f"{resource_name}-provisioned-concurrency",
+        function_name=function.name,
+        qualifier=alias.name,
+        provisioned_concurrent_executions=settings.provisioned_concurrency,
+        opts=pulumi.ResourceOptions(
+            ignore_changes=["provisionedConcurrentExecutions"] if settings.schedule else None))
+
+    schedule = settings.schedule
+    if schedule:
+        target = aws.appautoscaling.Target(f"{resource_name}-concurrency-target",
+            service_namespace="lambda",
+            scalable_dimension="lambda:function:ProvisionedConcurrency",
+            resource_id=pulumi.Output.concat("function:", function.name, ":", alias.name),
+            min_capacity=schedule.off_hours,
+            max_capacity=schedule.business_hours,
+            tags=tags,
+            opts=pulumi.ResourceOptions(depends_on=[provisioned]))
+
+        for action, expression, capacity in (
+                ("scale-up", schedule.scale_up, schedule.business_hours),
+                ("scale-down", schedule.scale_down, schedule.off_hours)):
+            aws.appautoscaling.ScheduledAction(f"{resource_name}-concurrency-{action}",
+                service_namespace=target.service_namespace,
+                scalable_dimension=target.scalable_dimension,
+                resource_id=target.resource_id,
+                schedule=expression,
+                timezone=schedule.timezone,
+                scalable_target_action=aws.appautoscaling.ScheduledActionScalableTargetActionArgs(
+                    min_capacity=capacity,
+                    max_capacity=capacity,
+                ))
+
+    return alias
@@ -0,0 +1,290 @@
+"""S3 Inventory reports with a Glue/Athena catalog over them.
+
+Reconciliation and sync jobs that list a bucket with ``ListObjectsV2`` pay
+for one LIST request per 1000 keys and take hours on tens of millions of
+objects. With the optional ``inventory`` config object S3 writes a Parquet
+inventory of each listed bucket to a reports bucket instead, and jobs query
+it through Athena::
+
+    inventory:
+      buckets: [mam, archive]       # default
+      frequency: Daily              # Daily | Weekly
+      included_versions: Current    # Current | All (adds version columns)
+      report_retention_days: 14     # reports under inventory/ expire after
+      bytes_scanned_cutoff_mb: 10240
+      result_retention_days: 7      # query results under athena-results/
+
+Each bucket gets a Glue table ``<bucket>_inventory`` reading the ``hive/``
+symlink manifests S3 writes with every report, partitioned by the report
+date ``dt`` through partition projection, so a new report is queryable as
+soon as it lands::
+
+    SELECT key, size FROM mam_inventory
+    WHERE dt = '2024-05-01-01-00' AND storage_class = 'GLACIER'
+
+The Athena workgroup enforces its result location and a per-query scan
+limit, so an unfiltered query over every partition fails instead of billing.
+The first report arrives within 48 hours of the configuration being created.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, List, Mapping, Optional, Sequence, Tuple
+
+import pulumi
+import pulumi_aws as aws
+
+from contido import policies
+
+DEFAULT_BUCKETS = ("mam", "archive")
+FREQUENCIES = ("Daily", "Weekly")
+INCLUDED_VERSIONS = ("Current", "All")
+
+CONFIGURATION_ID = "catalog"
+REPORTS_PREFIX = "inventory"
+RESULTS_PREFIX = "athena-results"
+PROJECTION_START = "2024-01-01-00-00"
+
+OPTIONAL_FIELDS = (
+    "Size",
+    "LastModifiedDate",
+    "StorageClass",
+    "ETag",
+    "IsMultipartUploaded",
+    "ReplicationStatus",
+    "EncryptionStatus",
+    "IntelligentTieringAccessTier",
+)
+
+# Parquet inventory columns, in report order. Version columns are only
+# written when every version is listed.
+_KEY_COLUMNS = (("bucket", "string"), ("key", "string"))
+_VERSION_COLUMNS = (("version_id", "string"), ("is_latest", "boolean"), ("is_delete_marker", "boolean"))
+_FIELD_COLUMNS = (
+    ("size", "bigint"),
+    ("last_modified_date", "timestamp"),
+    ("e_tag", "string"),
+    ("storage_class", "string"),
+    ("is_multipart_uploaded", "boolean"),
+    ("replication_status", "string"),
+    ("encryption_status", "string"),
+    ("intelligent_tiering_access_tier", "string"),
+)
+
+# Athena refuses per-query limits below 10 MB.
+_MINIMUM_CUTOFF_MB = 10
+_FREQUENCY_DAYS = {"Daily": 1, "Weekly": 7}
+
+
+@dataclass(frozen=True)
+class InventorySettings:
+    buckets: Tuple[str, ...] = DEFAULT_BUCKETS
+    frequency: str = "Daily"
+    included_versions: str = "Current"
+    report_retention_days: int = 14
+    bytes_scanned_cutoff_mb: int = 10240
+    result_retention_days: int = 7
+
+    @property
+    def columns(self) -> Tuple[Tuple[str, str], ...]:
+        versions = _VERSION_COLUMNS if self.included_versions == "All" else ()
+        return _KEY_COLUMNS + versions + _FIELD_COLUMNS
+
+
+_KEYS = {
+    "buckets",
+    "frequency",
+    "included_versions",
+    "report_retention_days",
+    "bytes_scanned_cutoff_mb",
+    "result_retention_days",
+}
+
+
+def _require_int(name: str, value: Any, low: int) -> None:
+    if not isinstance(value, int) or isinstance(value, bool) or value < low:
+        raise ValueError(f"inventory.{name} must be an integer >= {low}, got {value!r}")
+
+
+def parse_inventory_settings(raw: Optional[Mapping[str, Any]],
+                             buckets: Sequence[str]) -> Optional[InventorySettings]:
+    """Validate ``inventory``; None when the object is absent."""
+    if raw is None:
+        return None
+    unknown = set(raw) - _KEYS
+    if unknown:
+        raise ValueError(f"inventory: unknown keys {sorted(unknown)}")
+    settings = InventorySettings(**{**raw, "buckets": tuple(raw.get("buckets") or DEFAULT_BUCKETS)})
+
+    for bucket in settings.buckets:
+        if bucket not in buckets:
+            raise ValueError(f"inventory.buckets: unknown bucket {bucket!r}")
+    if len(set(settings.buckets)) != len(settings.buckets):
+        raise ValueError(f"inventory.buckets: duplicate buckets in {list(settings.buckets)}")
+    if settings.frequency not in FREQUENCIES:
+        raise ValueError(f"inventory.frequency must be one of {list(FREQUENCIES)}, got {settings.frequency!r}")
+    if settings.included_versions not in INCLUDED_VERSIONS:
+        raise ValueError(f"inventory.included_versions must be one of {list(INCLUDED_VERSIONS)}, "
+                         f"got {settings.included_versions!r}")
+    # Keep the previous report until the next one has landed.
+    _require_int("report_retention_days", settings.report_retention_days,
+                 _FREQUENCY_DAYS[settings.frequency] + 1)
+    _require_int("bytes_scanned_cutoff_mb", settings.bytes_scanned_cutoff_mb, _MINIMUM_CUTOFF_MB)
+    _require_int("result_retention_days", settings.result_retention_days, 1)
+    return settings
+
+
+def database_name(client: str, env: str) -> str:
+    """Glue database name; Athena needs quoting for hyphens, so use underscores."""
+    return f"contido_{client}_{env}".replace("-", "_")
+
+
+def table_name(bucket: str) -> str:
+    return f"{bucket}_inventory"
+
+
+def report_lifecycle_rules(settings: InventorySettings) -> List[aws.s3.BucketLifecycleConfigurationRuleArgs]:
+    """Expire old inventory reports and Athena query results."""
+    return [
+        aws.s3.BucketLifecycleConfigurationRuleArgs(
+            id=f"expire-{prefix}",
+            status="Enabled",
+            filter=aws.s3.BucketLifecycleConfigurationRuleFilterArgs(prefix=f"{prefix}/"),
+            expiration=aws.s3.BucketLifecycleConfigurationRuleExpirationArgs(days=days),
+        )
+        for prefix, days in ((REPORTS_PREFIX, settings.report_retention_days),
+                             (RESULTS_PREFIX, settings.result_retention_days))
+    ] + [
+        aws.s3.BucketLifecycleConfigurationRuleArgs(
+            id="abort-incomplete-multipart-uploads",
+            status="Enabled",
+            filter=aws.s3.BucketLifecycleConfigurationRuleFilterArgs(prefix=""),
+            abort_incomplete_multipart_upload=aws.s3.BucketLifecycleConfigurationRuleAbortIncompleteMultipartUploadArgs(
+                days_after_initiation=1,
+            ),
+        ),
+    ]
+
+
+def delivery_policy(reports_bucket_arn: pulumi.Input[str],
+                    source_bucket_arns: Sequence[pulumi.Input[str]],
+                    account_id: str) -> pulumi.Output[str]:
+    """Bucket policy letting S3 Inventory write reports for the source buckets."""
+    return policies.policy_document([
+        policies.statement(["s3:PutObject"], [pulumi.Output.concat(reports_bucket_arn, f"/{REPORTS_PREFIX}/*")],
+            sid="InventoryDelivery",
+            principal={"Service": "s3.amazonaws.com"},
+            condition={
+                "StringEquals": {"aws:SourceAccount": account_id},
+                "ArnLike": {"aws:SourceArn": list(source_bucket_arns)},
+            }),
+    ], limit=policies.BUCKET_POLICY_LIMIT)
+
+
+def query_policy(region: str,
+                 account_id: str,
+                 workgroup_name: str,
+                 database: str,
+                 reports_bucket_arn: pulumi.Input[str]) -> pulumi.Output[str]:
+    """Run Athena queries in the workgroup over the inventory tables."""
+    catalog = f"arn:aws:glue:{region}:{account_id}"
+    return policies.policy_document([
+        policies.statement(["athena:StartQueryExecution", "athena:StopQueryExecution", "athena:GetQueryExecution",
+                            "athena:GetQueryResults", "athena:GetWorkGroup"],
+            [f"arn:aws:athena:{region}:{account_id}:workgroup/{workgroup_name}"], sid="Athena"),
+        policies.statement(["glue:GetDatabase", "glue:GetTable", "glue:GetTables", "glue:GetPartition",
+                            "glue:GetPartitions"],
+            [f"{catalog}:catalog", f"{catalog}:database/{database}", f"{catalog}:table/{database}/*"], sid="Catalog"),
+        policies.statement(["s3:GetBucketLocation", "s3:ListBucket"], [reports_bucket_arn], sid="ReportsBucket"),
+        policies.statement(["s3:GetObject"],
+            [pulumi.Output.concat(reports_bucket_arn, f"/{REPORTS_PREFIX}/*")], sid="Reports"),
+        policies.statement(["s3:GetObject", "s3:PutObject", "s3:AbortMultipartUpload"],
+            [pulumi.Output.concat(reports_bucket_arn, f"/{RESULTS_PREFIX}/*")], sid="Results"),
+    ], limit=policies.MANAGED_POLICY_LIMIT)
+
+
+def create_bucket_inventory(resource_name: str,
+                            source_bucket: aws.s3.Bucket,
+                            reports_bucket: aws.s3.Bucket,
+                            settings: InventorySettings,
+                            opts: Optional[pulumi.ResourceOptions] = None) -> aws.s3.Inventory:
+    """Parquet inventory of ``source_bucket`` delivered under ``inventory/``."""
+    return aws.s3.Inventory(resource_name,
+        bucket=source_bucket.id,
+        name=CONFIGURATION_ID,
+        included_object_versions=settings.included_versions,
+        schedule=aws.s3.InventoryScheduleArgs(frequency=settings.frequency),
+        optional_fields=list(OPTIONAL_FIELDS),
+        destination=aws.s3.InventoryDestinationArgs(
+            bucket=aws.s3.InventoryDestinationBucketArgs(
+                bucket_arn=reports_bucket.arn,
+                format="Parquet",
+                prefix=REPORTS_PREFIX,
+                encryption=aws.s3.InventoryDestinationBucketEncryptionArgs(
+                    sse_s3=aws.s3.InventoryDestinationBucketEncryptionSseS3Args(),
+                ),
+            ),
+        ),
+        opts=opts)
+
+
+def create_inventory_table(resource_name: str,
+                           name: str,
+                           database: aws.glue.CatalogDatabase,
+                           source_bucket: aws.s3.Bucket,
+                           reports_bucket: aws.s3.Bucket,
+                           settings: InventorySettings) -> aws.glue.CatalogTable:
+    """Athena table over the ``hive/`` symlink manifests of one bucket's reports."""
+    # S3 writes <prefix>/<source bucket>/<configuration id>/hive/dt=YYYY-MM-DD-HH-MM/symlink.txt
+    location = pulumi.Output.concat("s3://", reports_bucket.bucket, f"/{REPORTS_PREFIX}/",
+                                    source_bucket.bucket, f"/{CONFIGURATION_ID}/hive/")
+    return aws.glue.CatalogTable(resource_name,
+        name=name,
+        database_name=database.name,
+        table_type="EXTERNAL_TABLE",
+        parameters={
+            "EXTERNAL": "TRUE",
+            "projection.enabled": "true",
+            "projection.dt.type": "date",
+            "projection.dt.format": "yyyy-MM-dd-HH-mm",
+            # Reports land on the hour; queries should pin dt to one of them.
+            "projection.dt.range": PROJECTION_START + ",NOW",
+            "projection.dt.interval": "1",
+            "projection.dt.interval.unit": "HOURS",
+        },
+        partition_keys=[aws.glue.CatalogTablePartitionKeyArgs(name="dt", type="string")],
+        storage_descriptor=aws.glue.CatalogTableStorageDescriptorArgs(
+            location=location,
+            input_format="org.apache.hadoop.hive.ql.io.SymlinkTextInputFormat",
+            output_format="org.apache.hadoop.hive.ql.io.HiveIgnoreKeyTextOutputFormat",
+            ser_de_info=aws.glue.CatalogTableStorageDescriptorSerDeInfoArgs(
+                serialization_library="org.apache.hadoop.hive.ql.io.parquet.serde.ParquetHiveSerDe",
+            ),
+            columns=[aws.glue.CatalogTableStorageDescriptorColumnArgs(name=column, type=column_type)
+                     for column, column_type in settings.columns],
+        ))
+
+
+def create_workgroup(resource_name: str,
+                     name: str,
+                     reports_bucket: aws.s3.Bucket,
+                     settings: InventorySettings,
+                     tags: Mapping[str, str]) -> aws.athena.Workgroup:
+    """Workgroup with an enforced result location and per-query scan limit."""
+    return aws.athena.Workgroup(resource_name,
+        name=name,
+        description="Queries over the S3 inventory catalog",
+        configuration=aws.athena.WorkgroupConfigurationArgs(
+            enforce_workgroup_configuration=True,
+            publish_cloudwatch_metrics_enabled=True,
+            bytes_scanned_cutoff_per_query=settings.bytes_scanned_cutoff_mb * 1024 * 1024,
+            result_configuration=aws.athena.WorkgroupConfigurationResultConfigurationArgs(
+                output_location=pulumi.Output.concat("s3://", reports_bucket.bucket, f"/{RESULTS_PREFIX}/"),
+                encryption_configuration=aws.athena.WorkgroupConfigurationResultConfigurationEncryptionConfigurationArgs(
+                    encryption_option="SSE_S3",
+                ),
+            ),
+        ),
+        force_destroy=True,
+        tags=tags)
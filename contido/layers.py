@@ -0,0 +1,206 @@
+"""Layered stacks: base, edge and compute in separate Pulumi stacks.
+
+By default one stack holds every resource, so each ``pulumi up`` and
+``pulumi refresh`` diffs the CloudFront distributions, even for a new Lambda
+image. With the optional ``layer`` config object a client is split into
+three stacks that are updated independently::
+
+    layer:
+      name: compute                              # base | edge | compute
+      base_stack: acme/contido-infra-pulumi/prod # edge and compute only
+
+``base`` owns the buckets, IAM, queues, alarms and inventory and exports
+them as the ``base`` stack output; ``edge`` (CloudFront, origin access,
+Route53) and ``compute`` (Lambda, function alarms) read that output through
+a ``pulumi.StackReference``. Resource names are the same in every layout.
+
+An existing single stack becomes the base stack; the edge and compute
+resources are moved into their new stacks without touching AWS::
+
+    pulumi config set --path layer.name base --stack prod
+    python -m contido.layers move prod prod-edge --yes
+    python -m contido.layers move prod prod-compute --yes
+
+``move`` previews the destination stack and moves every resource it would
+create that the source stack already has under the same name, with
+``pulumi state move``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+import pulumi
+import pulumi_aws as aws
+
+LAYERS = ("base", "edge", "compute")
+BASE_OUTPUT = "base"
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass(frozen=True)
+class LayerSettings:
+    # None: a single stack with every layer
+    name: Optional[str] = None
+    base_stack: Optional[str] = None
+
+    def includes(self, layer: str) -> bool:
+        return self.name is None or self.name == layer
+
+
+def parse_layer_settings(raw: Optional[Mapping[str, Any]]) -> LayerSettings:
+    """Validate the ``layer`` config object."""
+    if raw is None:
+        return LayerSettings()
+    raw = dict(raw)
+    unknown = set(raw) - {"name", "base_stack"}
+    if unknown:
+        raise ValueError(f"layer: unknown keys {sorted(unknown)}")
+    name = raw.get("name")
+    if name not in LAYERS:
+        raise ValueError(f"layer.name must be one of {list(LAYERS)}, got {name!r}")
+    base_stack = raw.get("base_stack")
+    if name == "base":
+        if base_stack is not None:
+            raise ValueError("layer.base_stack is only used by the edge and compute layers")
+    elif not isinstance(base_stack, str) or not base_stack or len(base_stack.split("/")) not in (1, 3):
+        raise ValueError(f"layer.base_stack must be a stack name or <org>/<project>/<stack>, got {base_stack!r}")
+    return LayerSettings(name=name, base_stack=base_stack)
+
+
+@dataclass(frozen=True)
+class BucketOutputs:
+    id: pulumi.Output[str]
+    arn: pulumi.Output[str]
+    bucket_regional_domain_name: pulumi.Output[str]
+
+
+@dataclass(frozen=True)
+class BaseOutputs:
+    """What the edge and compute layers use from the base layer."""
+
+    # Keyed like settings.BUCKETS
+    buckets: Dict[str, BucketOutputs]
+    role_arn: pulumi.Output[str]
+    # Keyed like settings.QUEUE_PROFILES
+    queue_arns: Dict[str, pulumi.Output[str]]
+    # None until the base layer's monitoring is built
+    alarm_topic_arn: Optional[pulumi.Output[str]] = None
+
+    def bucket(self, key: str) -> BucketOutputs:
+        return self.buckets[key]
+
+
+def base_outputs(buckets: Mapping[str, aws.s3.Bucket],
+                 role: aws.iam.Role,
+                 queues: Mapping[str, aws.sqs.Queue],
+                 alarm_topic_arn: Optional[pulumi.Output[str]] = None) -> BaseOutputs:
+    """Base outputs of resources declared in this stack."""
+    return BaseOutputs(
+        buckets={key: BucketOutputs(bucket.id, bucket.arn, bucket.bucket_regional_domain_name)
+                 for key, bucket in buckets.items()},
+        role_arn=role.arn,
+        queue_arns={key: queue.arn for key, queue in queues.items()},
+        alarm_topic_arn=alarm_topic_arn,
+    )
+
+
+def export_base(base: BaseOutputs) -> None:
+    """Export ``base`` as the stack output the other layers reference."""
+    pulumi.export(BASE_OUTPUT, {
+        "buckets": {key: {"id": bucket.id, "arn": bucket.arn,
+                          "bucket_regional_domain_name": bucket.bucket_regional_domain_name}
+                    for key, bucket in base.buckets.items()},
+        "role_arn": base.role_arn,
+        "queue_arns": base.queue_arns,
+        "alarm_topic_arn": base.alarm_topic_arn,
+    })
+
+
+def reference_base(settings: LayerSettings, bucket_keys: Iterable[str], queue_keys: Iterable[str]) -> BaseOutputs:
+    """Base outputs read from ``layer.base_stack``."""
+    output = pulumi.StackReference(BASE_OUTPUT, stack_name=settings.base_stack).require_output(BASE_OUTPUT)
+
+    def field(*path: str) -> pulumi.Output[Any]:
+        def lookup(value: Any) -> Any:
+            for key in path:
+                value = value[key]
+            return value
+        return output.apply(lookup)
+
+    return BaseOutputs(
+        buckets={key: BucketOutputs(field("buckets", key, "id"), field("buckets", key, "arn"),
+                                    field("buckets", key, "bucket_regional_domain_name"))
+                 for key in bucket_keys},
+        role_arn=field("role_arn"),
+        queue_arns={key: field("queue_arns", key) for key in queue_keys},
+        alarm_topic_arn=field("alarm_topic_arn"),
+    )
+
+
+def _stack(urn: str) -> str:
+    return urn.split("::", 1)[0].rsplit(":", 1)[-1]
+
+
+def moved_urns(preview: Mapping[str, Any], source_urns: Iterable[str]) -> List[str]:
+    """Source URNs of the resources a destination preview would create.
+
+    ``preview`` is the output of ``pulumi preview --json`` for the empty
+    destination stack. URNs differ between the stacks only in the stack name;
+    providers are copied by ``pulumi state move`` itself.
+    """
+    source_urns = list(source_urns)
+    if not source_urns:
+        return []
+    source_stack = _stack(source_urns[0])
+    existing = set(source_urns)
+    moved = []
+    for step in preview.get("steps") or []:
+        _, _, rest = (step.get("urn") or "").partition("::")
+        # rest is ``project::type::name``; skip steps without such a URN
+        parts = rest.split("::", 2)
+        if step.get("op") != "create" or len(parts) != 3 or parts[1].startswith("pulumi:"):
+            continue
+        candidate = f"urn:pulumi:{source_stack}::{rest}"
+        if candidate in existing:
+            moved.append(candidate)
+    return moved
+
+
+def _pulumi(*args: str) -> str:
+    return subprocess.run(["pulumi", *args, "--cwd", PROJECT_DIR, "--non-interactive"],
+                          check=True, capture_output=True, text=True).stdout
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Move edge or compute resources out of a single stack.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    move = subcommands.add_parser("move", help="Move the resources a layer stack would create")
+    move.add_argument("source", help="Stack that holds the resources today")
+    move.add_argument("dest", help="Layer stack (layer.name edge or compute) to move them into")
+    move.add_argument("--yes", action="store_true", help="Run pulumi state move instead of listing the URNs")
+    args = parser.parse_args(argv)
+
+    deployment = json.loads(_pulumi("stack", "export", "--stack", args.source))
+    source_urns = [resource["urn"] for resource in deployment.get("deployment", {}).get("resources") or []]
+    urns = moved_urns(json.loads(_pulumi("preview", "--json", "--stack", args.dest)), source_urns)
+    if not urns:
+        print(f"nothing to move from {args.source} to {args.dest}")
+        return 0
+    print("\n".join(urns))
+    if not args.yes:
+        print(f"{len(urns)} resources; rerun with --yes to move them")
+        return 0
+    _pulumi("state", "move", "--source", args.source, "--dest", args.dest, "--yes", *urns)
+    print(f"moved {len(urns)} resources from {args.source} to {args.dest}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""S3 lifecycle policies per bucket.
+
+The ``lifecycle`` config object is keyed by bucket (``upload``, ``mam``,
+``asset``, ``archive``, ``edit``); an entry replaces that bucket's default
+policy from ``DEFAULT_LIFECYCLE`` entirely, and ``{}`` removes it. The
+defaults only clean up (incomplete multipart uploads, old archive versions);
+storage-class transitions are always opt-in::
+
+    lifecycle:
+      archive:
+        abort_incomplete_multipart_days: 7
+        noncurrent_version_expiration_days: 90
+        transitions:
+          - prefix: ""
+            days: 30
+            storage_class: GLACIER
+      mam:
+        transitions:
+          - prefix: proxy/
+            days: 0
+            storage_class: INTELLIGENT_TIERING
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import pulumi_aws as aws
+
+STORAGE_CLASSES = (
+    "STANDARD_IA",
+    "ONEZONE_IA",
+    "INTELLIGENT_TIERING",
+    "GLACIER_IR",
+    "GLACIER",
+    "DEEP_ARCHIVE",
+)
+
+# S3 rejects transitions to the infrequent-access classes before day 30.
+_MINIMUM_DAYS = {"STANDARD_IA": 30, "ONEZONE_IA": 30}
+
+
+@dataclass(frozen=True)
+class Transition:
+    prefix: str
+    days: int
+    storage_class: str
+
+
+@dataclass(frozen=True)
+class LifecyclePolicy:
+    transitions: Tuple[Transition, ...] = ()
+    noncurrent_version_expiration_days: Optional[int] = None
+    abort_incomplete_multipart_days: Optional[int] = None
+
+
+# No default moves objects to another storage class: Intelligent-Tiering bills
+# per-object monitoring and Glacier changes how objects are read back, so
+# each stack opts in per bucket once the access pattern is known.
+DEFAULT_LIFECYCLE = {
+    # Failed partner uploads otherwise leave billed, invisible parts behind.
+    "upload": LifecyclePolicy(
+        abort_incomplete_multipart_days=3,
+    ),
+    "mam": LifecyclePolicy(
+        abort_incomplete_multipart_days=7,
+    ),
+    "archive": LifecyclePolicy(
+        noncurrent_version_expiration_days=90,
+        abort_incomplete_multipart_days=7,
+    ),
+    "edit": LifecyclePolicy(
+        abort_incomplete_multipart_days=7,
+    ),
+}
+
+_KEYS = {"transitions", "noncurrent_version_expiration_days", "abort_incomplete_multipart_days"}
+_TRANSITION_KEYS = {"prefix", "days", "storage_class"}
+
+
+def _require_int(name: str, value: Any, low: int) -> None:
+    if not isinstance(value, int) or isinstance(value, bool) or value < low:
+        raise ValueError(f"{name} must be an integer >= {low}, got {value!r}")
+
+
+def _parse_policy(bucket: str, raw: Mapping[str, Any]) -> LifecyclePolicy:
+    unknown = set(raw) - _KEYS
+    if unknown:
+        raise ValueError(f"lifecycle.{bucket}: unknown keys {sorted(unknown)}")
+    transitions = []
+    for index, entry in enumerate(raw.get("transitions") or []):
+        unknown = set(entry) - _TRANSITION_KEYS
+        if unknown:
+            raise ValueError(f"lifecycle.{bucket}.transitions[{index}]: unknown keys {sorted(unknown)}")
+        transitions.append(Transition(
+            prefix=entry.get("prefix") or "",
+            days=entry.get("days", 0),
+            storage_class=entry.get("storage_class", "INTELLIGENT_TIERING"),
+        ))
+    return LifecyclePolicy(
+        transitions=tuple(transitions),
+        noncurrent_version_expiration_days=raw.get("noncurrent_version_expiration_days"),
+        abort_incomplete_multipart_days=raw.get("abort_incomplete_multipart_days"),
+    )
+
+
+def validate_policy(bucket: str, policy: LifecyclePolicy, versioned: bool) -> None:
+    """Check a policy against the S3 lifecycle rules it will be rendered into."""
+    seen = set()
+    for index, transition in enumerate(policy.transitions):
+        name = f"lifecycle.{bucket}.transitions[{index}]"
+        if transition.storage_class not in STORAGE_CLASSES:
+            raise ValueError(f"{name}.storage_class must be one of {list(STORAGE_CLASSES)}, "
+                             f"got {transition.storage_class!r}")
+        _require_int(f"{name}.days", transition.days, _MINIMUM_DAYS.get(transition.storage_class, 0))
+        key = (transition.prefix, transition.storage_class)
+        if key in seen:
+            raise ValueError(f"{name}: duplicate transition to {transition.storage_class} "
+                             f"for prefix {transition.prefix!r}")
+        seen.add(key)
+    if policy.noncurrent_version_expiration_days is not None:
+        if not versioned:
+            raise ValueError(f"lifecycle.{bucket}.noncurrent_version_expiration_days "
+                             "requires a versioned bucket")
+        _require_int(f"lifecycle.{bucket}.noncurrent_version_expiration_days",
+                     policy.noncurrent_version_expiration_days, 1)
+    if policy.abort_incomplete_multipart_days is not None:
+        _require_int(f"lifecycle.{bucket}.abort_incomplete_multipart_days",
+                     policy.abort_incomplete_multipart_days, 1)
+
+
+def resolve_policies(raw: Optional[Mapping[str, Mapping]],
+                     buckets: Sequence[str],
+                     versioned: Sequence[str]) -> Dict[str, LifecyclePolicy]:
+    """Merge the ``lifecycle`` config over ``DEFAULT_LIFECYCLE`` and validate it."""
+    policies = dict(DEFAULT_LIFECYCLE)
+    for bucket, entry in (raw or {}).items():
+        if bucket not in buckets:
+            raise ValueError(f"lifecycle: unknown bucket {bucket!r}")
+        policies[bucket] = _parse_policy(bucket, entry or {})
+    for bucket, policy in policies.items():
+        validate_policy(bucket, policy, bucket in versioned)
+    return policies
+
+
+def lifecycle_rules(policy: Optional[LifecyclePolicy]) -> List[aws.s3.BucketLifecycleConfigurationRuleArgs]:
+    """Render a policy as ``BucketLifecycleConfiguration`` rules (one per prefix)."""
+    if policy is None:
+        return []
+    rules = []
+    by_prefix: Dict[str, List[Transition]] = {}
+    for transition in policy.transitions:
+        by_prefix.setdefault(transition.prefix, []).append(transition)
+    for prefix, transitions in by_prefix.items():
+        rules.append(aws.s3.BucketLifecycleConfigurationRuleArgs(
+            id=f"tier-{prefix.rstrip('/') or 'all'}",
+            status="Enabled",
+            filter=aws.s3.BucketLifecycleConfigurationRuleFilterArgs(prefix=prefix),
+            transitions=[aws.s3.BucketLifecycleConfigurationRuleTransitionArgs(
+                days=transition.days,
+                storage_class=transition.storage_class,
+            ) for transition in sorted(transitions, key=lambda t: t.days)],
+        ))
+    if policy.noncurrent_version_expiration_days is not None:
+        rules.append(aws.s3.BucketLifecycleConfigurationRuleArgs(
+            id="expire-noncurrent-versions",
+            status="Enabled",
+            filter=aws.s3.BucketLifecycleConfigurationRuleFilterArgs(prefix=""),
+            noncurrent_version_expiration=aws.s3.BucketLifecycleConfigurationRuleNoncurrentVersionExpirationArgs(
+                noncurrent_days=policy.noncurrent_version_expiration_days,
+            ),
+        ))
+    if policy.abort_incomplete_multipart_days is not None:
+        rules.append(aws.s3.BucketLifecycleConfigurationRuleArgs(
+            id="abort-incomplete-multipart-uploads",
+            status="Enabled",
+            filter=aws.s3.BucketLifecycleConfigurationRuleFilterArgs(prefix=""),
+            abort_incomplete_multipart_upload=aws.s3.BucketLifecycleConfigurationRuleAbortIncompleteMultipartUploadArgs(
+                days_after_initiation=policy.abort_incomplete_multipart_days,
+            ),
+        ))
+    return rules
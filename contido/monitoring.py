@@ -0,0 +1,280 @@
+"""CloudWatch dashboard and alarms for the workflow queues and Lambda functions.
+
+Nothing here names a queue or function: the program passes in every queue it
+declared (with its resolved ``QueueSettings``) and every Lambda it created,
+and one dashboard plus one alarm set is derived from that registry. Alarms
+notify a per-stack SNS topic. Thresholds come from the optional
+``monitoring`` config object::
+
+    monitoring:
+      alarm_emails: [media-ops@example.com]
+      queue_age_seconds: 900        # oldest message age (raised to the queue's visibility timeout)
+      queue_depth: 1000             # visible messages
+      lambda_duration_ratio: 0.8    # p99 duration as a fraction of the function timeout
+      lambda_concurrency_ratio: 0.9 # concurrent executions as a fraction of the ESM cap
+      lambda_throttles: 1
+      period: 300
+      evaluation_periods: 3
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import pulumi
+import pulumi_aws as aws
+
+from contido.queues import QueueSettings
+
+
+@dataclass(frozen=True)
+class MonitoringSettings:
+    alarm_emails: Tuple[str, ...] = ()
+    queue_age_seconds: int = 900
+    queue_depth: int = 1000
+    lambda_duration_ratio: float = 0.8
+    lambda_concurrency_ratio: float = 0.9
+    lambda_throttles: int = 1
+    period: int = 300
+    evaluation_periods: int = 3
+
+
+@dataclass(frozen=True)
+class MonitoredQueue:
+    key: str
+    queue: aws.sqs.Queue
+    dead_letter_queue: aws.sqs.Queue
+    settings: QueueSettings
+
+
+@dataclass(frozen=True)
+class MonitoredFunction:
+    key: str
+    function: aws.lambda_.Function
+    timeout: int
+    maximum_concurrency: Optional[int] = None
+
+
+_KEYS = {
+    "alarm_emails",
+    "queue_age_seconds",
+    "queue_depth",
+    "lambda_duration_ratio",
+    "lambda_concurrency_ratio",
+    "lambda_throttles",
+    "period",
+    "evaluation_periods",
+}
+
+
+def _require_int(name: str, value: Any, low: int) -> None:
+    if not isinstance(value, int) or isinstance(value, bool) or value < low:
+        raise ValueError(f"monitoring.{name} must be an integer >= {low}, got {value!r}")
+
+
+def _require_ratio(name: str, value: Any) -> None:
+    if not isinstance(value, (int, float)) or isinstance(value, bool) or not 0 < value <= 1:
+        raise ValueError(f"monitoring.{name} must be a number in (0, 1], got {value!r}")
+
+
+def parse_monitoring_settings(raw: Optional[Mapping[str, Any]]) -> MonitoringSettings:
+    """Validate the ``monitoring`` config object."""
+    raw = dict(raw or {})
+    unknown = set(raw) - _KEYS
+    if unknown:
+        raise ValueError(f"monitoring: unknown keys {sorted(unknown)}")
+    settings = MonitoringSettings(**{**raw, "alarm_emails": tuple(raw.get("alarm_emails") or ())})
+    _require_int("queue_age_seconds", settings.queue_age_seconds, 60)
+    _require_int("queue_depth", settings.queue_depth, 1)
+    _require_int("lambda_throttles", settings.lambda_throttles, 1)
+    _require_int("period", settings.period, 60)
+    if settings.period % 60:
+        raise ValueError(f"monitoring.period must be a multiple of 60, got {settings.period!r}")
+    _require_int("evaluation_periods", settings.evaluation_periods, 1)
+    _require_ratio("lambda_duration_ratio", settings.lambda_duration_ratio)
+    _require_ratio("lambda_concurrency_ratio", settings.lambda_concurrency_ratio)
+    for email in settings.alarm_emails:
+        if not isinstance(email, str) or "@" not in email:
+            raise ValueError(f"monitoring.alarm_emails: {email!r} is not an email address")
+    return settings
+
+
+def create_alarm_topic(resource_name: str,
+                       name: str,
+                       settings: MonitoringSettings,
+                       tags: Mapping[str, str]) -> aws.sns.Topic:
+    """SNS topic every alarm notifies, with optional email subscriptions."""
+    topic = aws.sns.Topic(resource_name,
+        name=name,
+        tags=tags)
+    for index, email in enumerate(settings.alarm_emails):
+        aws.sns.TopicSubscription(f"{resource_name}-email-{index}",
+            topic=topic.arn,
+            protocol="email",
+            endpoint=email)
+    return topic
+
+
+def _alarm(resource_name: str,
+           name: str,
+           description: str,
+           namespace: str,
+           metric_name: str,
+           dimensions: Mapping[str, pulumi.Input[str]],
+           comparison: str,
+           threshold: float,
+           settings: MonitoringSettings,
+           topic_arn: pulumi.Input[str],
+           tags: Mapping[str, str],
+           statistic: str = "Maximum",
+           extended_statistic: Optional[str] = None) -> aws.cloudwatch.MetricAlarm:
+    return aws.cloudwatch.MetricAlarm(resource_name,
+        name=name,
+        alarm_description=description,
+        namespace=namespace,
+        metric_name=metric_name,
+        dimensions=dimensions,
+        statistic=None if extended_statistic else statistic,
+        extended_statistic=extended_statistic,
+        period=settings.period,
+        evaluation_periods=settings.evaluation_periods,
+        comparison_operator=comparison,
+        threshold=threshold,
+        treat_missing_data="notBreaching",
+        alarm_actions=[topic_arn],
+        ok_actions=[topic_arn],
+        tags=tags)
+
+
+def create_queue_alarms(prefix: str,
+                        queues: Sequence[MonitoredQueue],
+                        settings: MonitoringSettings,
+                        topic_arn: pulumi.Input[str],
+                        tags: Mapping[str, str]) -> None:
+    """Backlog age, backlog depth and dead-letter alarms for every queue."""
+    for entry in queues:
+        resource_name = entry.key.replace("_", "-")
+        # A message may legitimately stay invisible for one visibility timeout.
+        age = max(settings.queue_age_seconds, entry.settings.visibility_timeout_seconds)
+        _alarm(f"{resource_name}-queue-age-alarm", f"{prefix}-{resource_name}-queue-age",
+               f"{entry.key} queue: oldest message older than {age} s",
+               "AWS/SQS", "ApproximateAgeOfOldestMessage", {"QueueName": entry.queue.name},
+               "GreaterThanThreshold", age, settings, topic_arn, tags)
+        _alarm(f"{resource_name}-queue-depth-alarm", f"{prefix}-{resource_name}-queue-depth",
+               f"{entry.key} queue: more than {settings.queue_depth} visible messages",
+               "AWS/SQS", "ApproximateNumberOfMessagesVisible", {"QueueName": entry.queue.name},
+               "GreaterThanThreshold", settings.queue_depth, settings, topic_arn, tags)
+        _alarm(f"{resource_name}-dlq-alarm", f"{prefix}-{resource_name}-dlq",
+               f"{entry.key} queue: messages in the dead-letter queue",
+               "AWS/SQS", "ApproximateNumberOfMessagesVisible", {"QueueName": entry.dead_letter_queue.name},
+               "GreaterThanThreshold", 0, settings, topic_arn, tags)
+
+
+def create_function_alarms(prefix: str,
+                           functions: Sequence[MonitoredFunction],
+                           settings: MonitoringSettings,
+                           topic_arn: pulumi.Input[str],
+                           tags: Mapping[str, str]) -> None:
+    """Saturation alarms: p99 duration near the timeout, throttles, concurrency."""
+    for entry in functions:
+        resource_name = entry.key.replace("_", "-")
+        dimensions = {"FunctionName": entry.function.name}
+        duration_ms = entry.timeout * 1000 * settings.lambda_duration_ratio
+        _alarm(f"{resource_name}-duration-alarm", f"{prefix}-{resource_name}-duration",
+               f"{entry.key} Lambda: p99 duration above {duration_ms:.0f} ms",
+               "AWS/Lambda", "Duration", dimensions,
+               "GreaterThanThreshold", duration_ms, settings, topic_arn, tags, extended_statistic="p99")
+        _alarm(f"{resource_name}-throttles-alarm", f"{prefix}-{resource_name}-throttles",
+               f"{entry.key} Lambda: throttled invocations",
+               "AWS/Lambda", "Throttles", dimensions,
+               "GreaterThanOrEqualToThreshold", settings.lambda_throttles, settings, topic_arn, tags,
+               statistic="Sum")
+        if entry.maximum_concurrency:
+            concurrency = entry.maximum_concurrency * settings.lambda_concurrency_ratio
+            _alarm(f"{resource_name}-concurrency-alarm", f"{prefix}-{resource_name}-concurrency",
+                   f"{entry.key} Lambda: concurrency near the event source cap of {entry.maximum_concurrency}",
+                   "AWS/Lambda", "ConcurrentExecutions", dimensions,
+                   "GreaterThanOrEqualToThreshold", concurrency, settings, topic_arn, tags)
+
+
+def _widget(title: str, region: str, metrics: List[List[Any]], stat: str, period: int) -> Dict[str, Any]:
+    return {
+        "type": "metric",
+        "width": 12,
+        "height": 6,
+        "properties": {
+            "title": title,
+            "region": region,
+            "metrics": metrics,
+            "stat": stat,
+            "period": period,
+            "view": "timeSeries",
+        },
+    }
+
+
+def dashboard_body(region: str,
+                   queue_names: Mapping[str, Tuple[str, str]],
+                   function_names: Mapping[str, str],
+                   period: int = 300) -> str:
+    """Render the dashboard JSON from resolved queue and function names.
+
+    ``queue_names`` maps each queue key to ``(queue name, DLQ name)``.
+    """
+    def series(namespace: str, metric: str, dimension: str, names: Mapping[str, str]) -> List[List[Any]]:
+        return [[namespace, metric, dimension, name, {"label": key}] for key, name in names.items()]
+
+    queues = {key: names[0] for key, names in queue_names.items()}
+    dlqs = {key: names[1] for key, names in queue_names.items()}
+    widgets = []
+    # The compute layer's dashboard has no queues (see contido.layers)
+    if queue_names:
+        widgets += [
+            _widget("Queue age of oldest message (s)", region,
+                    series("AWS/SQS", "ApproximateAgeOfOldestMessage", "QueueName", queues), "Maximum", period),
+            _widget("Queue visible messages", region,
+                    series("AWS/SQS", "ApproximateNumberOfMessagesVisible", "QueueName", queues), "Maximum", period),
+            _widget("Dead-letter queue visible messages", region,
+                    series("AWS/SQS", "ApproximateNumberOfMessagesVisible", "QueueName", dlqs), "Maximum", period),
+        ]
+    if function_names:
+        widgets += [
+            _widget("Lambda duration p99 (ms)", region,
+                    series("AWS/Lambda", "Duration", "FunctionName", function_names), "p99", period),
+            _widget("Lambda throttles", region,
+                    series("AWS/Lambda", "Throttles", "FunctionName", function_names), "Sum", period),
+            _widget("Lambda concurrent executions", region,
+                    series("AWS/Lambda", "ConcurrentExecutions", "FunctionName", function_names), "Maximum", period),
+            # Only stream event sources report IteratorAge; SQS-triggered functions show no data.
+            _widget("Lambda iterator age (ms)", region,
+                    series("AWS/Lambda", "IteratorAge", "FunctionName", function_names), "Maximum", period),
+        ]
+    for index, widget in enumerate(widgets):
+        widget["x"] = (index % 2) * 12
+        widget["y"] = (index // 2) * 6
+    return json.dumps({"widgets": widgets})
+
+
+def create_dashboard(resource_name: str,
+                     name: str,
+                     region: str,
+                     queues: Sequence[MonitoredQueue],
+                     functions: Sequence[MonitoredFunction],
+                     settings: MonitoringSettings) -> aws.cloudwatch.Dashboard:
+    """One dashboard covering every registered queue and function."""
+    queue_keys = [entry.key for entry in queues]
+    function_keys = [entry.key for entry in functions]
+
+    def render(names: List[str]) -> str:
+        queue_names = {key: (names[2 * i], names[2 * i + 1]) for i, key in enumerate(queue_keys)}
+        offset = 2 * len(queue_keys)
+        function_names = dict(zip(function_keys, names[offset:]))
+        return dashboard_body(region, queue_names, function_names, settings.period)
+
+    names = [name_output for entry in queues for name_output in (entry.queue.name, entry.dead_letter_queue.name)]
+    names += [entry.function.name for entry in functions]
+    return aws.cloudwatch.Dashboard(resource_name,
+        dashboard_name=name,
+        dashboard_body=pulumi.Output.all(*names).apply(render))
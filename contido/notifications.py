@@ -0,0 +1,133 @@
+"""S3 event notification routing.
+
+Routes are a flat table of (bucket, events, prefix, suffix) -> queue entries,
+read from the ``s3_notifications`` stack config (none by default). All routes
+for one bucket are rendered into a single ``aws.s3.BucketNotification``
+because S3 keeps exactly one notification configuration per bucket.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import pulumi_aws as aws
+
+if TYPE_CHECKING:
+    # contido.bucket loads pulumi_aws.s3; settings parses routes without it
+    from contido.bucket import ContidoBucket
+
+
+@dataclass(frozen=True)
+class NotificationRoute:
+    bucket: str
+    queue: str
+    events: Tuple[str, ...]
+    prefix: str = ""
+    suffix: str = ""
+
+
+# Like the baseline program, a stack without ``s3_notifications`` sends no
+# bucket events; each stack lists the routes its consumers actually use.
+DEFAULT_ROUTES: Tuple[NotificationRoute, ...] = ()
+
+def parse_routes(raw: Optional[Sequence[Mapping]]) -> List[NotificationRoute]:
+    """Build routes from the ``s3_notifications`` config object."""
+    if raw is None:
+        return list(DEFAULT_ROUTES)
+    routes = []
+    for index, entry in enumerate(raw):
+        unknown = set(entry) - {"bucket", "queue", "events", "prefix", "suffix"}
+        if unknown:
+            raise ValueError(f"s3_notifications[{index}]: unknown keys {sorted(unknown)}")
+        try:
+            bucket, queue = entry["bucket"], entry["queue"]
+        except KeyError as exc:
+            raise ValueError(f"s3_notifications[{index}]: missing {exc.args[0]!r}") from None
+        events = entry.get("events") or ["s3:ObjectCreated:*"]
+        if isinstance(events, str):
+            events = [events]
+        routes.append(NotificationRoute(
+            bucket=bucket,
+            queue=queue,
+            events=tuple(events),
+            prefix=entry.get("prefix") or "",
+            suffix=entry.get("suffix") or "",
+        ))
+    return routes
+
+
+def _events_overlap(left: str, right: str) -> bool:
+    # "s3:ObjectCreated:*" covers every "s3:ObjectCreated:<type>" event.
+    if left == right:
+        return True
+    left_base, _, left_type = left.rpartition(":")
+    right_base, _, right_type = right.rpartition(":")
+    return left_base == right_base and "*" in (left_type, right_type)
+
+
+def routes_overlap(left: NotificationRoute, right: NotificationRoute) -> bool:
+    """Return True if a single object event could match both routes."""
+    if left.bucket != right.bucket:
+        return False
+    if not any(_events_overlap(a, b) for a in left.events for b in right.events):
+        return False
+    prefixes_overlap = left.prefix.startswith(right.prefix) or right.prefix.startswith(left.prefix)
+    suffixes_overlap = left.suffix.endswith(right.suffix) or right.suffix.endswith(left.suffix)
+    return prefixes_overlap and suffixes_overlap
+
+
+def validate_routes(routes: Sequence[NotificationRoute],
+                    buckets: Mapping[str, object],
+                    queue_sources: Mapping[str, str]) -> None:
+    """Reject unknown targets and overlapping filters.
+
+    ``queue_sources`` maps each queue key to the bucket key its queue policy
+    lets S3 send from; a route to any other queue would be refused by SQS.
+    """
+    for route in routes:
+        if route.bucket not in buckets:
+            raise ValueError(f"S3 notification route targets unknown bucket {route.bucket!r}")
+        if route.queue not in queue_sources:
+            raise ValueError(f"S3 notification route targets queue {route.queue!r}, "
+                             "which has no S3 queue policy")
+        if queue_sources[route.queue] != route.bucket:
+            raise ValueError(f"Queue {route.queue!r} only accepts S3 events from "
+                             f"bucket {queue_sources[route.queue]!r}, not {route.bucket!r}")
+        for event in route.events:
+            if not event.startswith("s3:"):
+                raise ValueError(f"Invalid S3 event type {event!r}")
+    for index, left in enumerate(routes):
+        for right in routes[index + 1:]:
+            if routes_overlap(left, right):
+                raise ValueError(
+                    f"S3 notification routes overlap on bucket {left.bucket!r}: "
+                    f"{left.queue!r} (prefix={left.prefix!r}, suffix={left.suffix!r}) and "
+                    f"{right.queue!r} (prefix={right.prefix!r}, suffix={right.suffix!r})")
+
+
+def create_bucket_notifications(routes: Sequence[NotificationRoute],
+                                buckets: Mapping[str, ContidoBucket],
+                                queues: Mapping[str, aws.sqs.Queue],
+                                queue_policies: Mapping[str, aws.sqs.QueuePolicy]) -> Dict[str, aws.s3.BucketNotification]:
+    """Emit one ``BucketNotification`` per bucket that has at least one route.
+
+    S3 test-publishes to every queue when the configuration is written, so each
+    notification waits for the queue policies of the queues it targets.
+    """
+    by_bucket: Dict[str, List[NotificationRoute]] = {}
+    for route in routes:
+        by_bucket.setdefault(route.bucket, []).append(route)
+
+    notifications = {}
+    for bucket_key, bucket_routes in by_bucket.items():
+        notifications[bucket_key] = buckets[bucket_key].notify(
+            [aws.s3.BucketNotificationQueueArgs(
+                id=f"{route.queue}-{index}",
+                queue_arn=queues[route.queue].arn,
+                events=list(route.events),
+                filter_prefix=route.prefix or None,
+                filter_suffix=route.suffix or None,
+            ) for index, route in enumerate(bucket_routes)],
+            depends_on=[queue_policies[route.queue] for route in bucket_routes])
+    return notifications
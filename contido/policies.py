@@ -0,0 +1,140 @@
+"""IAM, S3 and SQS policy documents built from Pulumi Outputs.
+
+Statements are plain dicts whose values may be Outputs; ``policy_document``
+resolves them with ``Output.all`` and renders the document with
+``json.dumps``, so no policy is assembled from quoted string fragments::
+
+    policies.policy_document([
+        policies.statement(["s3:ListBucket"], [bucket.arn], sid="1"),
+        policies.statement(["s3:GetObject"], [policies.objects(bucket.arn)], sid="2"),
+    ], limit=policies.MANAGED_POLICY_LIMIT)
+
+Actions and resources keep the form they are given in (``"*"`` or
+``["*"]``) and statement keys are written in a fixed order as compact JSON,
+so a document renders byte-for-byte like the equivalent hand-written JSON.
+With ``merge=True`` statements that differ only in their actions, or only
+in their resources, are folded into one, and duplicates disappear. With
+``limit`` the rendered document is checked against the service's size limit.
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Union
+
+import pulumi
+
+VERSION = "2012-10-17"
+
+# Policy size limits. IAM does not count whitespace, and compact JSON has none.
+MANAGED_POLICY_LIMIT = 6144
+INLINE_ROLE_POLICY_LIMIT = 10240
+ROLE_TRUST_POLICY_LIMIT = 2048
+BUCKET_POLICY_LIMIT = 20480
+
+EFFECTS = ("Allow", "Deny")
+
+_ACTION = re.compile(r"^(\*|[a-z0-9-]+:[A-Za-z0-9*]+)$")
+_SID = re.compile(r"^[A-Za-z0-9]+$")
+
+Values = Union[pulumi.Input[str], Sequence[pulumi.Input[str]]]
+
+
+def objects(bucket_arn: pulumi.Input[str]) -> pulumi.Output[str]:
+    """Resource ARN of every object in a bucket."""
+    return pulumi.Output.concat(bucket_arn, "/*")
+
+
+def statement(actions: Union[str, Sequence[str]],
+              resources: Optional[Values] = None,
+              effect: str = "Allow",
+              sid: Optional[str] = None,
+              principal: Optional[Any] = None,
+              condition: Optional[Mapping[str, Any]] = None) -> Dict[str, Any]:
+    """One statement. Trust and resource policies name a ``principal``."""
+    if effect not in EFFECTS:
+        raise ValueError(f"policy statement effect must be one of {list(EFFECTS)}, got {effect!r}")
+    action_list = [actions] if isinstance(actions, str) else list(actions)
+    if not action_list:
+        raise ValueError("policy statement needs at least one action")
+    for action in action_list:
+        if not _ACTION.match(action):
+            raise ValueError(f"policy statement action {action!r} is not <service>:<action>")
+    if sid is not None and not _SID.match(sid):
+        raise ValueError(f"policy statement Sid must be alphanumeric, got {sid!r}")
+    if resources is None and principal is None:
+        raise ValueError("policy statement needs resources or a principal")
+
+    rendered: Dict[str, Any] = {}
+    if sid is not None:
+        rendered["Sid"] = sid
+    rendered["Effect"] = effect
+    if principal is not None:
+        rendered["Principal"] = principal
+    rendered["Action"] = actions if isinstance(actions, str) else action_list
+    if resources is not None:
+        rendered["Resource"] = resources if isinstance(resources, (str, pulumi.Output)) else list(resources)
+    if condition is not None:
+        rendered["Condition"] = condition
+    return rendered
+
+
+def _as_list(value: Union[str, List[str]]) -> List[str]:
+    return [value] if isinstance(value, str) else list(value)
+
+
+def _fold(statements: Sequence[Mapping[str, Any]], key: str) -> List[Dict[str, Any]]:
+    folded: List[Dict[str, Any]] = []
+    by_rest: Dict[str, Dict[str, Any]] = {}
+    for entry in statements:
+        if key not in entry:
+            folded.append(dict(entry))
+            continue
+        rest = json.dumps({name: value for name, value in entry.items() if name != key}, sort_keys=True)
+        target = by_rest.get(rest)
+        if target is None:
+            by_rest[rest] = dict(entry)
+            folded.append(by_rest[rest])
+            continue
+        values = _as_list(target[key])
+        values += [value for value in _as_list(entry[key]) if value not in values]
+        target[key] = values[0] if len(values) == 1 and isinstance(target[key], str) else values
+    return folded
+
+
+def merge_statements(statements: Sequence[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+    """Fold resolved statements that differ only in Action, then only in Resource.
+
+    Statements with different Sids are never folded together.
+    """
+    return _fold(_fold(statements, "Action"), "Resource")
+
+
+def _check_resolved(statements: Sequence[Mapping[str, Any]]) -> None:
+    sids = [entry["Sid"] for entry in statements if "Sid" in entry]
+    duplicates = sorted({sid for sid in sids if sids.count(sid) > 1})
+    if duplicates:
+        raise ValueError(f"policy has duplicate Sids {duplicates}")
+    for entry in statements:
+        for resource in _as_list(entry.get("Resource", [])):
+            if not isinstance(resource, str) or not (resource == "*" or resource.startswith("arn:")):
+                raise ValueError(f"policy resource {resource!r} is not an ARN or '*'")
+
+
+def render(statements: Sequence[Mapping[str, Any]],
+           merge: bool = False,
+           limit: Optional[int] = None) -> str:
+    """Render resolved statements as a compact policy document."""
+    if merge:
+        statements = merge_statements(statements)
+    _check_resolved(statements)
+    document = json.dumps({"Version": VERSION, "Statement": list(statements)}, separators=(",", ":"))
+    if limit is not None and len(document) > limit:
+        raise ValueError(f"policy document is {len(document)} characters, over the {limit} character limit")
+    return document
+
+
+def policy_document(statements: Sequence[Mapping[str, Any]],
+                    merge: bool = False,
+                    limit: Optional[int] = None) -> pulumi.Output[str]:
+    """Resolve every Output in ``statements`` and render the document."""
+    return pulumi.Output.all(*statements).apply(lambda resolved: render(resolved, merge, limit))
@@ -0,0 +1,242 @@
+"""SQS queue tuning profiles.
+
+Every workflow queue is created from a named profile that sets long polling,
+retention and delay, and derives the visibility timeout from how long the
+consumer is expected to hold a message. Individual queues can be tuned per
+stack through the ``queues`` config object, e.g.::
+
+    queues:
+      transfer:
+        profile: long-job
+        processing_time_seconds: 1800
+      upload:
+        visibility_timeout_seconds: 120
+        max_receive_count: 3
+      sync_service:
+        fifo: true                      # only where the program allows it
+        content_based_deduplication: true
+
+Each queue is paired with a dead-letter queue; messages received more than
+``max_receive_count`` times are moved there instead of cycling until the
+retention period expires.
+
+FIFO queues use high-throughput mode (deduplication and throughput limits per
+message group), so ordering is kept per group while groups are processed in
+parallel. Their names get the mandatory ``.fifo`` suffix, so switching an
+existing queue to FIFO replaces it (and its dead-letter queue).
+"""
+
+from __future__ import annotations
+
+import json
+import math
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Mapping, Optional
+
+import pulumi
+import pulumi_aws as aws
+
+from contido import policies
+
+
+@dataclass(frozen=True)
+class QueueProfile:
+    receive_wait_time_seconds: int
+    message_retention_seconds: int
+    delay_seconds: int
+    # Visibility timeout = processing time x factor, so a slow consumer never
+    # sees its message redelivered to another worker mid-flight.
+    visibility_factor: float
+    processing_time_seconds: int
+    max_receive_count: int = 5
+
+
+PROFILES = {
+    # S3 event queues drained by short-lived workers.
+    "event-fanout": QueueProfile(
+        receive_wait_time_seconds=20,
+        message_retention_seconds=1209600,
+        delay_seconds=0,
+        visibility_factor=2,
+        processing_time_seconds=30,
+    ),
+    # Transfer and transcoding work that holds a message for minutes.
+    "long-job": QueueProfile(
+        receive_wait_time_seconds=20,
+        message_retention_seconds=1209600,
+        delay_seconds=0,
+        visibility_factor=1.5,
+        processing_time_seconds=900,
+    ),
+    # Queues consumed by a Lambda event source mapping; AWS recommends a
+    # visibility timeout of at least six times the function timeout.
+    "lambda-trigger": QueueProfile(
+        receive_wait_time_seconds=20,
+        message_retention_seconds=1209600,
+        delay_seconds=0,
+        visibility_factor=6,
+        processing_time_seconds=900,
+    ),
+}
+
+LAMBDA_VISIBILITY_FACTOR = 6
+
+
+@dataclass(frozen=True)
+class QueueSettings:
+    profile: str
+    receive_wait_time_seconds: int
+    visibility_timeout_seconds: int
+    message_retention_seconds: int
+    delay_seconds: int
+    max_receive_count: int
+    fifo: bool = False
+    content_based_deduplication: bool = False
+
+    def queue_name(self, name: str) -> str:
+        """SQS requires the ``.fifo`` suffix on FIFO queue names."""
+        return f"{name}.fifo" if self.fifo else name
+
+    def queue_args(self) -> Dict[str, Any]:
+        """Keyword arguments for ``aws.sqs.Queue``."""
+        args: Dict[str, Any] = {
+            "receive_wait_time_seconds": self.receive_wait_time_seconds,
+            "visibility_timeout_seconds": self.visibility_timeout_seconds,
+            "message_retention_seconds": self.message_retention_seconds,
+            "delay_seconds": self.delay_seconds,
+        }
+        if self.fifo:
+            args.update(fifo_queue=True,
+                        content_based_deduplication=self.content_based_deduplication,
+                        deduplication_scope="messageGroup",
+                        fifo_throughput_limit="perMessageGroupId")
+        return args
+
+
+_OVERRIDE_KEYS = {
+    "profile",
+    "processing_time_seconds",
+    "receive_wait_time_seconds",
+    "visibility_timeout_seconds",
+    "message_retention_seconds",
+    "delay_seconds",
+    "max_receive_count",
+    "fifo",
+    "content_based_deduplication",
+}
+
+# SQS attribute limits.
+_RANGES = {
+    "receive_wait_time_seconds": (0, 20),
+    "visibility_timeout_seconds": (0, 43200),
+    "message_retention_seconds": (60, 1209600),
+    "delay_seconds": (0, 900),
+    "max_receive_count": (1, 1000),
+}
+
+
+def _check_range(queue: str, name: str, value: int) -> None:
+    low, high = _RANGES[name]
+    if not isinstance(value, int) or isinstance(value, bool) or not low <= value <= high:
+        raise ValueError(f"queues.{queue}.{name} must be an integer in [{low}, {high}], got {value!r}")
+
+
+def resolve_queue_settings(queue: str,
+                           profile: str,
+                           overrides: Optional[Mapping[str, Mapping]] = None,
+                           lambda_timeout: Optional[int] = None,
+                           allow_fifo: bool = False) -> QueueSettings:
+    """Resolve the effective settings for one queue.
+
+    ``overrides`` is the whole ``queues`` config object; only the entry for
+    ``queue`` is applied. When ``lambda_timeout`` is given the queue feeds a
+    Lambda function and its visibility timeout must cover six invocations.
+    ``allow_fifo`` is false for queues whose producers (such as S3 event
+    notifications) cannot send to FIFO queues.
+    """
+    override = dict((overrides or {}).get(queue) or {})
+    unknown = set(override) - _OVERRIDE_KEYS
+    if unknown:
+        raise ValueError(f"queues.{queue}: unknown keys {sorted(unknown)}")
+
+    profile = override.pop("profile", profile)
+    if profile not in PROFILES:
+        raise ValueError(f"queues.{queue}.profile must be one of {sorted(PROFILES)}, got {profile!r}")
+    base = PROFILES[profile]
+    if "processing_time_seconds" in override:
+        base = replace(base, processing_time_seconds=override.pop("processing_time_seconds"))
+    if lambda_timeout is not None:
+        base = replace(base, processing_time_seconds=lambda_timeout)
+
+    settings = QueueSettings(
+        profile=profile,
+        receive_wait_time_seconds=base.receive_wait_time_seconds,
+        visibility_timeout_seconds=math.ceil(base.processing_time_seconds * base.visibility_factor),
+        message_retention_seconds=base.message_retention_seconds,
+        delay_seconds=base.delay_seconds,
+        max_receive_count=base.max_receive_count,
+    )
+    settings = replace(settings, **override)
+
+    for name in _RANGES:
+        _check_range(queue, name, getattr(settings, name))
+    for name in ("fifo", "content_based_deduplication"):
+        if not isinstance(getattr(settings, name), bool):
+            raise ValueError(f"queues.{queue}.{name} must be a boolean")
+    if settings.fifo and not allow_fifo:
+        raise ValueError(f"queues.{queue}: fifo is not supported for this queue")
+    if settings.content_based_deduplication and not settings.fifo:
+        raise ValueError(f"queues.{queue}: content_based_deduplication requires fifo: true")
+    if lambda_timeout is not None and \
+            settings.visibility_timeout_seconds < LAMBDA_VISIBILITY_FACTOR * lambda_timeout:
+        raise ValueError(
+            f"queues.{queue}: visibility_timeout_seconds ({settings.visibility_timeout_seconds}) "
+            f"must be at least {LAMBDA_VISIBILITY_FACTOR}x the consuming Lambda timeout "
+            f"({lambda_timeout}s)")
+    return settings
+
+
+def create_dead_letter_queue(resource_name: str,
+                             name: str,
+                             tags: Mapping[str, str],
+                             fifo: bool = False) -> aws.sqs.Queue:
+    """Create the dead-letter queue paired with a workflow queue.
+
+    A FIFO queue needs a FIFO dead-letter queue.
+    """
+    return aws.sqs.Queue(f"{resource_name}-dlq",
+        name=f"{name}-dlq.fifo" if fifo else f"{name}-dlq",
+        fifo_queue=True if fifo else None,
+        message_retention_seconds=1209600,
+        max_message_size=262144,
+        sqs_managed_sse_enabled=True,
+        tags=tags)
+
+
+def redrive_policy(dead_letter_queue: aws.sqs.Queue, settings: QueueSettings) -> pulumi.Output[str]:
+    """``redrive_policy`` for a workflow queue that dead-letters into ``dead_letter_queue``."""
+    return dead_letter_queue.arn.apply(lambda arn: json.dumps({
+        "deadLetterTargetArn": arn,
+        "maxReceiveCount": settings.max_receive_count,
+    }))
+
+
+def s3_send_policy(queue: aws.sqs.Queue, bucket_arn: pulumi.Input[str]) -> pulumi.Output[str]:
+    """Queue policy letting S3 event notifications from one bucket send to ``queue``."""
+    return policies.policy_document([
+        policies.statement(["sqs:SendMessage"], queue.arn,
+            principal="*",
+            condition={"ArnEquals": {"aws:SourceArn": bucket_arn}}),
+    ])
+
+
+def allow_redrive(resource_name: str,
+                  dead_letter_queue: aws.sqs.Queue,
+                  source_queue: aws.sqs.Queue) -> aws.sqs.RedriveAllowPolicy:
+    """Only let ``source_queue`` use ``dead_letter_queue`` as its dead-letter queue."""
+    return aws.sqs.RedriveAllowPolicy(f"{resource_name}-dlq-redrive-allow",
+        queue_url=dead_letter_queue.url,
+        redrive_allow_policy=source_queue.arn.apply(lambda arn: json.dumps({
+            "redrivePermission": "byQueue",
+            "sourceQueueArns": [arn],
+        })))
@@ -0,0 +1,176 @@
+"""Move messages from dead-letter queues back to their workflow queues.
+
+Queue URLs are read from the ``dead_letter_queues`` output of a deployed
+stack through the Pulumi Automation API, so no URLs have to be copied by
+hand::
+
+    python -m contido.redrive --stack dev                    # every queue
+    python -m contido.redrive --stack prod --queue file_ingest --workers 8
+
+Messages are moved in batches of 10 (the SQS batch limit) by several workers
+in parallel. A message is only deleted from the dead-letter queue after it
+was accepted by the target queue; FIFO messages keep their message group and
+deduplication IDs. Sends the target queue rejects are reported with their SQS
+error code and make the command exit with status 1; those messages stay on
+the dead-letter queue. ``redrive`` only needs an object with the boto3 SQS client
+methods it calls, so it can run against a local SQS stand-in
+(``--endpoint-url`` for ElasticMQ/LocalStack, or an in-memory fake).
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Mapping, Optional, Sequence, TextIO, Tuple
+
+BATCH_SIZE = 10
+
+
+@dataclass(frozen=True)
+class RedriveResult:
+    # IDs of the messages moved to the target queue
+    moved: Tuple[str, ...] = ()
+    # send_message_batch ``Failed`` entries (Code, Message, SenderFault) keyed by
+    # the ID of a message that stayed on the dead-letter queue
+    failed: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    def __add__(self, other: "RedriveResult") -> "RedriveResult":
+        # A message that failed once and was moved on a later receive is not a failure.
+        moved = self.moved + other.moved
+        failed = {**self.failed, **other.failed}
+        return RedriveResult(moved, {message_id: failure for message_id, failure in failed.items()
+                                     if message_id not in set(moved)})
+
+
+def _move_batch(sqs: Any, dlq_url: str, target_url: str, max_messages: int) -> Optional[RedriveResult]:
+    """Move up to one batch; None when the dead-letter queue had nothing to receive."""
+    received = sqs.receive_message(
+        QueueUrl=dlq_url,
+        MaxNumberOfMessages=max_messages,
+        WaitTimeSeconds=1,
+        MessageAttributeNames=["All"],
+        AttributeNames=["MessageGroupId", "MessageDeduplicationId"],
+    )
+    messages = received.get("Messages", [])
+    if not messages:
+        return None
+
+    entries = []
+    for index, message in enumerate(messages):
+        entry = {"Id": str(index), "MessageBody": message["Body"]}
+        if message.get("MessageAttributes"):
+            entry["MessageAttributes"] = message["MessageAttributes"]
+        # FIFO queues: keep the message group (ordering) and deduplication ID.
+        attributes = message.get("Attributes") or {}
+        for name in ("MessageGroupId", "MessageDeduplicationId"):
+            if attributes.get(name):
+                entry[name] = attributes[name]
+        entries.append(entry)
+    sent = sqs.send_message_batch(QueueUrl=target_url, Entries=entries)
+
+    # Failed sends stay on the dead-letter queue and reappear after the
+    # visibility timeout.
+    delivered = [messages[int(entry["Id"])] for entry in sent.get("Successful", [])]
+    if delivered:
+        sqs.delete_message_batch(
+            QueueUrl=dlq_url,
+            Entries=[{"Id": str(index), "ReceiptHandle": message["ReceiptHandle"]}
+                     for index, message in enumerate(delivered)],
+        )
+    failed = {messages[int(entry["Id"])]["MessageId"]: {key: value for key, value in entry.items() if key != "Id"}
+              for entry in sent.get("Failed", [])}
+    return RedriveResult(tuple(message["MessageId"] for message in delivered), failed)
+
+
+def _drain(sqs: Any, dlq_url: str, target_url: str, limit: Optional[int]) -> RedriveResult:
+    result = RedriveResult()
+    while limit is None or len(result.moved) < limit:
+        max_messages = BATCH_SIZE if limit is None else min(BATCH_SIZE, limit - len(result.moved))
+        batch = _move_batch(sqs, dlq_url, target_url, max_messages)
+        if batch is None:
+            break
+        result += batch
+        # A batch the target rejected entirely (including messages that already
+        # failed and became visible again) would only cycle; leave it on the DLQ.
+        if not batch.moved:
+            break
+    return result
+
+
+def redrive(sqs: Any, dlq_url: str, target_url: str,
+            workers: int = 4, limit: Optional[int] = None) -> RedriveResult:
+    """Drain ``dlq_url`` into ``target_url``.
+
+    ``limit`` caps the messages moved per worker. Messages the target queue
+    rejects stay on the dead-letter queue and are listed in ``failed``.
+    """
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    if limit is not None and limit < 1:
+        raise ValueError("limit must be at least 1")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_drain, sqs, dlq_url, target_url, limit) for _ in range(workers)]
+        return sum((future.result() for future in futures), RedriveResult())
+
+
+def redrive_queues(sqs: Any,
+                   pairs: Mapping[str, Mapping[str, str]],
+                   queue_keys: Sequence[str],
+                   workers: int = 4,
+                   limit: Optional[int] = None,
+                   out: TextIO = sys.stdout) -> int:
+    """Redrive each queue in ``queue_keys``; return the exit status (1 if any send failed)."""
+    status = 0
+    for queue_key in queue_keys:
+        result = redrive(sqs, pairs[queue_key]["dlq_url"], pairs[queue_key]["queue_url"],
+                         workers=workers, limit=limit)
+        print(f"{queue_key}: moved {len(result.moved)} message(s), {len(result.failed)} failed", file=out)
+        for message_id, failure in sorted(result.failed.items()):
+            print(f"  {message_id}: {failure.get('Code')} {failure.get('Message', '')}".rstrip(), file=out)
+        if result.failed:
+            status = 1
+    return status
+
+
+def queue_pairs_from_stack(stack_name: str, work_dir: str) -> Dict[str, Dict[str, str]]:
+    """Read the ``dead_letter_queues`` output of a stack via the Automation API."""
+    from pulumi import automation as auto
+
+    stack = auto.select_stack(stack_name=stack_name, work_dir=work_dir)
+    outputs = stack.outputs()
+    if "dead_letter_queues" not in outputs:
+        raise KeyError(f"Stack {stack_name!r} has no dead_letter_queues output; run `pulumi up` first")
+    return outputs["dead_letter_queues"].value
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stack", required=True, help="Pulumi stack to read queue URLs from")
+    parser.add_argument("--queue", action="append", dest="queues",
+                        help="Queue key to redrive (repeatable, default: all)")
+    parser.add_argument("--workers", type=int, default=4, help="Parallel workers per queue")
+    parser.add_argument("--limit", type=int, default=None, help="Maximum messages per worker")
+    parser.add_argument("--region", default=None, help="AWS region of the queues")
+    parser.add_argument("--endpoint-url", default=None, help="Alternative SQS endpoint")
+    parser.add_argument("--work-dir", default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        help="Pulumi project directory")
+    args = parser.parse_args(argv)
+
+    try:
+        import boto3
+    except ImportError:
+        parser.error("boto3 is required for redrive: pip install boto3")
+
+    pairs = queue_pairs_from_stack(args.stack, args.work_dir)
+    selected = args.queues or sorted(pairs)
+    unknown = set(selected) - set(pairs)
+    if unknown:
+        parser.error(f"unknown queue keys {sorted(unknown)}; known: {sorted(pairs)}")
+
+    sqs = boto3.client("sqs", region_name=args.region, endpoint_url=args.endpoint_url)
+    return redrive_queues(sqs, pairs, selected, workers=args.workers, limit=args.limit)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
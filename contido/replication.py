@@ -0,0 +1,181 @@
+"""Cross-region replication of the archive and asset buckets.
+
+With the optional ``replication`` config object each listed bucket gets a
+versioned replica in a second region and a ``BucketReplicationConfig`` with
+Replication Time Control (99.99% of objects within 15 minutes) and
+replication metrics::
+
+    replication:
+      region: eu-west-1             # required, not the stack's region
+      buckets: [archive, asset]     # default
+      storage_class: STANDARD       # of the replicas
+      time_control: true            # RTC and its CloudWatch metrics
+      noncurrent_version_expiration_days: 30
+      asset_failover: false         # asset CDN falls back to the replica
+
+Replication needs versioning on the source, so listed buckets that are not
+versioned yet (``asset``) become versioned; their noncurrent versions, like
+the replicas', expire after ``noncurrent_version_expiration_days`` unless
+``lifecycle`` sets its own. Only objects written after the configuration is
+created are replicated; existing objects need an S3 Batch Replication job.
+
+``asset_failover`` puts the asset distribution behind an origin group: a
+5xx from the primary bucket is retried against the replica.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple
+
+import pulumi
+import pulumi_aws as aws
+
+from contido import policies
+from contido.lifecycle import LifecyclePolicy
+
+DEFAULT_BUCKETS = ("archive", "asset")
+STORAGE_CLASSES = (
+    "STANDARD",
+    "STANDARD_IA",
+    "ONEZONE_IA",
+    "INTELLIGENT_TIERING",
+    "GLACIER_IR",
+    "GLACIER",
+    "DEEP_ARCHIVE",
+)
+# CloudFront cannot read objects in these classes without a restore.
+_ARCHIVE_CLASSES = ("GLACIER", "DEEP_ARCHIVE")
+
+RULE_ID = "replica"
+# RTC only offers a 15 minute threshold.
+RTC_MINUTES = 15
+FAILOVER_STATUS_CODES = (500, 502, 503, 504)
+
+_REGION = re.compile(r"^[a-z]{2}(-[a-z]+)+-\d$")
+
+
+@dataclass(frozen=True)
+class ReplicationSettings:
+    region: str
+    buckets: Tuple[str, ...] = DEFAULT_BUCKETS
+    storage_class: str = "STANDARD"
+    time_control: bool = True
+    noncurrent_version_expiration_days: int = 30
+    asset_failover: bool = False
+
+
+_KEYS = {f.name for f in dataclasses.fields(ReplicationSettings)}
+
+
+def parse_replication_settings(raw: Optional[Mapping[str, Any]],
+                               buckets: Sequence[str],
+                               stack_region: str) -> Optional[ReplicationSettings]:
+    """Validate the ``replication`` config object (None when unset)."""
+    if raw is None:
+        return None
+    unknown = set(raw) - _KEYS
+    if unknown:
+        raise ValueError(f"replication: unknown keys {sorted(unknown)}")
+    if "region" not in raw:
+        raise ValueError("replication.region is required")
+    settings = ReplicationSettings(**{**raw, "buckets": tuple(raw.get("buckets", DEFAULT_BUCKETS))})
+
+    if not isinstance(settings.region, str) or not _REGION.match(settings.region):
+        raise ValueError(f"replication.region is not an AWS region, got {settings.region!r}")
+    if settings.region == stack_region:
+        raise ValueError(f"replication.region must differ from the stack region {stack_region}")
+    if not settings.buckets:
+        raise ValueError("replication.buckets must list at least one bucket")
+    for bucket in settings.buckets:
+        if bucket not in buckets:
+            raise ValueError(f"replication.buckets: unknown bucket {bucket!r}")
+    if len(set(settings.buckets)) != len(settings.buckets):
+        raise ValueError(f"replication.buckets lists a bucket twice: {list(settings.buckets)}")
+    if settings.storage_class not in STORAGE_CLASSES:
+        raise ValueError(f"replication.storage_class must be one of {list(STORAGE_CLASSES)}, "
+                         f"got {settings.storage_class!r}")
+    for name in ("time_control", "asset_failover"):
+        if not isinstance(getattr(settings, name), bool):
+            raise ValueError(f"replication.{name} must be a boolean, got {getattr(settings, name)!r}")
+    days = settings.noncurrent_version_expiration_days
+    if not isinstance(days, int) or isinstance(days, bool) or days < 1:
+        raise ValueError(f"replication.noncurrent_version_expiration_days must be an integer >= 1, got {days!r}")
+    if settings.asset_failover:
+        if "asset" not in settings.buckets:
+            raise ValueError("replication.asset_failover requires asset in replication.buckets")
+        if settings.storage_class in _ARCHIVE_CLASSES:
+            raise ValueError(f"replication.asset_failover cannot serve {settings.storage_class} replicas")
+    return settings
+
+
+def replica_key(bucket: str) -> str:
+    """Key of a replica in ``layers.BaseOutputs.buckets``."""
+    return f"{bucket}_replica"
+
+
+def replica_bucket_name(client: str, env: str, bucket: str, region: str) -> str:
+    return f"contido-{client}-{bucket}-{env}-{region}"
+
+
+def expire_noncurrent_versions(lifecycle_policies: Mapping[str, LifecyclePolicy],
+                               settings: ReplicationSettings) -> Dict[str, LifecyclePolicy]:
+    """Add noncurrent version expiry to replicated buckets that have none."""
+    resolved = dict(lifecycle_policies)
+    for bucket in settings.buckets:
+        policy = resolved.get(bucket) or LifecyclePolicy()
+        if policy.noncurrent_version_expiration_days is None:
+            resolved[bucket] = dataclasses.replace(
+                policy, noncurrent_version_expiration_days=settings.noncurrent_version_expiration_days)
+    return resolved
+
+
+def role_policy(source_arns: Sequence[pulumi.Input[str]],
+                replica_arns: Sequence[pulumi.Input[str]]) -> pulumi.Output[str]:
+    """Permissions S3 replication needs on the sources and the replicas."""
+    return policies.policy_document([
+        policies.statement(["s3:GetReplicationConfiguration", "s3:ListBucket"], list(source_arns)),
+        policies.statement(["s3:GetObjectVersionForReplication", "s3:GetObjectVersionAcl",
+                            "s3:GetObjectVersionTagging"],
+                           [policies.objects(arn) for arn in source_arns]),
+        policies.statement(["s3:ReplicateObject", "s3:ReplicateDelete", "s3:ReplicateTags"],
+                           [policies.objects(arn) for arn in replica_arns]),
+    ], limit=policies.INLINE_ROLE_POLICY_LIMIT)
+
+
+def create_replication_config(resource_name: str,
+                              source: aws.s3.Bucket,
+                              replica: aws.s3.Bucket,
+                              role: aws.iam.Role,
+                              settings: ReplicationSettings,
+                              opts: Optional[pulumi.ResourceOptions] = None) -> aws.s3.BucketReplicationConfig:
+    """Replicate every object and delete marker of ``source`` to ``replica``."""
+    time_control = aws.s3.BucketReplicationConfigRuleDestinationReplicationTimeArgs(
+        status="Enabled",
+        time=aws.s3.BucketReplicationConfigRuleDestinationReplicationTimeTimeArgs(minutes=RTC_MINUTES),
+    ) if settings.time_control else None
+    metrics = aws.s3.BucketReplicationConfigRuleDestinationMetricsArgs(
+        status="Enabled",
+        event_threshold=aws.s3.BucketReplicationConfigRuleDestinationMetricsEventThresholdArgs(minutes=RTC_MINUTES),
+    ) if settings.time_control else None
+    return aws.s3.BucketReplicationConfig(resource_name,
+        bucket=source.id,
+        role=role.arn,
+        rules=[aws.s3.BucketReplicationConfigRuleArgs(
+            id=RULE_ID,
+            status="Enabled",
+            filter=aws.s3.BucketReplicationConfigRuleFilterArgs(prefix=""),
+            delete_marker_replication=aws.s3.BucketReplicationConfigRuleDeleteMarkerReplicationArgs(
+                status="Enabled",
+            ),
+            destination=aws.s3.BucketReplicationConfigRuleDestinationArgs(
+                bucket=replica.arn,
+                storage_class=settings.storage_class,
+                replication_time=time_control,
+                metrics=metrics,
+            ),
+        )],
+        opts=opts)
+
@@ -0,0 +1,410 @@
+"""Typed, validated stack configuration.
+
+Every config key the program reads is declared here, and the whole stack
+config is parsed into one ``StackSettings`` before any resource is
+registered: unknown keys, out-of-range numbers, bad enum values and
+inconsistent combinations fail the run up front instead of halfway through
+an update. The same check runs offline against the stack files::
+
+    python -m contido.settings                      # every Pulumi.*.yaml
+    python -m contido.settings Pulumi.prod.yaml
+
+Values may be native YAML types or the strings ``pulumi config set`` writes
+(``"1024"``, ``"true"``, JSON objects); both are coerced to the declared type.
+Keys of other namespaces (``aws:``, ``pulumi:``) are left to their providers,
+except ``aws:region``, which is required.
+"""
+
+import argparse
+import dataclasses
+import glob
+import json
+import os
+import re
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+import yaml
+
+from contido import (cdn, cdn_monitoring, event_sources, functions, inventory, layers, lifecycle, monitoring, notifications,
+                     queues, replication, thumbnails, workers)
+
+PROJECT = "contido-infra-pulumi"
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BUCKETS = ("upload", "mam", "asset", "archive", "edit")
+VERSIONED_BUCKETS = ("archive",)
+
+# Queue key -> tuning profile (see contido.queues).
+QUEUE_PROFILES = {
+    "upload": "event-fanout",
+    "mam_restore": "event-fanout",
+    "transfer": "long-job",
+    "ingest_proxy": "long-job",
+    "transcoding_start": "long-job",
+    "client_delivery": "event-fanout",
+    "archive": "event-fanout",
+    "sync_service": "lambda-trigger",
+    "file_ingest": "lambda-trigger",
+}
+
+# Queue key -> the bucket its queue policy lets S3 send from.
+NOTIFICATION_QUEUE_SOURCES = {
+    "upload": "upload",
+    "mam_restore": "mam",
+    "client_delivery": "archive",
+    "archive": "archive",
+}
+
+_STRINGS = {
+    "client",
+    "env",
+    "account_id",
+    "cache_policy_id",
+    "origin_request_policy_id",
+    "response_headers_policy_id",
+    "acm_certificate_arn",
+    "r53_zone_id",
+    "image_uri_sync",
+    "image_uri_ingest",
+    "rule",
+    "serviceaccount",
+    "sync_architecture",
+    "ingest_architecture",
+}
+_INTS = {
+    "memory_size",
+    "ephemeral_storage_size",
+    "batch_size",
+    "lambda_timeout",
+    "sync_memory_size",
+    "sync_ephemeral_storage_size",
+    "sync_timeout",
+    "ingest_memory_size",
+    "ingest_ephemeral_storage_size",
+    "ingest_timeout",
+}
+_BOOLS = {"upload_transfer_acceleration"}
+_OBJECTS = {
+    "cdn",
+    "cdn_monitoring",
+    "inventory",
+    "layer",
+    "monitoring",
+    "workers",
+    "lifecycle",
+    "queues",
+    "replication",
+    "s3_notifications",
+    "sync_event_source",
+    "ingest_event_source",
+    "sync_deployment",
+    "ingest_deployment",
+    "thumbnail_resizing",
+}
+KEYS = _STRINGS | _INTS | _BOOLS | _OBJECTS
+REQUIRED = ("client", "env", "account_id")
+
+# Longest generated name per AWS limit; checked against client and env.
+_NAME_LIMITS = (
+    ("S3 bucket name", 63, "contido-{client}-archive-{env}"),
+    ("IAM role name", 64, "contido-{client}-{env}-backend-common-role"),
+    ("Lambda function name", 64, "contido-{client}-{env}-file-ingest-service"),
+    ("SQS queue name", 80, "contido-{client}-watch-folder-archive-{env}-dlq"),
+    ("DNS label", 63, "ct{client}thumbnail{env}"),
+)
+_NAME_PART = re.compile(r"^[a-z0-9]([a-z0-9-]*[a-z0-9])?$")
+_REGION = re.compile(r"^[a-z]{2}(-[a-z]+)+-\d$")
+_ECR_IMAGE = re.compile(r"^\d{12}\.dkr\.ecr\.(?P<region>[a-z0-9-]+)\.amazonaws\.com/")
+
+
+def _slots(cls: type) -> type:
+    """Rebuild a dataclass with ``__slots__`` (``dataclass(slots=True)`` needs 3.10)."""
+    names = tuple(field.name for field in dataclasses.fields(cls))
+    namespace = {key: value for key, value in cls.__dict__.items()
+                 if key not in names and key not in ("__dict__", "__weakref__")}
+    namespace["__slots__"] = names
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+@_slots
+@dataclass(frozen=True)
+class StackSettings:
+    client: str
+    env: str
+    region: str
+    account_id: str
+    cache_policy_id: str
+    origin_request_policy_id: str
+    response_headers_policy_id: str
+    acm_certificate_arn: str
+    r53_zone_id: str
+    upload_transfer_acceleration: bool
+    image_uri_sync: str
+    image_uri_ingest: str
+    batch_size: int
+    lambda_sizing: functions.FunctionSizing
+    sync_sizing: functions.FunctionSizing
+    ingest_sizing: functions.FunctionSizing
+    sync_deployment: functions.DeploymentSettings
+    ingest_deployment: functions.DeploymentSettings
+    sync_event_source: event_sources.EventSourceSettings
+    ingest_event_source: event_sources.EventSourceSettings
+    queue_settings: Dict[str, queues.QueueSettings]
+    lifecycle_policies: Dict[str, lifecycle.LifecyclePolicy]
+    notification_routes: List[notifications.NotificationRoute]
+    cdn_settings: cdn.CdnSettings
+    cdn_monitoring_settings: Optional[cdn_monitoring.CdnMonitoringSettings]
+    monitoring_settings: monitoring.MonitoringSettings
+    worker_scaling: Dict[str, workers.WorkerScaling]
+    inventory_settings: Optional[inventory.InventorySettings]
+    replication_settings: Optional[replication.ReplicationSettings]
+    thumbnail_resizing_settings: Optional[thumbnails.ResizingSettings]
+    layer_settings: layers.LayerSettings
+    rule: str
+    serviceaccount: str
+
+
+def _coerce(key: str, value: Any) -> Any:
+    """Convert the string form ``pulumi config set`` stores to the declared type."""
+    if key in _INTS:
+        if isinstance(value, str):
+            try:
+                return int(value)
+            except ValueError:
+                raise ValueError(f"{key} must be an integer, got {value!r}") from None
+        if not isinstance(value, int) or isinstance(value, bool):
+            raise ValueError(f"{key} must be an integer, got {value!r}")
+    elif key in _BOOLS:
+        if isinstance(value, str) and value.lower() in ("true", "false"):
+            return value.lower() == "true"
+        if not isinstance(value, bool):
+            raise ValueError(f"{key} must be a boolean, got {value!r}")
+    elif key in _OBJECTS:
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                raise ValueError(f"{key} must be an object, got {value!r}") from None
+        expected = list if key == "s3_notifications" else dict
+        if value is not None and not isinstance(value, expected):
+            raise ValueError(f"{key} must be a {'list' if expected is list else 'mapping'}, got {value!r}")
+    elif not isinstance(value, str):
+        raise ValueError(f"{key} must be a string, got {value!r}")
+    return value
+
+
+def _require_range(name: str, value: int, low: int, high: int) -> None:
+    if not low <= value <= high:
+        raise ValueError(f"{name} must be an integer in [{low}, {high}], got {value!r}")
+
+
+def _check_names(client: str, env: str) -> None:
+    for key, value in (("client", client), ("env", env)):
+        if not _NAME_PART.match(value):
+            raise ValueError(f"{key} must be lowercase letters, digits and inner hyphens, got {value!r}")
+    for label, limit, template in _NAME_LIMITS:
+        name = template.format(client=client, env=env)
+        if len(name) > limit:
+            raise ValueError(f"client/env too long: {label} {name!r} exceeds {limit} characters")
+
+
+def load_settings(values: Mapping[str, Any]) -> StackSettings:
+    """Validate a stack config map.
+
+    Keys are fully qualified (``contido-infra-pulumi:client``, ``aws:region``)
+    or bare project keys, as in the ``config:`` block of a stack file.
+    """
+    region = None
+    project: Dict[str, Any] = {}
+    for full_key, value in values.items():
+        namespace, _, key = full_key.rpartition(":")
+        if full_key == "aws:region":
+            region = value
+        elif namespace in ("", PROJECT):
+            project[key] = value
+
+    unknown = set(project) - KEYS
+    if unknown:
+        raise ValueError(f"unknown config keys {sorted(unknown)}")
+    missing = [key for key in REQUIRED if not project.get(key)]
+    if not region:
+        missing.insert(0, "aws:region")
+    if missing:
+        raise ValueError(f"missing required config {missing}")
+    project = {key: _coerce(key, value) for key, value in project.items()}
+
+    def get(key: str, default: Any) -> Any:
+        value = project.get(key)
+        return default if value is None else value
+
+    client, env = project["client"], project["env"]
+    _check_names(client, env)
+    if not isinstance(region, str) or not _REGION.match(region):
+        raise ValueError(f"aws:region is not an AWS region, got {region!r}")
+    if not re.match(r"^\d{12}$", project["account_id"]):
+        raise ValueError(f"account_id must be a 12-digit AWS account ID, got {project['account_id']!r}")
+
+    # CloudFront only accepts certificates issued in us-east-1.
+    acm_certificate_arn = get("acm_certificate_arn", "")
+    if acm_certificate_arn and not acm_certificate_arn.startswith("arn:aws:acm:us-east-1:"):
+        raise ValueError(f"acm_certificate_arn must be an ACM certificate in us-east-1, got {acm_certificate_arn!r}")
+    r53_zone_id = get("r53_zone_id", "")
+    if r53_zone_id and not re.match(r"^Z[A-Z0-9]+$", r53_zone_id):
+        raise ValueError(f"r53_zone_id is not a Route 53 hosted zone ID, got {r53_zone_id!r}")
+    # Lambda pulls container images from ECR in its own region.
+    for key in ("image_uri_sync", "image_uri_ingest"):
+        image = get(key, "")
+        match = _ECR_IMAGE.match(image)
+        if image and match and match.group("region") != region:
+            raise ValueError(f"{key} must be an ECR image in {region}, got {image!r}")
+
+    lambda_sizing = functions.FunctionSizing(
+        memory_size=get("memory_size", 1024),
+        ephemeral_storage_size=get("ephemeral_storage_size", 2048),
+        timeout=get("lambda_timeout", 900))
+    _require_range("memory_size", lambda_sizing.memory_size, 128, 10240)
+    _require_range("ephemeral_storage_size", lambda_sizing.ephemeral_storage_size, 512, 10240)
+    _require_range("lambda_timeout", lambda_sizing.timeout, 1, 900)
+    sync_sizing = functions.resolve_function_sizing("sync", project, lambda_sizing)
+    ingest_sizing = functions.resolve_function_sizing("ingest", project, lambda_sizing)
+
+    queue_overrides = get("queues", {})
+    unknown = set(queue_overrides) - set(QUEUE_PROFILES)
+    if unknown:
+        raise ValueError(f"queues: unknown queues {sorted(unknown)}")
+    lambda_timeouts = {"sync_service": sync_sizing.timeout, "file_ingest": ingest_sizing.timeout}
+    queue_settings = {
+        queue: queues.resolve_queue_settings(queue, profile, queue_overrides,
+                                             lambda_timeout=lambda_timeouts.get(queue),
+                                             allow_fifo=queue == "sync_service")
+        for queue, profile in QUEUE_PROFILES.items()
+    }
+
+    # The sync mapping's limits depend on whether its queue is FIFO.
+    batch_size = get("batch_size", 1)
+    sync_event_source = event_sources.resolve_event_source_settings(
+        "sync_event_source", project.get("sync_event_source"), batch_size,
+        fifo=queue_settings["sync_service"].fifo)
+    ingest_event_source = event_sources.resolve_event_source_settings(
+        "ingest_event_source", project.get("ingest_event_source"), batch_size)
+
+    cdn_settings = cdn.parse_cdn_settings(project.get("cdn"))
+    cdn_monitoring_settings = cdn_monitoring.parse_monitoring_settings(project.get("cdn_monitoring"))
+    if cdn_monitoring_settings and not cdn_settings.enabled:
+        raise ValueError("cdn_monitoring requires the CDN (cdn.enabled is false)")
+
+    replication_settings = replication.parse_replication_settings(project.get("replication"), BUCKETS, region)
+    if replication_settings:
+        for bucket in replication_settings.buckets:
+            name = replication.replica_bucket_name(client, env, bucket, replication_settings.region)
+            if len(name) > 63:
+                raise ValueError(f"client/env too long: replica bucket name {name!r} exceeds 63 characters")
+        if replication_settings.asset_failover and not cdn_settings.enabled:
+            raise ValueError("replication.asset_failover requires the CDN (cdn.enabled is false)")
+    thumbnail_resizing_settings = thumbnails.parse_resizing_settings(project.get("thumbnail_resizing"))
+    if thumbnail_resizing_settings:
+        if not cdn_settings.enabled:
+            raise ValueError("thumbnail_resizing requires the CDN (cdn.enabled is false)")
+        match = _ECR_IMAGE.match(thumbnail_resizing_settings.image_uri)
+        if match and match.group("region") != region:
+            raise ValueError(f"thumbnail_resizing.image_uri must be an ECR image in {region}, "
+                             f"got {thumbnail_resizing_settings.image_uri!r}")
+    # Replicated buckets are versioned, so they may expire noncurrent versions.
+    versioned = VERSIONED_BUCKETS + (replication_settings.buckets if replication_settings else ())
+    lifecycle_policies = lifecycle.resolve_policies(project.get("lifecycle"), BUCKETS, versioned)
+    if replication_settings:
+        lifecycle_policies = replication.expire_noncurrent_versions(lifecycle_policies, replication_settings)
+
+    # A layer stack must have something to deploy.
+    layer_settings = layers.parse_layer_settings(project.get("layer"))
+    if layer_settings.name == "edge" and not cdn_settings.enabled:
+        raise ValueError("layer.name edge requires the CDN (cdn.enabled is false)")
+    if layer_settings.name == "compute" and not (get("image_uri_sync", "") or get("image_uri_ingest", "")):
+        raise ValueError("layer.name compute requires image_uri_sync or image_uri_ingest")
+
+    notification_routes = notifications.parse_routes(project.get("s3_notifications"))
+    notifications.validate_routes(notification_routes, {bucket: bucket for bucket in BUCKETS},
+                                  NOTIFICATION_QUEUE_SOURCES)
+
+    return StackSettings(
+        client=client,
+        env=env,
+        region=region,
+        account_id=project["account_id"],
+        cache_policy_id=get("cache_policy_id", ""),
+        origin_request_policy_id=get("origin_request_policy_id", ""),
+        response_headers_policy_id=get("response_headers_policy_id", ""),
+        acm_certificate_arn=acm_certificate_arn,
+        r53_zone_id=r53_zone_id,
+        upload_transfer_acceleration=get("upload_transfer_acceleration", False),
+        image_uri_sync=get("image_uri_sync", ""),
+        image_uri_ingest=get("image_uri_ingest", ""),
+        batch_size=batch_size,
+        lambda_sizing=lambda_sizing,
+        sync_sizing=sync_sizing,
+        ingest_sizing=ingest_sizing,
+        sync_deployment=functions.resolve_deployment_settings("sync_deployment", project.get("sync_deployment")),
+        ingest_deployment=functions.resolve_deployment_settings("ingest_deployment", project.get("ingest_deployment")),
+        sync_event_source=sync_event_source,
+        ingest_event_source=ingest_event_source,
+        queue_settings=queue_settings,
+        lifecycle_policies=lifecycle_policies,
+        notification_routes=notification_routes,
+        cdn_settings=cdn_settings,
+        cdn_monitoring_settings=cdn_monitoring_settings,
+        monitoring_settings=monitoring.parse_monitoring_settings(project.get("monitoring")),
+        worker_scaling=workers.parse_worker_scaling(project.get("workers")),
+        inventory_settings=inventory.parse_inventory_settings(project.get("inventory"), BUCKETS),
+        replication_settings=replication_settings,
+        thumbnail_resizing_settings=thumbnail_resizing_settings,
+        layer_settings=layer_settings,
+        rule=get("rule", ""),
+        serviceaccount=get("serviceaccount", ""),
+    )
+
+
+def load_stack_settings() -> StackSettings:
+    """Validate the config of the running Pulumi program."""
+    from pulumi.runtime import config as runtime_config
+
+    return load_settings({**runtime_config.get_config_env(), **runtime_config.CONFIG.get()})
+
+
+def load_stack_file(path: str) -> StackSettings:
+    """Validate the ``config:`` block of a ``Pulumi.<stack>.yaml`` file."""
+    with open(path) as handle:
+        raw = yaml.safe_load(handle) or {}
+    if not isinstance(raw, dict):
+        raise ValueError("not a Pulumi stack file (expected a mapping)")
+    unknown = set(raw) - {"config", "encryptionsalt", "secretsprovider", "encryptedkey", "environment"}
+    if unknown:
+        raise ValueError(f"unknown top-level keys {sorted(unknown)}")
+    return load_settings(raw.get("config") or {})
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Validate Pulumi stack files offline.")
+    parser.add_argument("files", nargs="*", help="Stack files (default: every Pulumi.*.yaml)")
+    args = parser.parse_args(argv)
+
+    paths = args.files or sorted(glob.glob(os.path.join(PROJECT_DIR, "Pulumi.*.yaml")))
+    if not paths:
+        parser.error(f"no Pulumi.*.yaml files in {PROJECT_DIR}")
+    failed = 0
+    for path in paths:
+        started = time.perf_counter()
+        try:
+            load_stack_file(path)
+        except (OSError, ValueError, yaml.YAMLError) as exc:
+            failed += 1
+            print(f"{os.path.basename(path)}: {exc}")
+        else:
+            print(f"{os.path.basename(path)}: ok ({(time.perf_counter() - started) * 1000:.1f} ms)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""The program's resources, split by subsystem and imported on demand.
+
+``__main__.py`` builds each subsystem through a ``Loader``; a subsystem
+module, and the ``pulumi_aws`` service modules it declares resources from,
+is only imported when the stack enables it::
+
+    storage     S3 buckets                              always
+    iam         policies, backend role, users           always
+    messaging   SQS queues, DLQs, S3 notifications,     always
+                ECS worker autoscaling
+    replication cross-region replicas, replication      with replication
+                role and configurations
+    thumbnails  thumbnail resizer Lambda, function URL  with thumbnail_resizing
+    cdn         CloudFront, origin access, Route53      unless cdn.enabled is false
+    compute     Lambda functions and SQS mappings       with image_uri_sync/_ingest
+    monitoring  alarms, SNS topic, dashboard            always
+    inventory   S3 Inventory, Glue and Athena           with inventory
+
+In a layer stack (see ``contido.layers``) only that layer's subsystems are
+built: storage, iam, messaging, replication, monitoring and inventory in
+``base``, thumbnails, cdn and the resizer's alarms in ``edge``, compute and its
+function alarms in ``compute``.
+
+Every module exposes ``build(settings, tags, ...)`` returning a dataclass of
+the resources later subsystems and the stack outputs need. Resource names
+do not depend on the module that declares them, so moving a resource between
+subsystems never replaces it.
+
+With ``CONTIDO_PROFILE=1`` the loader reports, per subsystem, the time spent
+importing it, the time spent declaring its resources and how many it
+declared::
+
+    CONTIDO_PROFILE=1 pulumi preview
+"""
+
+import importlib
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, List, Optional, TextIO
+
+import pulumi
+
+PROFILE_ENV = "CONTIDO_PROFILE"
+
+
+@dataclass(frozen=True)
+class SubsystemTiming:
+    name: str
+    import_seconds: float
+    build_seconds: float
+    resources: int
+
+
+class Loader:
+    """Imports and builds subsystems, timing them when profiling is on."""
+
+    def __init__(self, profile: Optional[bool] = None) -> None:
+        self.profile = os.environ.get(PROFILE_ENV) == "1" if profile is None else profile
+        self.timings: List[SubsystemTiming] = []
+        self._resources = 0
+        if self.profile:
+            pulumi.runtime.register_stack_transformation(self._count)
+
+    def _count(self, args: pulumi.ResourceTransformationArgs) -> None:
+        self._resources += 1
+        return None
+
+    def build(self, name: str, *args: Any, **kwargs: Any) -> Any:
+        """Import ``contido.subsystems.<name>`` and run its ``build``."""
+        started = time.perf_counter()
+        module = importlib.import_module(f"{__name__}.{name}")
+        imported = time.perf_counter()
+        resources = self._resources
+        result = module.build(*args, **kwargs)
+        if self.profile:
+            self.timings.append(SubsystemTiming(name, imported - started, time.perf_counter() - imported,
+                                                self._resources - resources))
+        return result
+
+    def report(self, stream: TextIO = sys.stderr) -> None:
+        """Write the per-subsystem timings (profiling only)."""
+        if not self.profile:
+            return
+        lines = [f"{'subsystem':<11} {'import ms':>9} {'build ms':>9} {'resources':>9}"]
+        for timing in self.timings:
+            lines.append(f"{timing.name:<11} {timing.import_seconds * 1000:>9.1f} "
+                         f"{timing.build_seconds * 1000:>9.1f} {timing.resources:>9}")
+        lines.append(f"{'total':<11} {sum(t.import_seconds for t in self.timings) * 1000:>9.1f} "
+                     f"{sum(t.build_seconds for t in self.timings) * 1000:>9.1f} {self._resources:>9}")
+        print("\n".join(lines), file=stream)
@@ -0,0 +1,473 @@
+"""CloudFront: origin access, bucket read policies, distributions, CDN monitoring and Route53 records.
+
+Only built when ``cdn.enabled`` is true (the default).
+"""
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List, Mapping, Optional
+
+import pulumi
+import pulumi_aws as aws
+
+from contido import cdn, cdn_monitoring, replication, thumbnails
+from contido.layers import BaseOutputs
+from contido.settings import StackSettings
+
+if TYPE_CHECKING:
+    # Only imported with thumbnail_resizing
+    from contido.subsystems.thumbnails import Thumbnails
+
+# Origin IDs
+s3_mam_proxy_origin_id = "myS3-mam-proxy-Origin"
+s3_mam_thumbnail_origin_id = "myS3-mam-thumbnail-Origin"
+s3_asset_origin_id = "myS3-asset-Origin"
+s3_asset_replica_origin_id = "myS3-asset-replica-Origin"
+# Origin group of the asset bucket and its replica (replication.asset_failover)
+asset_failover_origin_id = "asset-failover"
+# Thumbnail resizer function URL and the origin group putting it behind S3 (thumbnail_resizing)
+thumbnail_resizer_origin_id = "thumbnail-resizer-Origin"
+thumbnail_resizing_origin_id = "thumbnail-resizing"
+
+
+@dataclass(frozen=True)
+class Cdn:
+    proxy_distribution: aws.cloudfront.Distribution
+    # None once the unified MAM distribution serves thumbnails
+    thumbnail_distribution: Optional[aws.cloudfront.Distribution]
+    asset_distribution: aws.cloudfront.Distribution
+    realtime_log_config: Optional[aws.cloudfront.RealtimeLogConfig]
+    proxy_record: Optional[aws.route53.Record]
+    thumbnail_record: Optional[aws.route53.Record]
+    asset_record: Optional[aws.route53.Record]
+
+
+def build(settings: StackSettings,
+          tags: Mapping[str, str],
+          base: BaseOutputs,
+          resizer: Optional["Thumbnails"] = None) -> Cdn:
+    client, env = settings.client, settings.env
+    cdn_settings = settings.cdn_settings
+    cdn_monitoring_settings = settings.cdn_monitoring_settings
+    cache_policy_id = settings.cache_policy_id
+    origin_request_policy_id = settings.origin_request_policy_id
+    response_headers_policy_id = settings.response_headers_policy_id
+    acm_certificate_arn = settings.acm_certificate_arn
+    r53_zone_id = settings.r53_zone_id
+    mam_bucket = base.bucket("mam")
+    asset_bucket = base.bucket("asset")
+    replication_settings = settings.replication_settings
+    asset_failover = bool(replication_settings and replication_settings.asset_failover)
+    asset_replica_bucket = base.bucket(replication.replica_key("asset")) if asset_failover else None
+    asset_target_origin_id = asset_failover_origin_id if asset_failover else s3_asset_origin_id
+    resizing_settings = settings.thumbnail_resizing_settings
+    thumbnail_target_origin_id = thumbnail_resizing_origin_id if resizer else s3_mam_thumbnail_origin_id
+
+    # ------------------------------------------------------------------------
+    # Origin access (OAI / OAC)
+    # ------------------------------------------------------------------------
+
+    mam_proxy_oai = aws.cloudfront.OriginAccessIdentity("mam-proxy-oai",
+        comment="access-identity-mam-proxy") if cdn_settings.uses_oai else None
+
+    # The unified MAM distribution reads both prefixes through the proxy identity.
+    mam_thumbnail_oai = aws.cloudfront.OriginAccessIdentity("mam-thumbnail-oai",
+        comment="access-identity-mam-thumbnail") if cdn_settings.uses_oai and cdn_settings.thumbnail_distribution else None
+
+    asset_oai = aws.cloudfront.OriginAccessIdentity("asset-oai",
+        comment="access-identity-asset") if cdn_settings.uses_oai else None
+
+    # Origin Access Control (replaces the OAIs once `cdn.origin_access` is oac)
+    mam_oac = cdn.create_origin_access_control("mam-oac",
+        f"contido-{client}-{env}-mam") if cdn_settings.uses_oac else None
+
+    asset_oac = cdn.create_origin_access_control("asset-oac",
+        f"contido-{client}-{env}-asset") if cdn_settings.uses_oac else None
+
+    # ------------------------------------------------------------------------
+    # Bucket policies
+    # ------------------------------------------------------------------------
+
+    # Once the buckets trust the distributions (oac-grant onwards) the policies
+    # reference the distribution ARNs, so they are created after the
+    # distributions below instead.
+
+    mam_oai_arns = [oai.iam_arn for oai in (mam_proxy_oai, mam_thumbnail_oai) if oai]
+
+    mam_bucket_policy = aws.s3.BucketPolicy("mam-bucket-policy",
+        bucket=mam_bucket.id,
+        policy=cdn.bucket_read_policy(mam_bucket.arn, oai_arns=mam_oai_arns)) if cdn_settings.origin_access == "oai" else None
+
+    asset_bucket_policy = aws.s3.BucketPolicy("asset-bucket-policy",
+        bucket=asset_bucket.id,
+        policy=cdn.bucket_read_policy(asset_bucket.arn, oai_arns=[asset_oai.iam_arn])) if cdn_settings.origin_access == "oai" else None
+
+    # The replica lives in replication.region; its policy is declared there too
+    asset_replica_bucket_policy = aws.s3.BucketPolicy("asset-replica-bucket-policy",
+        bucket=asset_replica_bucket.id,
+        policy=cdn.bucket_read_policy(asset_replica_bucket.arn, oai_arns=[asset_oai.iam_arn]),
+        region=replication_settings.region) if asset_failover and cdn_settings.origin_access == "oai" else None
+
+    # ------------------------------------------------------------------------
+    # Distributions
+    # ------------------------------------------------------------------------
+
+    # An explicit policy ID wins; otherwise `cdn.cache_policy` /
+    # `cdn.origin_request_policy` replace the AWS managed CachingOptimized and
+    # CORS-S3Origin policies.
+    default_cache_policy_id = cache_policy_id or (
+        cdn.create_cache_policy("cdn-cache-policy", f"contido-{client}-{env}", cdn_settings.cache_policy).id
+        if cdn_settings.cache_policy else cdn.MANAGED_CACHING_OPTIMIZED)
+
+    default_origin_request_policy_id = origin_request_policy_id or (
+        cdn.create_origin_request_policy("cdn-origin-request-policy", f"contido-{client}-{env}",
+                                         cdn_settings.origin_request_policy).id
+        if cdn_settings.origin_request_policy else cdn.MANAGED_CORS_S3_ORIGIN)
+
+    # Sampled request logs for every behavior, to spot cache-busting URLs
+    cdn_realtime_log_config = cdn_monitoring.create_realtime_log_config("cdn-realtime-logs",
+        f"contido-{client}-{env}-cdn", cdn_monitoring_settings.realtime_logs, tags
+    ) if cdn_monitoring_settings and cdn_monitoring_settings.realtime_logs else None
+    cdn_realtime_log_config_arn = cdn_realtime_log_config.arn if cdn_realtime_log_config else None
+
+    # On-demand resizing: a viewer-request function per distribution serving
+    # thumbnails, and S3 failing over to the resizer for variants not stored yet
+    thumbnail_resize_function = thumbnails.create_viewer_request_function("mam-thumbnail-cdn-resize",
+        f"contido-{client}-{env}-thumbnail-resize", resizing_settings
+    ) if resizer and cdn_settings.thumbnail_distribution else None
+
+    mam_thumbnail_resize_function = thumbnails.create_viewer_request_function("mam-cdn-thumbnail-resize",
+        f"contido-{client}-{env}-mam-thumbnail-resize", resizing_settings, path_prefix="/thumbnail"
+    ) if resizer and cdn_settings.unified_mam else None
+
+    def resizing_origins(origin_path: str) -> List[aws.cloudfront.DistributionOriginArgs]:
+        return [thumbnails.resizer_origin(thumbnail_resizer_origin_id, resizer.origin_domain,
+            resizer.origin_access_control.id, origin_path, resizing_settings,
+            origin_shield=cdn.origin_shield(cdn_settings.distribution("thumbnail")))] if resizer else []
+
+    resizing_origin_groups = [cdn.failover_origin_group(thumbnail_resizing_origin_id,
+        s3_mam_thumbnail_origin_id, thumbnail_resizer_origin_id, thumbnails.FAILOVER_STATUS_CODES)] if resizer else None
+
+    if cdn_settings.unified_mam:
+        # Unified MAM CDN: proxies at the root, thumbnails under /thumbnail/. It
+        # takes over the proxy distribution (and its domain) in place.
+        mam_proxy_distribution = aws.cloudfront.Distribution("mam-cdn",
+            enabled=True,
+            is_ipv6_enabled=True,
+            comment=f"Contido {client} MAM {env}",
+            default_root_object="",
+            origins=[aws.cloudfront.DistributionOriginArgs(
+                domain_name=pulumi.Output.concat(mam_bucket.bucket_regional_domain_name),
+                origin_id=s3_mam_proxy_origin_id,
+                origin_path="/proxy",
+                s3_origin_config=aws.cloudfront.DistributionOriginS3OriginConfigArgs(
+                    origin_access_identity=mam_proxy_oai.cloudfront_access_identity_path,
+                ) if not cdn_settings.oac_origins else None,
+                origin_access_control_id=mam_oac.id if cdn_settings.oac_origins else None,
+                origin_shield=cdn.origin_shield(cdn_settings.distribution("proxy")),
+            ), aws.cloudfront.DistributionOriginArgs(
+                domain_name=pulumi.Output.concat(mam_bucket.bucket_regional_domain_name),
+                origin_id=s3_mam_thumbnail_origin_id,
+                s3_origin_config=aws.cloudfront.DistributionOriginS3OriginConfigArgs(
+                    origin_access_identity=mam_proxy_oai.cloudfront_access_identity_path,
+                ) if not cdn_settings.oac_origins else None,
+                origin_access_control_id=mam_oac.id if cdn_settings.oac_origins else None,
+                origin_shield=cdn.origin_shield(cdn_settings.distribution("thumbnail")),
+            )] + resizing_origins(""),
+            origin_groups=resizing_origin_groups,
+            default_cache_behavior=aws.cloudfront.DistributionDefaultCacheBehaviorArgs(
+                allowed_methods=["GET", "HEAD"],
+                cached_methods=["GET", "HEAD"],
+                target_origin_id=s3_mam_proxy_origin_id,
+                compress=True,
+                viewer_protocol_policy="redirect-to-https",
+                cache_policy_id=default_cache_policy_id,
+                origin_request_policy_id=default_origin_request_policy_id,
+                response_headers_policy_id=response_headers_policy_id if response_headers_policy_id else "",
+                realtime_log_config_arn=cdn_realtime_log_config_arn,
+            ),
+            # Thumbnail behaviors come first so proxy patterns such as "*.jpg"
+            # never shadow /thumbnail/ paths.
+            ordered_cache_behaviors=cdn.ordered_cache_behaviors("mam-cdn-thumbnail", f"contido-{client}-{env}-mam-thumbnail",
+                cdn_settings.distribution("thumbnail"),
+                target_origin_id=thumbnail_target_origin_id,
+                origin_request_policy_id=default_origin_request_policy_id,
+                response_headers_policy_id=response_headers_policy_id if response_headers_policy_id else "",
+                path_prefix="thumbnail/",
+                default_cache_policy_id=default_cache_policy_id,
+                cache_key=cdn_settings.cache_policy,
+                realtime_log_config_arn=cdn_realtime_log_config_arn,
+                viewer_request_function_arn=mam_thumbnail_resize_function.arn if mam_thumbnail_resize_function else None,
+            ) + (cdn.ordered_cache_behaviors("mam-proxy-cdn", f"contido-{client}-{env}-proxy",
+                cdn_settings.distribution("proxy"),
+                target_origin_id=s3_mam_proxy_origin_id,
+                origin_request_policy_id=default_origin_request_policy_id,
+                response_headers_policy_id=response_headers_policy_id if response_headers_policy_id else "",
+                cache_key=cdn_settings.cache_policy,
+                realtime_log_config_arn=cdn_realtime_log_config_arn) or []),
+            price_class=cdn_settings.distribution("proxy").price_class,
+            http_version=cdn_settings.distribution("proxy").http_version,
+            restrictions=aws.cloudfront.DistributionRestrictionsArgs(
+                geo_restriction=aws.cloudfront.DistributionRestrictionsGeoRestrictionArgs(
+                    restriction_type="none",
+                ),
+            ),
+            viewer_certificate=aws.cloudfront.DistributionViewerCertificateArgs(
+                cloudfront_default_certificate=True,
+            ) if not acm_certificate_arn else aws.cloudfront.DistributionViewerCertificateArgs(
+                acm_certificate_arn=acm_certificate_arn,
+                minimum_protocol_version="TLSv1.2_2021",
+                ssl_support_method="sni-only",
+            ),
+            opts=pulumi.ResourceOptions(
+                depends_on=[mam_bucket_policy] if mam_bucket_policy else None,
+                aliases=[pulumi.Alias(name="mam-proxy-cdn")]),
+            tags=tags)
+    else:
+        # MAM Proxy CDN Distribution
+        mam_proxy_distribution = aws.cloudfront.Distribution("mam-proxy-cdn",
+            enabled=True,
+            is_ipv6_enabled=True,
+            comment=f"Contido {client} Proxy {env}",
+            default_root_object="",
+            origins=[aws.cloudfront.DistributionOriginArgs(
+                domain_name=pulumi.Output.concat(mam_bucket.bucket_regional_domain_name),
+                origin_id=s3_mam_proxy_origin_id,
+                origin_path="/proxy",
+                s3_origin_config=aws.cloudfront.DistributionOriginS3OriginConfigArgs(
+                    origin_access_identity=mam_proxy_oai.cloudfront_access_identity_path,
+                ) if not cdn_settings.oac_origins else None,
+                origin_access_control_id=mam_oac.id if cdn_settings.oac_origins else None,
+                origin_shield=cdn.origin_shield(cdn_settings.distribution("proxy")),
+            )],
+            default_cache_behavior=aws.cloudfront.DistributionDefaultCacheBehaviorArgs(
+                allowed_methods=["GET", "HEAD"],
+                cached_methods=["GET", "HEAD"],
+                target_origin_id=s3_mam_proxy_origin_id,
+                compress=True,
+                viewer_protocol_policy="redirect-to-https",
+                cache_policy_id=default_cache_policy_id,
+                origin_request_policy_id=default_origin_request_policy_id,
+                response_headers_policy_id=response_headers_policy_id if response_headers_policy_id else "",
+                realtime_log_config_arn=cdn_realtime_log_config_arn,
+            ),
+            ordered_cache_behaviors=cdn.ordered_cache_behaviors("mam-proxy-cdn", f"contido-{client}-{env}-proxy",
+                cdn_settings.distribution("proxy"),
+                target_origin_id=s3_mam_proxy_origin_id,
+                origin_request_policy_id=default_origin_request_policy_id,
+                response_headers_policy_id=response_headers_policy_id if response_headers_policy_id else "",
+                cache_key=cdn_settings.cache_policy,
+                realtime_log_config_arn=cdn_realtime_log_config_arn),
+            price_class=cdn_settings.distribution("proxy").price_class,
+            http_version=cdn_settings.distribution("proxy").http_version,
+            restrictions=aws.cloudfront.DistributionRestrictionsArgs(
+                geo_restriction=aws.cloudfront.DistributionRestrictionsGeoRestrictionArgs(
+                    restriction_type="none",
+                ),
+            ),
+            viewer_certificate=aws.cloudfront.DistributionViewerCertificateArgs(
+                cloudfront_default_certificate=True,
+            ) if not acm_certificate_arn else aws.cloudfront.DistributionViewerCertificateArgs(
+                acm_certificate_arn=acm_certificate_arn,
+                minimum_protocol_version="TLSv1.2_2021",
+                ssl_support_method="sni-only",
+            ),
+            opts=pulumi.ResourceOptions(depends_on=[mam_bucket_policy] if mam_bucket_policy else None),
+            tags=tags)
+
+    # MAM Thumbnail CDN Distribution (retired by the unified MAM CDN)
+    mam_thumbnail_distribution = aws.cloudfront.Distribution("mam-thumbnail-cdn",
+        enabled=True,
+        is_ipv6_enabled=True,
+        comment=f"Contido {client} Thumbnail {env}",
+        default_root_object="",
+        origins=[aws.cloudfront.DistributionOriginArgs(
+            domain_name=pulumi.Output.concat(mam_bucket.bucket_regional_domain_name),
+            origin_id=s3_mam_thumbnail_origin_id,
+            origin_path="/thumbnail",
+            s3_origin_config=aws.cloudfront.DistributionOriginS3OriginConfigArgs(
+                origin_access_identity=mam_thumbnail_oai.cloudfront_access_identity_path,
+            ) if not cdn_settings.oac_origins else None,
+            origin_access_control_id=mam_oac.id if cdn_settings.oac_origins else None,
+            origin_shield=cdn.origin_shield(cdn_settings.distribution("thumbnail")),
+        )] + resizing_origins("/thumbnail"),
+        origin_groups=resizing_origin_groups,
+        default_cache_behavior=aws.cloudfront.DistributionDefaultCacheBehaviorArgs(
+            allowed_methods=["GET", "HEAD"],
+            cached_methods=["GET", "HEAD"],
+            target_origin_id=thumbnail_target_origin_id,
+            compress=True,
+            viewer_protocol_policy="redirect-to-https",
+            cache_policy_id=default_cache_policy_id,
+            origin_request_policy_id=default_origin_request_policy_id,
+            response_headers_policy_id=response_headers_policy_id if response_headers_policy_id else "",
+            realtime_log_config_arn=cdn_realtime_log_config_arn,
+            function_associations=[aws.cloudfront.DistributionDefaultCacheBehaviorFunctionAssociationArgs(
+                event_type="viewer-request",
+                function_arn=thumbnail_resize_function.arn,
+            )] if thumbnail_resize_function else None,
+        ),
+        ordered_cache_behaviors=cdn.ordered_cache_behaviors("mam-thumbnail-cdn", f"contido-{client}-{env}-thumbnail",
+            cdn_settings.distribution("thumbnail"),
+            target_origin_id=thumbnail_target_origin_id,
+            origin_request_policy_id=default_origin_request_policy_id,
+            response_headers_policy_id=response_headers_policy_id if response_headers_policy_id else "",
+            cache_key=cdn_settings.cache_policy,
+            realtime_log_config_arn=cdn_realtime_log_config_arn,
+            viewer_request_function_arn=thumbnail_resize_function.arn if thumbnail_resize_function else None),
+        price_class=cdn_settings.distribution("thumbnail").price_class,
+        http_version=cdn_settings.distribution("thumbnail").http_version,
+        restrictions=aws.cloudfront.DistributionRestrictionsArgs(
+            geo_restriction=aws.cloudfront.DistributionRestrictionsGeoRestrictionArgs(
+                restriction_type="none",
+            ),
+        ),
+        viewer_certificate=aws.cloudfront.DistributionViewerCertificateArgs(
+            cloudfront_default_certificate=True,
+        ) if not acm_certificate_arn else aws.cloudfront.DistributionViewerCertificateArgs(
+            acm_certificate_arn=acm_certificate_arn,
+            minimum_protocol_version="TLSv1.2_2021",
+            ssl_support_method="sni-only",
+        ),
+        opts=pulumi.ResourceOptions(depends_on=[mam_bucket_policy] if mam_bucket_policy else None),
+        tags=tags) if cdn_settings.thumbnail_distribution else None
+
+    # Asset CDN Distribution
+    asset_distribution = aws.cloudfront.Distribution("asset-cdn",
+        enabled=True,
+        is_ipv6_enabled=True,
+        comment=f"Contido {client} Assets {env}",
+        default_root_object="",
+        origins=[aws.cloudfront.DistributionOriginArgs(
+            domain_name=pulumi.Output.concat(asset_bucket.bucket_regional_domain_name),
+            origin_id=s3_asset_origin_id,
+            s3_origin_config=aws.cloudfront.DistributionOriginS3OriginConfigArgs(
+                origin_access_identity=asset_oai.cloudfront_access_identity_path,
+            ) if not cdn_settings.oac_origins else None,
+            origin_access_control_id=asset_oac.id if cdn_settings.oac_origins else None,
+            origin_shield=cdn.origin_shield(cdn_settings.distribution("asset")),
+        )] + ([aws.cloudfront.DistributionOriginArgs(
+            domain_name=pulumi.Output.concat(asset_replica_bucket.bucket_regional_domain_name),
+            origin_id=s3_asset_replica_origin_id,
+            s3_origin_config=aws.cloudfront.DistributionOriginS3OriginConfigArgs(
+                origin_access_identity=asset_oai.cloudfront_access_identity_path,
+            ) if not cdn_settings.oac_origins else None,
+            origin_access_control_id=asset_oac.id if cdn_settings.oac_origins else None,
+        )] if asset_failover else []),
+        # A 5xx from the asset bucket is retried against its replica
+        origin_groups=[cdn.failover_origin_group(asset_failover_origin_id,
+            s3_asset_origin_id, s3_asset_replica_origin_id, replication.FAILOVER_STATUS_CODES)] if asset_failover else None,
+        default_cache_behavior=aws.cloudfront.DistributionDefaultCacheBehaviorArgs(
+            allowed_methods=["GET", "HEAD"],
+            cached_methods=["GET", "HEAD"],
+            target_origin_id=asset_target_origin_id,
+            compress=True,
+            viewer_protocol_policy="redirect-to-https",
+            cache_policy_id=default_cache_policy_id,
+            origin_request_policy_id=default_origin_request_policy_id,
+            response_headers_policy_id=response_headers_policy_id if response_headers_policy_id else "",
+            realtime_log_config_arn=cdn_realtime_log_config_arn,
+        ),
+        ordered_cache_behaviors=cdn.ordered_cache_behaviors("asset-cdn", f"contido-{client}-{env}-asset",
+            cdn_settings.distribution("asset"),
+            target_origin_id=asset_target_origin_id,
+            origin_request_policy_id=default_origin_request_policy_id,
+            response_headers_policy_id=response_headers_policy_id if response_headers_policy_id else "",
+            cache_key=cdn_settings.cache_policy,
+            realtime_log_config_arn=cdn_realtime_log_config_arn),
+        price_class=cdn_settings.distribution("asset").price_class,
+        http_version=cdn_settings.distribution("asset").http_version,
+        restrictions=aws.cloudfront.DistributionRestrictionsArgs(
+            geo_restriction=aws.cloudfront.DistributionRestrictionsGeoRestrictionArgs(
+                restriction_type="none",
+            ),
+        ),
+        viewer_certificate=aws.cloudfront.DistributionViewerCertificateArgs(
+            cloudfront_default_certificate=True,
+        ) if not acm_certificate_arn else aws.cloudfront.DistributionViewerCertificateArgs(
+            acm_certificate_arn=acm_certificate_arn,
+            minimum_protocol_version="TLSv1.2_2021",
+            ssl_support_method="sni-only",
+        ),
+        opts=pulumi.ResourceOptions(depends_on=[policy for policy in (asset_bucket_policy, asset_replica_bucket_policy)
+                                                if policy] or None),
+        tags=tags)
+
+    if cdn_settings.uses_oac:
+        # oac-grant adds the grant while the origins still use the OAIs, so the
+        # distributions are unchanged and the policies apply right away; the OAIs
+        # stay trusted through oac-migrate until every edge signs with OAC.
+        mam_bucket_policy = aws.s3.BucketPolicy("mam-bucket-policy",
+            bucket=mam_bucket.id,
+            policy=cdn.bucket_read_policy(mam_bucket.arn,
+                oai_arns=mam_oai_arns,
+                distribution_arns=[distribution.arn for distribution in (mam_proxy_distribution, mam_thumbnail_distribution)
+                                   if distribution]))
+
+        asset_bucket_policy = aws.s3.BucketPolicy("asset-bucket-policy",
+            bucket=asset_bucket.id,
+            policy=cdn.bucket_read_policy(asset_bucket.arn,
+                oai_arns=[asset_oai.iam_arn] if cdn_settings.uses_oai else [],
+                distribution_arns=[asset_distribution.arn]))
+
+        asset_replica_bucket_policy = aws.s3.BucketPolicy("asset-replica-bucket-policy",
+            bucket=asset_replica_bucket.id,
+            policy=cdn.bucket_read_policy(asset_replica_bucket.arn,
+                oai_arns=[asset_oai.iam_arn] if cdn_settings.uses_oai else [],
+                distribution_arns=[asset_distribution.arn]),
+            region=replication_settings.region) if asset_failover else None
+
+    if resizer:
+        # Each distribution serving thumbnails may invoke the resizer
+        for resource_name, distribution in (("mam-cdn-resizer", mam_proxy_distribution if cdn_settings.unified_mam else None),
+                                            ("mam-thumbnail-cdn-resizer", mam_thumbnail_distribution)):
+            if distribution:
+                thumbnails.allow_distribution(resource_name, resizer.function, distribution)
+
+    if cdn_monitoring_settings:
+        for cdn_key, distribution in (("mam-proxy", mam_proxy_distribution),
+                                      ("mam-thumbnail", mam_thumbnail_distribution),
+                                      ("asset", asset_distribution)):
+            if distribution:
+                cdn_monitoring.monitor_distribution(f"{cdn_key}-cdn", distribution,
+                    f"contido-{client}-{env}-{cdn_key}-cdn", cdn_monitoring_settings, tags)
+
+    # ------------------------------------------------------------------------
+    # Route53 records (only if r53_zone_id is provided)
+    # ------------------------------------------------------------------------
+
+    proxy_record = aws.route53.Record("proxy-record",
+        zone_id=r53_zone_id,
+        name=f"ct{client}proxy{env}",
+        type="CNAME",
+        ttl=60,
+        records=[mam_proxy_distribution.domain_name],
+        opts=pulumi.ResourceOptions(depends_on=[mam_proxy_distribution])
+    ) if r53_zone_id else None
+
+    thumbnail_record = aws.route53.Record("thumbnail-record",
+        zone_id=r53_zone_id,
+        name=f"ct{client}thumbnail{env}",
+        type="CNAME",
+        ttl=60,
+        records=[mam_thumbnail_distribution.domain_name],
+        opts=pulumi.ResourceOptions(depends_on=[mam_thumbnail_distribution])
+    ) if r53_zone_id and mam_thumbnail_distribution else None
+
+    asset_record = aws.route53.Record("asset-record",
+        zone_id=r53_zone_id,
+        name=f"ct{client}assets{env}",
+        type="CNAME",
+        ttl=60,
+        records=[asset_distribution.domain_name],
+        opts=pulumi.ResourceOptions(depends_on=[asset_distribution])
+    ) if r53_zone_id else None
+
+    return Cdn(
+        proxy_distribution=mam_proxy_distribution,
+        thumbnail_distribution=mam_thumbnail_distribution,
+        asset_distribution=asset_distribution,
+        realtime_log_config=cdn_realtime_log_config,
+        proxy_record=proxy_record,
+        thumbnail_record=thumbnail_record,
+        asset_record=asset_record,
+    )
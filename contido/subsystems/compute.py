@@ -0,0 +1,89 @@
+"""Lambda: the sync and file-ingest functions with their aliases and SQS event source mappings.
+
+Only built when ``image_uri_sync`` or ``image_uri_ingest`` is set; each
+function exists only when its image is configured.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional
+
+import pulumi
+import pulumi_aws as aws
+
+from contido import functions, monitoring
+from contido.layers import BaseOutputs
+from contido.settings import StackSettings
+
+
+@dataclass(frozen=True)
+class Compute:
+    sync_function: Optional[aws.lambda_.Function]
+    file_ingest_function: Optional[aws.lambda_.Function]
+    # The deployed functions by key, for the monitoring subsystem
+    functions: Dict[str, monitoring.MonitoredFunction]
+
+
+def build(settings: StackSettings, tags: Mapping[str, str], base: BaseOutputs) -> Compute:
+    client, env = settings.client, settings.env
+    image_uri_sync, image_uri_ingest = settings.image_uri_sync, settings.image_uri_ingest
+    sync_sizing, ingest_sizing = settings.sync_sizing, settings.ingest_sizing
+    sync_deployment, ingest_deployment = settings.sync_deployment, settings.ingest_deployment
+    sync_event_source, ingest_event_source = settings.sync_event_source, settings.ingest_event_source
+    sync_service_queue_arn = base.queue_arns["sync_service"]
+    file_ingest_queue_arn = base.queue_arns["file_ingest"]
+
+    lambda_sync_service = aws.lambda_.Function("sync-service",
+        name=f"contido-{client}-{env}-sync-service",
+        role=base.role_arn,
+        image_uri=image_uri_sync if image_uri_sync else "placeholder:latest",
+        package_type="Image",
+        **sync_sizing.function_args(),
+        environment=aws.lambda_.FunctionEnvironmentArgs(
+            variables={},
+        ),
+        publish=sync_deployment.publish,
+        tags=tags) if image_uri_sync else None
+
+    lambda_sync_service_alias = functions.create_live_alias("sync-service", lambda_sync_service, sync_deployment, tags) if lambda_sync_service else None
+
+    lambda_sync_event_mapping = aws.lambda_.EventSourceMapping("sync-service-event",
+        event_source_arn=sync_service_queue_arn,
+        function_name=(lambda_sync_service_alias.arn if lambda_sync_service_alias else lambda_sync_service.name) if lambda_sync_service else "",
+        **sync_event_source.mapping_args(),
+        opts=pulumi.ResourceOptions(depends_on=[lambda_sync_service]) if lambda_sync_service else None
+    ) if lambda_sync_service else None
+
+    lambda_file_ingest_service = aws.lambda_.Function("file-ingest-service",
+        name=f"contido-{client}-{env}-file-ingest-service",
+        role=base.role_arn,
+        image_uri=image_uri_ingest if image_uri_ingest else "placeholder:latest",
+        package_type="Image",
+        **ingest_sizing.function_args(),
+        environment=aws.lambda_.FunctionEnvironmentArgs(
+            variables={},
+        ),
+        publish=ingest_deployment.publish,
+        tags=tags) if image_uri_ingest else None
+
+    lambda_file_ingest_service_alias = functions.create_live_alias("file-ingest-service", lambda_file_ingest_service, ingest_deployment, tags) if lambda_file_ingest_service else None
+
+    lambda_file_ingest_event_mapping = aws.lambda_.EventSourceMapping("file-ingest-event",
+        event_source_arn=file_ingest_queue_arn,
+        function_name=(lambda_file_ingest_service_alias.arn if lambda_file_ingest_service_alias else lambda_file_ingest_service.name) if lambda_file_ingest_service else "",
+        **ingest_event_source.mapping_args(),
+        opts=pulumi.ResourceOptions(depends_on=[lambda_file_ingest_service]) if lambda_file_ingest_service else None
+    ) if lambda_file_ingest_service else None
+
+    monitored_functions = {
+        function_key: monitoring.MonitoredFunction(function_key, function, sizing.timeout, event_source.maximum_concurrency)
+        for function_key, function, sizing, event_source in (
+            ("sync_service", lambda_sync_service, sync_sizing, sync_event_source),
+            ("file_ingest", lambda_file_ingest_service, ingest_sizing, ingest_event_source),
+        ) if function
+    }
+
+    return Compute(
+        sync_function=lambda_sync_service,
+        file_ingest_function=lambda_file_ingest_service,
+        functions=monitored_functions,
+    )
@@ -0,0 +1,176 @@
+"""IAM: managed policies, the backend role and the backend/frontend/Aspera users."""
+
+from dataclasses import dataclass
+from typing import Mapping
+
+import pulumi_aws as aws
+
+from contido import policies
+from contido.settings import StackSettings
+from contido.subsystems.storage import Storage
+
+
+@dataclass(frozen=True)
+class Iam:
+    role: aws.iam.Role
+    backend_user: aws.iam.User
+    frontend_user: aws.iam.User
+    aspera_user: aws.iam.User
+    resources_access_policy: aws.iam.Policy
+    secret_manager_policy: aws.iam.Policy
+    lambda_basic_policy: aws.iam.Policy
+    fe_asset_policy: aws.iam.Policy
+    cdn_invalidation_policy: aws.iam.Policy
+    aspera_policy: aws.iam.Policy
+
+
+def build(settings: StackSettings, tags: Mapping[str, str], storage: Storage) -> Iam:
+    client, env, region, account_id = settings.client, settings.env, settings.region, settings.account_id
+    all_buckets = storage.all_buckets
+    asset_bucket = storage.bucket("asset")
+
+    # ------------------------------------------------------------------------
+    # Policies
+    # ------------------------------------------------------------------------
+
+    # Resources Access Policy
+    resources_access_policy = aws.iam.Policy("resources-access",
+        name=f"contido-{client}-{env}-resources-access",
+        description="Contido resources access policy",
+        policy=policies.policy_document([
+            policies.statement(["s3:ListBucket"],
+                [bucket.arn for bucket in all_buckets], sid="1"),
+            policies.statement(["s3:GetObject", "s3:PutObject", "s3:DeleteObject", "s3:PutObjectAcl",
+                                "s3:AbortMultipartUpload", "s3:ListMultipartUploadParts"],
+                [policies.objects(bucket.arn) for bucket in all_buckets], sid="2"),
+            policies.statement(["sqs:SendMessage", "sqs:ReceiveMessage", "sqs:DeleteMessage",
+                                "sqs:GetQueueAttributes", "sqs:SetQueueAttributes"],
+                ["*"], sid="3"),
+        ], limit=policies.MANAGED_POLICY_LIMIT),
+        tags=tags)
+
+    # Secret Manager Access Policy
+    secret_manager_policy = aws.iam.Policy("secret-manager-access",
+        name=f"contido-{client}-secret_manager_access",
+        policy=policies.policy_document([
+            policies.statement(["secretsmanager:GetSecretValue"], "*"),
+            policies.statement(["kms:Decrypt"], "*"),
+        ], limit=policies.MANAGED_POLICY_LIMIT),
+        tags=tags)
+
+    # Lambda Basic Permissions Policy
+    lambda_basic_policy = aws.iam.Policy("lambda-basic-permissions",
+        name=f"lambda-{client}-basic-permissions",
+        description="Lambda basic permissions policy",
+        policy=policies.policy_document([
+            policies.statement("logs:CreateLogGroup", f"arn:aws:logs:{region}:{account_id}:*"),
+            policies.statement(["logs:CreateLogStream", "logs:PutLogEvents"],
+                [f"arn:aws:logs:{region}:{account_id}:log-group:/aws/lambda/contido-{client}-{env}-*"]),
+        ], limit=policies.MANAGED_POLICY_LIMIT),
+        tags=tags)
+
+    # FE Asset Bucket Access Policy
+    userfe_policy = aws.iam.Policy("fe-asset-bucket-access",
+        name=f"contido-{client}-{env}-asset-bucket-access",
+        description="FE asset bucket access policy",
+        policy=policies.policy_document([
+            policies.statement(["s3:ListBucket"], [asset_bucket.arn], sid="VisualEditor0"),
+            policies.statement(["s3:GetObject", "s3:PutObject", "s3:DeleteObject", "s3:PutObjectAcl"],
+                [policies.objects(asset_bucket.arn)], sid="VisualEditor1"),
+        ], limit=policies.MANAGED_POLICY_LIMIT),
+        tags=tags)
+
+    # Asset CDN Invalidation Policy
+    cdn_invalidation_policy = aws.iam.Policy("asset-cdn-invalidation",
+        name=f"Invalidate-{client}-asset_cdn_policy",
+        policy=policies.policy_document([
+            policies.statement(["cloudfront:CreateInvalidation"], "*", sid="VisualEditor0"),
+        ], limit=policies.MANAGED_POLICY_LIMIT),
+        tags=tags)
+
+    # Aspera Upload Bucket Access Policy
+    useraspera_policy = aws.iam.Policy("aspera-upload-access",
+        name=f"contido-{client}-upload-{env}-bucket-access",
+        description="Aspera upload bucket access policy",
+        policy=policies.policy_document([
+            policies.statement(["s3:ListBucket", "s3:ListBucketMultipartUploads"],
+                f"arn:aws:s3:::contido-{client}-upload-{env}"),
+            policies.statement(["s3:GetObject", "s3:PutObject", "s3:DeleteObject",
+                                "s3:AbortMultipartUpload", "s3:ListMultipartUploadParts"],
+                f"arn:aws:s3:::contido-{client}-upload-{env}/*"),
+        ], limit=policies.MANAGED_POLICY_LIMIT),
+        tags=tags)
+
+    # ------------------------------------------------------------------------
+    # Role
+    # ------------------------------------------------------------------------
+
+    assume_role_policy = policies.policy_document([
+        policies.statement("sts:AssumeRole", principal={"Service": "lambda.amazonaws.com"}),
+    ], limit=policies.ROLE_TRUST_POLICY_LIMIT)
+
+    iam_role = aws.iam.Role("backend-common-role",
+        name=f"contido-{client}-{env}-backend-common-role",
+        assume_role_policy=assume_role_policy,
+        tags=tags)
+
+    # Attach policies to role
+    aws.iam.RolePolicyAttachment("resources-access",
+        role=iam_role.name,
+        policy_arn=resources_access_policy.arn)
+
+    aws.iam.RolePolicyAttachment("secret-manager-access",
+        role=iam_role.name,
+        policy_arn=secret_manager_policy.arn)
+
+    aws.iam.RolePolicyAttachment("lambda-basic-permissions",
+        role=iam_role.name,
+        policy_arn=lambda_basic_policy.arn)
+
+    # ------------------------------------------------------------------------
+    # Users
+    # ------------------------------------------------------------------------
+
+    # Backend User
+    iam_userbe = aws.iam.User("backend-user",
+        name=f"contido-{client}-{env}-user",
+        tags=tags)
+
+    aws.iam.UserPolicyAttachment("userbe-resources-access",
+        user=iam_userbe.name,
+        policy_arn=resources_access_policy.arn)
+
+    # Frontend User
+    iam_userfe = aws.iam.User("frontend-user",
+        name=f"contido-{client}-{env}-fe",
+        tags=tags)
+
+    aws.iam.UserPolicyAttachment("userfe-asset-access",
+        user=iam_userfe.name,
+        policy_arn=userfe_policy.arn)
+
+    aws.iam.UserPolicyAttachment("userfe-cdn-invalidation",
+        user=iam_userfe.name,
+        policy_arn=cdn_invalidation_policy.arn)
+
+    # Aspera User
+    iam_aspera = aws.iam.User("aspera-user",
+        name=f"{client}-{env}-aspera",
+        tags=tags)
+
+    aws.iam.UserPolicyAttachment("useraspera-upload-access",
+        user=iam_aspera.name,
+        policy_arn=useraspera_policy.arn)
+
+    return Iam(
+        role=iam_role,
+        backend_user=iam_userbe,
+        frontend_user=iam_userfe,
+        aspera_user=iam_aspera,
+        resources_access_policy=resources_access_policy,
+        secret_manager_policy=secret_manager_policy,
+        lambda_basic_policy=lambda_basic_policy,
+        fe_asset_policy=userfe_policy,
+        cdn_invalidation_policy=cdn_invalidation_policy,
+        aspera_policy=useraspera_policy,
+    )
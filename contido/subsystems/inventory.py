@@ -0,0 +1,81 @@
+"""S3 Inventory reports of the large buckets with a Glue/Athena catalog over them.
+
+Only built when the ``inventory`` config object is set.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Mapping
+
+import pulumi
+import pulumi_aws as aws
+
+from contido import inventory
+from contido.bucket import ContidoBucket
+from contido.settings import StackSettings
+from contido.subsystems.iam import Iam
+from contido.subsystems.storage import Storage
+
+
+@dataclass(frozen=True)
+class Inventory:
+    reports_storage: ContidoBucket
+    database: aws.glue.CatalogDatabase
+    # Source bucket key -> table
+    tables: Dict[str, aws.glue.CatalogTable]
+    workgroup: aws.athena.Workgroup
+
+
+def build(settings: StackSettings, tags: Mapping[str, str], storage: Storage, iam: Iam) -> Inventory:
+    client, env, region, account_id = settings.client, settings.env, settings.region, settings.account_id
+    inventory_settings = settings.inventory_settings
+
+    # Daily Parquet listings of the large buckets, queried through Athena by the
+    # backend jobs instead of paging through ListObjectsV2
+    reports_storage = ContidoBucket("reports",
+        bucket_name=f"contido-{client}-reports-{env}",
+        tags=tags,
+        lifecycle_rules=inventory.report_lifecycle_rules(inventory_settings),
+        cors=False)
+
+    inventory_sources = {bucket_key: storage.bucket(bucket_key) for bucket_key in inventory_settings.buckets}
+
+    reports_bucket_policy = aws.s3.BucketPolicy("reports-bucket-policy",
+        bucket=reports_storage.bucket.id,
+        policy=inventory.delivery_policy(reports_storage.bucket.arn,
+            [source_bucket.arn for source_bucket in inventory_sources.values()], account_id))
+
+    for bucket_key, source_bucket in inventory_sources.items():
+        inventory.create_bucket_inventory(f"{bucket_key}-inventory", source_bucket, reports_storage.bucket, inventory_settings,
+            opts=pulumi.ResourceOptions(depends_on=[reports_bucket_policy]))
+
+    inventory_database = aws.glue.CatalogDatabase("inventory-database",
+        name=inventory.database_name(client, env),
+        description="S3 inventory catalog",
+        tags=tags)
+
+    inventory_tables = {
+        bucket_key: inventory.create_inventory_table(f"{bucket_key}-inventory-table", inventory.table_name(bucket_key),
+            inventory_database, source_bucket, reports_storage.bucket, inventory_settings)
+        for bucket_key, source_bucket in inventory_sources.items()
+    }
+
+    inventory_workgroup = inventory.create_workgroup("inventory-workgroup",
+        f"contido-{client}-{env}-inventory", reports_storage.bucket, inventory_settings, tags)
+
+    inventory_query_policy = aws.iam.Policy("inventory-query",
+        name=f"contido-{client}-{env}-inventory-query",
+        description="Athena queries over the S3 inventory catalog",
+        policy=inventory.query_policy(region, account_id, f"contido-{client}-{env}-inventory",
+            inventory.database_name(client, env), reports_storage.bucket.arn),
+        tags=tags)
+
+    aws.iam.RolePolicyAttachment("inventory-query",
+        role=iam.role.name,
+        policy_arn=inventory_query_policy.arn)
+
+    return Inventory(
+        reports_storage=reports_storage,
+        database=inventory_database,
+        tables=inventory_tables,
+        workgroup=inventory_workgroup,
+    )
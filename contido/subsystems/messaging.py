@@ -0,0 +1,101 @@
+"""SQS: workflow queues with their DLQs, S3 event notifications and ECS worker autoscaling."""
+
+from dataclasses import dataclass
+from typing import Dict, Mapping, Tuple
+
+import pulumi_aws as aws
+
+from contido import notifications, queues, workers
+from contido import settings as stack_settings
+from contido.settings import StackSettings
+from contido.subsystems.storage import Storage
+
+# Queue key -> (resource name, queue name). Names predate the naming scheme
+# of the newer queues and must not change.
+QUEUES = {
+    "upload": ("upload-queue", "contido-{client}-upload-{env}"),
+    "mam_restore": ("mam-restore-queue", "contido-{client}-restore-{env}"),
+    "transfer": ("transfer-queue", "contido-{client}-transfer-{env}"),
+    "ingest_proxy": ("ingest-proxy-queue", "contido-{client}-ingest-{env}-proxy"),
+    "transcoding_start": ("transcoding-start-queue", "contido-{client}-transcoding-start-{env}"),
+    "client_delivery": ("client-delivery-queue", "client_delivery_{client}_{env}_sgp"),
+    "archive": ("archive-queue", "contido-{client}-watch-folder-archive-{env}"),
+    "sync_service": ("sync-service-queue", "contido-{client}-{env}-sync-service"),
+    "file_ingest": ("file-ingest-service-queue", "contido-{client}-{env}-file-ingest-service"),
+}
+
+# Queue key -> resource name of the policy letting S3 send to it, from the
+# bucket in settings.NOTIFICATION_QUEUE_SOURCES.
+QUEUE_POLICIES = {
+    "upload": "upload-queue-policy",
+    "mam_restore": "mam-restore-queue-policy",
+    "client_delivery": "client-delivery-queue-policy",
+    "archive": "archive-queue-policy",
+}
+
+
+@dataclass(frozen=True)
+class Messaging:
+    queues: Dict[str, aws.sqs.Queue]
+    # Queue key -> (dead-letter queue, workflow queue)
+    dead_letter_queues: Dict[str, Tuple[aws.sqs.Queue, aws.sqs.Queue]]
+    queue_policies: Dict[str, aws.sqs.QueuePolicy]
+    bucket_notifications: Dict[str, aws.s3.BucketNotification]
+
+
+def build(settings: StackSettings, tags: Mapping[str, str], storage: Storage) -> Messaging:
+    client, env = settings.client, settings.env
+    queue_settings = settings.queue_settings
+
+    # ------------------------------------------------------------------------
+    # Queues
+    # ------------------------------------------------------------------------
+
+    dead_letter_queues = {}
+    queue_policies = {}
+    for queue_key, (resource_name, name_template) in QUEUES.items():
+        name = name_template.format(client=client, env=env)
+        dead_letter_queue = queues.create_dead_letter_queue(resource_name, name, tags,
+                                                            fifo=queue_settings[queue_key].fifo)
+        queue = aws.sqs.Queue(resource_name,
+            name=queue_settings[queue_key].queue_name(name),
+            **queue_settings[queue_key].queue_args(),
+            redrive_policy=queues.redrive_policy(dead_letter_queue, queue_settings[queue_key]),
+            max_message_size=262144,
+            sqs_managed_sse_enabled=True,
+            tags=tags)
+        dead_letter_queues[queue_key] = (dead_letter_queue, queue)
+
+        if queue_key in QUEUE_POLICIES:
+            source_bucket = storage.bucket(stack_settings.NOTIFICATION_QUEUE_SOURCES[queue_key])
+            queue_policies[queue_key] = aws.sqs.QueuePolicy(QUEUE_POLICIES[queue_key],
+                queue_url=queue.url,
+                policy=queues.s3_send_policy(queue, source_bucket.arn))
+
+    # Dead-letter queues only accept messages from their own workflow queue
+    for queue_key, (dead_letter_queue, source_queue) in dead_letter_queues.items():
+        queues.allow_redrive(queue_key.replace("_", "-"), dead_letter_queue, source_queue)
+
+    # ------------------------------------------------------------------------
+    # ECS worker autoscaling (only for queues listed under `workers`)
+    # ------------------------------------------------------------------------
+
+    for queue_key, scaling in settings.worker_scaling.items():
+        workers.create_backlog_scaling(queue_key.replace("_", "-"), dead_letter_queues[queue_key][1], scaling, tags)
+
+    # ------------------------------------------------------------------------
+    # S3 event notifications
+    # ------------------------------------------------------------------------
+
+    bucket_notifications = notifications.create_bucket_notifications(
+        settings.notification_routes,
+        storage.buckets,
+        {queue_key: dead_letter_queues[queue_key][1] for queue_key in QUEUE_POLICIES},
+        queue_policies)
+
+    return Messaging(
+        queues={queue_key: queue for queue_key, (_, queue) in dead_letter_queues.items()},
+        dead_letter_queues=dead_letter_queues,
+        queue_policies=queue_policies,
+        bucket_notifications=bucket_notifications,
+    )
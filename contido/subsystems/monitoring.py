@@ -0,0 +1,57 @@
+"""CloudWatch: queue and Lambda alarms, the SNS alarm topic and the dashboard.
+
+The functions come from the subsystems that deploy them (each exposes a
+``functions`` mapping). In the edge and compute layers (see ``contido.layers``)
+there are no queues: the function alarms notify the base stack's topic and get
+a dashboard of their own, named after the layer.
+"""
+
+from dataclasses import dataclass
+from typing import Mapping, Optional
+
+import pulumi
+import pulumi_aws as aws
+
+from contido import monitoring
+from contido.settings import StackSettings
+from contido.subsystems.messaging import Messaging
+
+
+@dataclass(frozen=True)
+class Monitoring:
+    alarm_topic_arn: pulumi.Output[str]
+    dashboard: aws.cloudwatch.Dashboard
+
+
+def build(settings: StackSettings,
+          tags: Mapping[str, str],
+          messaging: Optional[Messaging],
+          functions: Mapping[str, monitoring.MonitoredFunction],
+          alarm_topic_arn: Optional[pulumi.Output[str]] = None) -> Monitoring:
+    client, env, region = settings.client, settings.env, settings.region
+    monitoring_settings = settings.monitoring_settings
+
+    # Every queue with a DLQ and every deployed Lambda is monitored; new queues
+    # only need an entry in messaging.QUEUES, new functions one in the
+    # ``functions`` mapping of the subsystem that deploys them.
+    monitored_queues = [
+        monitoring.MonitoredQueue(queue_key, source_queue, dead_letter_queue, settings.queue_settings[queue_key])
+        for queue_key, (dead_letter_queue, source_queue) in messaging.dead_letter_queues.items()
+    ] if messaging else []
+
+    monitored_functions = list(functions.values())
+
+    if alarm_topic_arn is None:
+        alarm_topic_arn = monitoring.create_alarm_topic("monitoring-alarms",
+            f"contido-{client}-{env}-alarms", monitoring_settings, tags).arn
+
+    monitoring.create_queue_alarms(f"contido-{client}-{env}", monitored_queues, monitoring_settings, alarm_topic_arn, tags)
+    monitoring.create_function_alarms(f"contido-{client}-{env}", monitored_functions, monitoring_settings, alarm_topic_arn, tags)
+
+    layer_name = settings.layer_settings.name
+    monitoring_dashboard = monitoring.create_dashboard("monitoring-dashboard",
+        f"contido-{client}-{env}", region, monitored_queues, monitored_functions, monitoring_settings
+    ) if messaging else monitoring.create_dashboard(f"{layer_name}-dashboard",
+        f"contido-{client}-{env}-{layer_name}", region, monitored_queues, monitored_functions, monitoring_settings)
+
+    return Monitoring(alarm_topic_arn=alarm_topic_arn, dashboard=monitoring_dashboard)
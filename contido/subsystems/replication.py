@@ -0,0 +1,65 @@
+"""S3 cross-region replicas of the listed buckets, with the replication role and configurations.
+
+Only built when the ``replication`` config object is set.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Mapping
+
+import pulumi
+import pulumi_aws as aws
+
+from contido import lifecycle, policies, replication
+from contido.bucket import ContidoBucket
+from contido.settings import StackSettings
+from contido.subsystems.storage import Storage
+
+
+@dataclass(frozen=True)
+class Replication:
+    # Source bucket key -> replica
+    replicas: Dict[str, ContidoBucket]
+    role: aws.iam.Role
+    configurations: Dict[str, aws.s3.BucketReplicationConfig]
+
+
+def build(settings: StackSettings, tags: Mapping[str, str], storage: Storage) -> Replication:
+    client, env = settings.client, settings.env
+    replication_settings = settings.replication_settings
+    replica_lifecycle = lifecycle.LifecyclePolicy(
+        noncurrent_version_expiration_days=replication_settings.noncurrent_version_expiration_days)
+
+    # Replicas mirror their source's CORS, so a CDN failover answers the same way
+    replicas = {
+        bucket_key: ContidoBucket(f"{bucket_key}-replica",
+            bucket_name=replication.replica_bucket_name(client, env, bucket_key, replication_settings.region),
+            tags=tags,
+            lifecycle_rules=lifecycle.lifecycle_rules(replica_lifecycle),
+            cors=storage.buckets[bucket_key].cors is not None,
+            versioning=True,
+            region=replication_settings.region)
+        for bucket_key in replication_settings.buckets
+    }
+
+    replication_role = aws.iam.Role("replication-role",
+        name=f"contido-{client}-{env}-s3-replication",
+        assume_role_policy=policies.policy_document([
+            policies.statement("sts:AssumeRole", principal={"Service": "s3.amazonaws.com"}),
+        ], limit=policies.ROLE_TRUST_POLICY_LIMIT),
+        tags=tags)
+
+    replication_policy = aws.iam.RolePolicy("replication-policy",
+        role=replication_role.id,
+        policy=replication.role_policy([storage.bucket(bucket_key).arn for bucket_key in replicas],
+                                       [replica.bucket.arn for replica in replicas.values()]))
+
+    # Both sides must be versioned before S3 accepts the configuration
+    configurations = {
+        bucket_key: replication.create_replication_config(f"{bucket_key}-replication",
+            storage.bucket(bucket_key), replica.bucket, replication_role, replication_settings,
+            opts=pulumi.ResourceOptions(depends_on=[storage.buckets[bucket_key].versioning, replica.versioning,
+                                                    replication_policy]))
+        for bucket_key, replica in replicas.items()
+    }
+
+    return Replication(replicas=replicas, role=replication_role, configurations=configurations)
@@ -0,0 +1,72 @@
+"""S3 buckets: one ContidoBucket per entry in ``settings.BUCKETS``."""
+
+from dataclasses import dataclass
+from typing import Dict, List, Mapping
+
+import pulumi_aws as aws
+
+from contido import lifecycle
+from contido.bucket import ContidoBucket
+from contido.settings import StackSettings
+
+
+@dataclass(frozen=True)
+class Storage:
+    # Keyed like settings.BUCKETS
+    buckets: Dict[str, ContidoBucket]
+
+    def bucket(self, key: str) -> aws.s3.Bucket:
+        return self.buckets[key].bucket
+
+    @property
+    def all_buckets(self) -> List[aws.s3.Bucket]:
+        return [storage.bucket for storage in self.buckets.values()]
+
+
+def build(settings: StackSettings, tags: Mapping[str, str]) -> Storage:
+    client, env = settings.client, settings.env
+    lifecycle_policies = settings.lifecycle_policies
+    # S3 replication needs a versioned source
+    replicated = settings.replication_settings.buckets if settings.replication_settings else ()
+
+    upload_storage = ContidoBucket("upload",
+        bucket_name=f"contido-{client}-upload-{env}",
+        tags=tags,
+        lifecycle_rules=lifecycle.lifecycle_rules(lifecycle_policies.get("upload")),
+        versioning="upload" in replicated,
+        transfer_acceleration=settings.upload_transfer_acceleration)
+
+    mam_storage = ContidoBucket("mam",
+        bucket_name=f"contido-{client}-mam-{env}",
+        tags=tags,
+        lifecycle_rules=lifecycle.lifecycle_rules(lifecycle_policies.get("mam")),
+        versioning="mam" in replicated)
+
+    asset_storage = ContidoBucket("asset",
+        bucket_name=f"contido-{client}-asset-{env}",
+        tags=tags,
+        lifecycle_rules=lifecycle.lifecycle_rules(lifecycle_policies.get("asset")),
+        versioning="asset" in replicated)
+
+    archive_storage = ContidoBucket("archive",
+        bucket_name=f"contido-{client}-archive-{env}",
+        tags=tags,
+        lifecycle_rules=lifecycle.lifecycle_rules(lifecycle_policies.get("archive")),
+        cors=False,
+        versioning=True,
+        object_ownership="ObjectWriter")
+
+    edit_storage = ContidoBucket("edit",
+        bucket_name=f"contido-{client}-edit-{env}",
+        tags=tags,
+        lifecycle_rules=lifecycle.lifecycle_rules(lifecycle_policies.get("edit")),
+        versioning="edit" in replicated,
+        cors=False)
+
+    return Storage(buckets={
+        "upload": upload_storage,
+        "mam": mam_storage,
+        "asset": asset_storage,
+        "archive": archive_storage,
+        "edit": edit_storage,
+    })
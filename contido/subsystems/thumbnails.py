@@ -0,0 +1,74 @@
+"""Thumbnail resizer: the Lambda function, its role, function URL and origin access control.
+
+Only built with the CDN when the ``thumbnail_resizing`` config object is set;
+the ``cdn`` subsystem puts it behind the thumbnail behaviors.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Mapping
+
+import pulumi
+import pulumi_aws as aws
+
+from contido import cdn, monitoring, policies, thumbnails
+from contido.layers import BaseOutputs
+from contido.settings import StackSettings
+
+
+@dataclass(frozen=True)
+class Thumbnails:
+    function: aws.lambda_.Function
+    function_url: aws.lambda_.FunctionUrl
+    origin_access_control: aws.cloudfront.OriginAccessControl
+    # Origin domain of the function URL
+    origin_domain: pulumi.Output[str]
+    # The resizer by key, for the monitoring subsystem
+    functions: Dict[str, monitoring.MonitoredFunction]
+
+
+def build(settings: StackSettings, tags: Mapping[str, str], base: BaseOutputs) -> Thumbnails:
+    client, env, region, account_id = settings.client, settings.env, settings.region, settings.account_id
+    resizing_settings = settings.thumbnail_resizing_settings
+    function_name = f"contido-{client}-{env}-thumbnail-resizer"
+    mam_bucket = base.bucket("mam")
+
+    resizer_role = aws.iam.Role("thumbnail-resizer-role",
+        name=function_name,
+        assume_role_policy=policies.policy_document([
+            policies.statement("sts:AssumeRole", principal={"Service": "lambda.amazonaws.com"}),
+        ], limit=policies.ROLE_TRUST_POLICY_LIMIT),
+        tags=tags)
+
+    resizer_policy = aws.iam.RolePolicy("thumbnail-resizer-policy",
+        role=resizer_role.id,
+        policy=thumbnails.role_policy(mam_bucket.arn,
+            f"arn:aws:logs:{region}:{account_id}:log-group:/aws/lambda/{function_name}",
+            resizing_settings.write_back))
+
+    resizer_function = aws.lambda_.Function("thumbnail-resizer",
+        name=function_name,
+        role=resizer_role.arn,
+        image_uri=resizing_settings.image_uri,
+        package_type="Image",
+        **resizing_settings.sizing.function_args(),
+        environment=aws.lambda_.FunctionEnvironmentArgs(
+            variables=thumbnails.function_environment(mam_bucket.id, resizing_settings),
+        ),
+        tags=tags,
+        opts=pulumi.ResourceOptions(depends_on=[resizer_policy]))
+
+    # Only CloudFront, signing with the OAC below, may call the URL
+    resizer_function_url = aws.lambda_.FunctionUrl("thumbnail-resizer-url",
+        function_name=resizer_function.name,
+        authorization_type="AWS_IAM")
+
+    resizer_oac = cdn.create_origin_access_control("thumbnail-resizer-oac", function_name, origin_type="lambda")
+
+    return Thumbnails(
+        function=resizer_function,
+        function_url=resizer_function_url,
+        origin_access_control=resizer_oac,
+        origin_domain=thumbnails.function_url_domain(resizer_function_url.function_url),
+        functions={"thumbnail_resizer": monitoring.MonitoredFunction(
+            "thumbnail_resizer", resizer_function, resizing_settings.sizing.timeout)},
+    )
@@ -0,0 +1,270 @@
+"""On-demand thumbnail resizing behind the MAM thumbnail CDN.
+
+The transcoding pipeline only needs to write one thumbnail per asset under
+``thumbnail/`` in the MAM bucket; other sizes and formats are rendered on
+first request with the optional ``thumbnail_resizing`` config object::
+
+    thumbnail_resizing:
+      image_uri: 909463554763.dkr.ecr.ap-south-1.amazonaws.com/thumbnail-resizer:1.0.0
+      widths: [160, 320, 640, 1280]   # requested widths round up to these
+      formats: [avif, webp, jpeg]     # format=auto picks the first the viewer accepts
+      write_back: true                # store each variant in the MAM bucket
+      architecture: arm64
+      memory_size: 1536
+      timeout: 30                     # also the CloudFront origin read timeout
+
+A CloudFront Function on the thumbnail behaviors turns the ``width`` and
+``format`` query parameters into the path, so the cache key only ever holds
+the normalized variant::
+
+    /clip/poster.jpg?width=300&format=webp -> /_resized/320/webp/clip/poster.jpg
+
+The thumbnail origin becomes an origin group: variants already in
+``thumbnail/_resized/`` (and the originals) come from S3, and a 403/404 falls
+over to the resizer function URL, signed by its own Origin Access Control.
+
+The resizer image is built outside this repo. It is invoked through its
+function URL with ``GET /thumbnail/_resized/<width>/<format>/<key>`` and must
+read ``<SOURCE_PREFIX><key>`` from ``BUCKET``, render it (``original`` keeps
+the source width or format, and unlisted ``WIDTHS``/``FORMATS`` are
+rejected), return the image, and, with ``WRITE_BACK=true``, store it under
+the requested key so the next cache miss is served from S3.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any, List, Mapping, Optional, Tuple
+
+import pulumi
+import pulumi_aws as aws
+
+from contido import policies
+from contido.functions import ARCHITECTURES, FunctionSizing
+
+FORMATS = ("avif", "webp", "jpeg", "png")
+# Formats a viewer has to announce in its Accept header before format=auto picks them.
+_ACCEPT = {"avif": "image/avif", "webp": "image/webp"}
+MAX_WIDTH = 4096
+# CloudFront waits at most 60 seconds for a custom origin without a quota increase.
+MAX_TIMEOUT = 60
+
+SOURCE_PREFIX = "thumbnail/"
+RESIZED_PREFIX = f"{SOURCE_PREFIX}_resized/"
+# S3 answers 403 for missing keys when the reader may not list the bucket.
+FAILOVER_STATUS_CODES = (403, 404)
+
+
+@dataclass(frozen=True)
+class ResizingSettings:
+    image_uri: str
+    widths: Tuple[int, ...] = (160, 320, 640, 1280)
+    formats: Tuple[str, ...] = ("avif", "webp", "jpeg")
+    write_back: bool = True
+    sizing: FunctionSizing = FunctionSizing(architecture="arm64", memory_size=1536,
+                                            ephemeral_storage_size=512, timeout=30)
+
+
+_KEYS = {"image_uri", "widths", "formats", "write_back", "architecture", "memory_size", "timeout"}
+
+
+def _require_range(name: str, value: Any, low: int, high: int) -> None:
+    if not isinstance(value, int) or isinstance(value, bool) or not low <= value <= high:
+        raise ValueError(f"thumbnail_resizing.{name} must be an integer in [{low}, {high}], got {value!r}")
+
+
+def parse_resizing_settings(raw: Optional[Mapping[str, Any]]) -> Optional[ResizingSettings]:
+    """Validate the ``thumbnail_resizing`` config object (None when unset)."""
+    if raw is None:
+        return None
+    unknown = set(raw) - _KEYS
+    if unknown:
+        raise ValueError(f"thumbnail_resizing: unknown keys {sorted(unknown)}")
+    image_uri = raw.get("image_uri")
+    if not isinstance(image_uri, str) or not image_uri:
+        raise ValueError("thumbnail_resizing.image_uri is required")
+    defaults = ResizingSettings(image_uri=image_uri)
+
+    widths = tuple(raw.get("widths", defaults.widths))
+    if not widths:
+        raise ValueError("thumbnail_resizing.widths must list at least one width")
+    for width in widths:
+        _require_range("widths", width, 1, MAX_WIDTH)
+    if list(widths) != sorted(set(widths)):
+        raise ValueError(f"thumbnail_resizing.widths must be ascending without repeats, got {list(widths)}")
+
+    formats = tuple(raw.get("formats", defaults.formats))
+    if not formats:
+        raise ValueError("thumbnail_resizing.formats must list at least one format")
+    unknown = [image_format for image_format in formats if image_format not in FORMATS]
+    if unknown:
+        raise ValueError(f"thumbnail_resizing.formats must be among {list(FORMATS)}, got {unknown}")
+    if len(set(formats)) != len(formats):
+        raise ValueError(f"thumbnail_resizing.formats lists a format twice: {list(formats)}")
+
+    write_back = raw.get("write_back", defaults.write_back)
+    if not isinstance(write_back, bool):
+        raise ValueError(f"thumbnail_resizing.write_back must be a boolean, got {write_back!r}")
+
+    sizing = FunctionSizing(
+        architecture=raw.get("architecture", defaults.sizing.architecture),
+        memory_size=raw.get("memory_size", defaults.sizing.memory_size),
+        ephemeral_storage_size=defaults.sizing.ephemeral_storage_size,
+        timeout=raw.get("timeout", defaults.sizing.timeout),
+    )
+    if sizing.architecture not in ARCHITECTURES:
+        raise ValueError(f"thumbnail_resizing.architecture must be one of {list(ARCHITECTURES)}, "
+                         f"got {sizing.architecture!r}")
+    _require_range("memory_size", sizing.memory_size, 128, 10240)
+    _require_range("timeout", sizing.timeout, 1, MAX_TIMEOUT)
+    return ResizingSettings(image_uri=image_uri, widths=widths, formats=formats, write_back=write_back,
+                            sizing=sizing)
+
+
+_VIEWER_REQUEST = """\
+const WIDTHS = %(widths)s;
+const FORMATS = %(formats)s;
+const ACCEPT = %(accept)s;
+const PREFIX = %(prefix)s;
+
+function handler(event) {
+    const request = event.request;
+    const query = request.querystring;
+    const width = query.width ? parseInt(query.width.value, 10) : NaN;
+    let format = query.format ? query.format.value.toLowerCase() : "";
+    delete query.width;
+    delete query.format;
+
+    // Variants are only reachable through the normalized parameters.
+    if (request.uri.startsWith(PREFIX + "/_resized/")) {
+        return {statusCode: 403, statusDescription: "Forbidden"};
+    }
+    if (!request.uri.startsWith(PREFIX + "/")) {
+        return request;
+    }
+
+    let size = "original";
+    if (width > 0) {
+        size = String(WIDTHS.find((candidate) => candidate >= width) || WIDTHS[WIDTHS.length - 1]);
+    }
+    if (format === "auto") {
+        const accept = request.headers.accept ? request.headers.accept.value : "";
+        format = FORMATS.find((candidate) => !ACCEPT[candidate] || accept.includes(ACCEPT[candidate]));
+    }
+    if (!FORMATS.includes(format)) {
+        format = "original";
+    }
+    if (size === "original" && format === "original") {
+        return request;
+    }
+    request.uri = PREFIX + "/_resized/" + size + "/" + format + request.uri.slice(PREFIX.length);
+    return request;
+}
+"""
+
+
+def viewer_request_code(settings: ResizingSettings, path_prefix: str = "") -> str:
+    """CloudFront Function source rewriting ``width``/``format`` into the URI.
+
+    ``path_prefix`` is where thumbnails start in the distribution's paths
+    (``/thumbnail`` on the unified MAM distribution, empty on the thumbnail one).
+    """
+    return _VIEWER_REQUEST % {
+        "widths": json.dumps(list(settings.widths)),
+        "formats": json.dumps(list(settings.formats)),
+        "accept": json.dumps({key: value for key, value in _ACCEPT.items() if key in settings.formats}),
+        "prefix": json.dumps(path_prefix),
+    }
+
+
+def create_viewer_request_function(resource_name: str,
+                                   name: str,
+                                   settings: ResizingSettings,
+                                   path_prefix: str = "") -> aws.cloudfront.Function:
+    return aws.cloudfront.Function(resource_name,
+        name=name,
+        comment=f"Thumbnail width/format normalization for {name}",
+        runtime="cloudfront-js-2.0",
+        code=viewer_request_code(settings, path_prefix),
+        publish=True)
+
+
+def function_environment(bucket_id: pulumi.Input[str], settings: ResizingSettings) -> Mapping[str, pulumi.Input[str]]:
+    """Environment of the resizer function (see the module docstring)."""
+    return {
+        "BUCKET": bucket_id,
+        "SOURCE_PREFIX": SOURCE_PREFIX,
+        "RESIZED_PREFIX": RESIZED_PREFIX,
+        "WIDTHS": ",".join(str(width) for width in settings.widths),
+        "FORMATS": ",".join(settings.formats),
+        "WRITE_BACK": "true" if settings.write_back else "false",
+    }
+
+
+def role_policy(bucket_arn: pulumi.Input[str], log_group_arn: str, write_back: bool) -> pulumi.Output[str]:
+    """Read the source thumbnails, write the variants and log."""
+    statements = [
+        policies.statement("logs:CreateLogGroup", log_group_arn),
+        policies.statement(["logs:CreateLogStream", "logs:PutLogEvents"], [f"{log_group_arn}:*"]),
+        policies.statement("s3:GetObject", pulumi.Output.concat(bucket_arn, "/", SOURCE_PREFIX, "*")),
+    ]
+    if write_back:
+        statements.append(policies.statement("s3:PutObject", pulumi.Output.concat(bucket_arn, "/", RESIZED_PREFIX, "*")))
+    return policies.policy_document(statements, limit=policies.INLINE_ROLE_POLICY_LIMIT)
+
+
+def function_url_domain(function_url: pulumi.Output[str]) -> pulumi.Output[str]:
+    """``<id>.lambda-url.<region>.on.aws`` from ``https://<id>.lambda-url.<region>.on.aws/``."""
+    return function_url.apply(lambda url: url.split("://", 1)[-1].rstrip("/"))
+
+
+def resizer_origin(origin_id: str,
+                   domain_name: pulumi.Input[str],
+                   origin_access_control_id: pulumi.Input[str],
+                   origin_path: str,
+                   settings: ResizingSettings,
+                   origin_shield: Optional[aws.cloudfront.DistributionOriginOriginShieldArgs] = None) -> aws.cloudfront.DistributionOriginArgs:
+    """The resizer function URL as a distribution origin.
+
+    ``origin_path`` makes the function see S3 keys: ``/thumbnail`` when the
+    distribution's paths start below it.
+    """
+    return aws.cloudfront.DistributionOriginArgs(
+        domain_name=domain_name,
+        origin_id=origin_id,
+        origin_path=origin_path,
+        origin_access_control_id=origin_access_control_id,
+        custom_origin_config=aws.cloudfront.DistributionOriginCustomOriginConfigArgs(
+            http_port=80,
+            https_port=443,
+            origin_protocol_policy="https-only",
+            origin_ssl_protocols=["TLSv1.2"],
+            origin_read_timeout=settings.sizing.timeout,
+        ),
+        origin_shield=origin_shield,
+    )
+
+
+def allow_distribution(resource_name: str,
+                       function: aws.lambda_.Function,
+                       distribution: aws.cloudfront.Distribution) -> List[aws.lambda_.Permission]:
+    """Let ``distribution`` invoke the function through its IAM-authenticated URL.
+
+    Origin Access Control needs both the function URL and the underlying
+    invoke permission.
+    """
+    return [
+        aws.lambda_.Permission(f"{resource_name}-invoke-url",
+            function=function.name,
+            action="lambda:InvokeFunctionUrl",
+            principal="cloudfront.amazonaws.com",
+            function_url_auth_type="AWS_IAM",
+            source_arn=distribution.arn),
+        aws.lambda_.Permission(f"{resource_name}-invoke",
+            function=function.name,
+            action="lambda:InvokeFunction",
+            principal="cloudfront.amazonaws.com",
+            invoked_via_function_url=True,
+            source_arn=distribution.arn),
+    ]
@@ -0,0 +1,177 @@
+"""Backlog-per-task autoscaling for the ECS workers that drain SQS queues.
+
+The transfer, ingest-proxy and transcoding queues have no Lambda consumer;
+they are drained by ECS services outside this program. The optional
+``workers`` config object points each queue at its service::
+
+    workers:
+      transcoding_start:
+        service: arn:aws:ecs:ap-south-1:909463554763:service/contido-workers/transcoder
+        min_tasks: 1
+        max_tasks: 20
+        target_latency_seconds: 300   # how long a new message may wait
+        seconds_per_message: 60       # average time one task spends on a message
+      transfer:
+        cluster: contido-workers      # required when service is a name
+        service: transfer-worker
+        max_tasks: 10
+        target_latency_seconds: 120
+        seconds_per_message: 30
+
+Each service gets a target-tracking policy on ``visible messages / running
+tasks`` (CloudWatch metric math). The target backlog per task is
+``target_latency_seconds / seconds_per_message``: with more messages queued
+per task than that, a new message would wait longer than the target.
+``RunningTaskCount`` comes from Container Insights, which must be enabled on
+the cluster.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional
+
+import pulumi
+import pulumi_aws as aws
+
+WORKER_QUEUES = ("transfer", "ingest_proxy", "transcoding_start")
+
+
+@dataclass(frozen=True)
+class WorkerScaling:
+    cluster: str
+    service: str
+    max_tasks: int
+    target_latency_seconds: int
+    seconds_per_message: int
+    min_tasks: int = 1
+    scale_in_cooldown: int = 300
+    scale_out_cooldown: int = 60
+
+    @property
+    def resource_id(self) -> str:
+        return f"service/{self.cluster}/{self.service}"
+
+    @property
+    def target_backlog_per_task(self) -> float:
+        return self.target_latency_seconds / self.seconds_per_message
+
+
+_KEYS = {
+    "cluster",
+    "service",
+    "min_tasks",
+    "max_tasks",
+    "target_latency_seconds",
+    "seconds_per_message",
+    "scale_in_cooldown",
+    "scale_out_cooldown",
+}
+
+
+def _require_int(name: str, value: Any, low: int) -> None:
+    if not isinstance(value, int) or isinstance(value, bool) or value < low:
+        raise ValueError(f"{name} must be an integer >= {low}, got {value!r}")
+
+
+def _parse_service(name: str, cluster: Optional[str], service: str) -> Dict[str, str]:
+    """Accept a service ARN (``...:service/<cluster>/<service>``) or a name."""
+    if service.startswith("arn:"):
+        resource = service.split(":", 5)[-1]
+        parts = resource.split("/")
+        if len(parts) != 3 or parts[0] != "service":
+            raise ValueError(f"{name}.service: {service!r} is not an ECS service ARN "
+                             "(arn:aws:ecs:<region>:<account>:service/<cluster>/<service>)")
+        if cluster and cluster != parts[1]:
+            raise ValueError(f"{name}.cluster {cluster!r} does not match the service ARN")
+        return {"cluster": parts[1], "service": parts[2]}
+    if not cluster:
+        raise ValueError(f"{name}.cluster is required when service is a name")
+    return {"cluster": cluster, "service": service}
+
+
+def parse_worker_scaling(raw: Optional[Mapping[str, Any]]) -> Dict[str, WorkerScaling]:
+    """Validate the ``workers`` config object, keyed by queue."""
+    scaling = {}
+    for queue, entry in (raw or {}).items():
+        name = f"workers.{queue}"
+        if queue not in WORKER_QUEUES:
+            raise ValueError(f"workers: {queue!r} is not a worker queue; expected one of {list(WORKER_QUEUES)}")
+        entry = dict(entry or {})
+        unknown = set(entry) - _KEYS
+        if unknown:
+            raise ValueError(f"{name}: unknown keys {sorted(unknown)}")
+        missing = {"service", "max_tasks", "target_latency_seconds", "seconds_per_message"} - set(entry)
+        if missing:
+            raise ValueError(f"{name}: missing {sorted(missing)}")
+
+        entry.update(_parse_service(name, entry.pop("cluster", None), entry.pop("service")))
+        settings = WorkerScaling(**entry)
+        _require_int(f"{name}.min_tasks", settings.min_tasks, 0)
+        _require_int(f"{name}.max_tasks", settings.max_tasks, max(settings.min_tasks, 1))
+        _require_int(f"{name}.target_latency_seconds", settings.target_latency_seconds, 1)
+        _require_int(f"{name}.seconds_per_message", settings.seconds_per_message, 1)
+        _require_int(f"{name}.scale_in_cooldown", settings.scale_in_cooldown, 0)
+        _require_int(f"{name}.scale_out_cooldown", settings.scale_out_cooldown, 0)
+        scaling[queue] = settings
+    return scaling
+
+
+def create_backlog_scaling(resource_name: str,
+                           queue: aws.sqs.Queue,
+                           settings: WorkerScaling,
+                           tags: Mapping[str, str]) -> aws.appautoscaling.Policy:
+    """Scalable target on the ECS service plus its backlog-per-task policy."""
+    target = aws.appautoscaling.Target(f"{resource_name}-worker-target",
+        service_namespace="ecs",
+        scalable_dimension="ecs:service:DesiredCount",
+        resource_id=settings.resource_id,
+        min_capacity=settings.min_tasks,
+        max_capacity=settings.max_tasks,
+        tags=tags)
+
+    def metric(metric_id: str, namespace: str, metric_name: str, dimensions: Mapping[str, pulumi.Input[str]],
+               stat: str) -> aws.appautoscaling.PolicyTargetTrackingScalingPolicyConfigurationCustomizedMetricSpecificationMetricArgs:
+        return aws.appautoscaling.PolicyTargetTrackingScalingPolicyConfigurationCustomizedMetricSpecificationMetricArgs(
+            id=metric_id,
+            return_data=False,
+            metric_stat=aws.appautoscaling.PolicyTargetTrackingScalingPolicyConfigurationCustomizedMetricSpecificationMetricMetricStatArgs(
+                stat=stat,
+                metric=aws.appautoscaling.PolicyTargetTrackingScalingPolicyConfigurationCustomizedMetricSpecificationMetricMetricStatMetricArgs(
+                    namespace=namespace,
+                    metric_name=metric_name,
+                    dimensions=[
+                        aws.appautoscaling.PolicyTargetTrackingScalingPolicyConfigurationCustomizedMetricSpecificationMetricMetricStatMetricDimensionArgs(
+                            name=name,
+                            value=value,
+                        ) for name, value in dimensions.items()
+                    ],
+                ),
+            ),
+        )
+
+    return aws.appautoscaling.Policy(f"{resource_name}-worker-backlog-scaling",
+        policy_type="TargetTrackingScaling",
+        service_namespace=target.service_namespace,
+        scalable_dimension=target.scalable_dimension,
+        resource_id=target.resource_id,
+        target_tracking_scaling_policy_configuration=aws.appautoscaling.PolicyTargetTrackingScalingPolicyConfigurationArgs(
+            target_value=settings.target_backlog_per_task,
+            scale_in_cooldown=settings.scale_in_cooldown,
+            scale_out_cooldown=settings.scale_out_cooldown,
+            customized_metric_specification=aws.appautoscaling.PolicyTargetTrackingScalingPolicyConfigurationCustomizedMetricSpecificationArgs(
+                metrics=[
+                    metric("visible", "AWS/SQS", "ApproximateNumberOfMessagesVisible",
+                           {"QueueName": queue.name}, "Sum"),
+                    metric("tasks", "ECS/ContainerInsights", "RunningTaskCount",
+                           {"ClusterName": settings.cluster, "ServiceName": settings.service}, "Average"),
+                    aws.appautoscaling.PolicyTargetTrackingScalingPolicyConfigurationCustomizedMetricSpecificationMetricArgs(
+                        id="backlog_per_task",
+                        label="Visible messages per running task",
+                        # With no running tasks, treat the whole backlog as one task's share.
+                        expression="visible / IF(tasks > 0, tasks, 1)",
+                        return_data=True,
+                    ),
+                ],
+            ),
+        ))
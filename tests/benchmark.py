@@ -0,0 +1,155 @@
+"""Time program evaluation under mocks for 1, 10 and 100 client stacks.
+
+    python -m tests.benchmark                     # writes bench_output.txt
+    python -m tests.benchmark --sizes 1 10 --output /tmp/bench.txt
+
+Each simulated client is a full evaluation of ``__main__.py`` with its own
+config (a mix of dev-like and prod-like stacks, see ``client_config``). The
+report lists wall time, time per stack and registered resources per batch
+size, so a change that slows the program down or changes its resource graph
+shows up without AWS credentials or a backend.
+
+Subsystems are only imported when a stack enables them (see
+``contido.subsystems``), so the report also times a first evaluation in a
+fresh interpreter, as ``pulumi preview`` runs it, with the CDN and Lambda
+subsystems switched off in turn.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from importlib import metadata
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from contido import settings
+from tests.harness import PROJECT_DIR, run_program
+
+SIZES = (1, 10, 100)
+COLD_RUNS = 3
+
+# Evaluates one stack in a fresh interpreter and prints the seconds taken,
+# imports included.
+_COLD_START = """
+import json, sys, time
+started = time.perf_counter()
+from tests.harness import run_program
+resources = len(run_program(json.loads(sys.argv[1])))
+print(time.perf_counter() - started, resources)
+"""
+
+
+def client_config(index: int) -> Dict[str, Any]:
+    """Deterministic config for simulated client ``index``."""
+    config: Dict[str, Any] = {
+        "client": f"client{index:03d}",
+        "env": "prod" if index % 2 else "dev",
+        "aws:region": "ap-south-1",
+        "account_id": "909463554763",
+    }
+    if index % 2:
+        config.update({
+            "image_uri_sync": "909463554763.dkr.ecr.ap-south-1.amazonaws.com/sync-service:1.4.0",
+            "image_uri_ingest": "909463554763.dkr.ecr.ap-south-1.amazonaws.com/ingest-service:1.4.0",
+            "r53_zone_id": "Z0123456789ABCDEFGHIJ",
+            "sync_deployment": {"publish": True, "provisioned_concurrency": 1},
+            "cdn_monitoring": {},
+        })
+    if index % 3 == 0:
+        config["cdn"] = {"origin_access": "oac", "mam_mode": "unified"}
+    if index % 5 == 0:
+        config["queues"] = {"sync_service": {"fifo": True}}
+    return config
+
+
+def cold_start_configs() -> Dict[str, Dict[str, Any]]:
+    """Prod-like config with the optional subsystems switched off in turn."""
+    full = client_config(1)
+    no_lambda = {key: value for key, value in full.items() if not key.startswith("image_uri_")}
+    no_cdn = {**{key: value for key, value in full.items() if key != "cdn_monitoring"}, "cdn": {"enabled": False}}
+    return {
+        "all subsystems": full,
+        "no Lambda": no_lambda,
+        "no CDN": no_cdn,
+        "no CDN or Lambda": {key: value for key, value in no_cdn.items() if not key.startswith("image_uri_")},
+    }
+
+
+def _cold_start(config: Mapping[str, Any]) -> Tuple[float, int]:
+    output = subprocess.run([sys.executable, "-c", _COLD_START, json.dumps(config)],
+                            cwd=PROJECT_DIR, check=True, capture_output=True, text=True).stdout
+    seconds, resources = output.split()[-2:]
+    return float(seconds), int(resources)
+
+
+def _time_batch(size: int) -> Dict[str, Any]:
+    durations: List[float] = []
+    validations: List[float] = []
+    resources = 0
+    for index in range(size):
+        config = client_config(index)
+        started = time.perf_counter()
+        settings.load_settings(config)
+        validations.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        resources += len(run_program(config, stack=config["env"]))
+        durations.append(time.perf_counter() - started)
+    return {
+        "size": size,
+        "total": sum(durations),
+        "mean": statistics.mean(durations),
+        "max": max(durations),
+        "validation": statistics.mean(validations),
+        "resources": resources,
+    }
+
+
+def run(sizes: Iterable[int]) -> str:
+    # The first evaluation pays for importing pulumi_aws; keep it out of the batches.
+    started = time.perf_counter()
+    warmup = len(run_program(client_config(0)))
+    first = time.perf_counter() - started
+
+    lines = [
+        "Program evaluation under Pulumi mocks",
+        f"python {platform.python_version()}, pulumi {metadata.version('pulumi')}, "
+        f"pulumi-aws {metadata.version('pulumi-aws')}, {platform.machine()}",
+        f"first evaluation (imports): {first:.2f} s, {warmup} resources",
+        "",
+        f"{'stacks':>6}  {'total s':>8}  {'ms/stack':>8}  {'max ms':>7}  {'validate ms':>11}  {'resources':>9}  {'res/s':>7}",
+    ]
+    for size in sizes:
+        batch = _time_batch(size)
+        lines.append(
+            f"{batch['size']:>6}  {batch['total']:>8.2f}  {batch['mean'] * 1000:>8.1f}  {batch['max'] * 1000:>7.1f}  "
+            f"{batch['validation'] * 1000:>11.2f}  {batch['resources']:>9}  {batch['resources'] / batch['total']:>7.0f}")
+
+    lines += ["", f"First evaluation in a fresh interpreter (median of {COLD_RUNS})", "",
+              f"{'stack':<18}  {'seconds':>7}  {'resources':>9}"]
+    for label, config in cold_start_configs().items():
+        runs = [_cold_start(config) for _ in range(COLD_RUNS)]
+        lines.append(f"{label:<18}  {statistics.median(seconds for seconds, _ in runs):>7.2f}  {runs[0][1]:>9}")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="Stacks per batch")
+    parser.add_argument("--output", default=os.path.join(PROJECT_DIR, "bench_output.txt"),
+                        help="Report file")
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes)
+    with open(args.output, "w") as handle:
+        handle.write(report)
+    print(report, end="")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
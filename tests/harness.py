@@ -0,0 +1,165 @@
+"""Evaluate ``__main__.py`` in-process under Pulumi mocks.
+
+``run_program`` registers every resource against a mock monitor instead of
+AWS, so a full evaluation needs no credentials, backend or network and
+takes well under a second. Each run gets a fresh ``contextvars`` context,
+so many stacks can be evaluated one after another in the same process.
+"""
+
+import contextvars
+import json
+import os
+import runpy
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import pulumi
+import yaml
+from pulumi.runtime.mocks import MockMonitor
+from pulumi.runtime.stack import wait_for_rpcs
+from pulumi.runtime.sync_await import _sync_await
+
+PROJECT = "contido-infra-pulumi"
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROGRAM = os.path.join(PROJECT_DIR, "__main__.py")
+
+# Output properties the program reads from resources it created.
+_OUTPUTS = (
+    "bucket",
+    "bucket_regional_domain_name",
+    "cloudfront_access_identity_path",
+    "domain_name",
+    "function_url",
+    "hosted_zone_id",
+    "iam_arn",
+    "invoke_arn",
+    "qualified_arn",
+    "version",
+)
+
+
+@dataclass
+class Resource:
+    type: str
+    name: str
+    inputs: Dict[str, Any]
+    dependencies: List[str] = field(default_factory=list)
+    # Name of the parent resource (the stack's name at the root)
+    parent: str = ""
+    # URNs of the root-level aliases (see _root_aliases)
+    aliases: List[str] = field(default_factory=list)
+
+
+@dataclass
+class Deployment:
+    # Keyed by (type, name): a component and its child may share a name.
+    resources: Dict[Tuple[str, str], Resource] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.resources)
+
+    def __getitem__(self, name: str) -> Resource:
+        matches = [resource for (_, resource_name), resource in self.resources.items() if resource_name == name]
+        if len(matches) != 1:
+            raise KeyError(f"{len(matches)} resources named {name!r}")
+        return matches[0]
+
+    def __contains__(self, name: str) -> bool:
+        return any(resource_name == name for _, resource_name in self.resources)
+
+    def get(self, type_: str, name: str) -> Resource:
+        return self.resources[(type_, name)]
+
+    def of_type(self, type_: str) -> List[Resource]:
+        return [resource for resource in self.resources.values() if resource.type == type_]
+
+    def depends_on(self, name: str, dependency: str) -> bool:
+        return dependency in self[name].dependencies
+
+
+class _Mocks(pulumi.runtime.Mocks):
+    def __init__(self, deployment: Deployment, stack_outputs: Mapping[str, Mapping[str, Any]]) -> None:
+        self.deployment = deployment
+        self.stack_outputs = stack_outputs
+
+    def new_resource(self, args: pulumi.runtime.MockResourceArgs) -> Tuple[str, Dict[str, Any]]:
+        self.deployment.resources[(args.typ, args.name)] = Resource(args.typ, args.name, args.inputs)
+        if args.typ == "pulumi:pulumi:StackReference":
+            stack_name = args.inputs["name"]
+            return stack_name, {"name": stack_name, "outputs": dict(self.stack_outputs.get(stack_name, {}))}
+        outputs = dict(args.inputs)
+        outputs.setdefault("arn", f"arn:aws:mock:::{args.name}")
+        outputs.setdefault("name", args.name)
+        outputs.setdefault("url", f"https://sqs.mock/{args.name}")
+        for output in _OUTPUTS:
+            outputs.setdefault(output, f"{output}-{args.name}")
+        return f"{args.name}-id", outputs
+
+    def call(self, args: pulumi.runtime.MockCallArgs) -> Dict[str, Any]:
+        return {}
+
+
+def _root_aliases(request: Any) -> List[str]:
+    # Only aliases moving a resource to the stack root are resolved; the
+    # type-only aliases pulumi-aws adds for renamed types are skipped.
+    stack_part, project = request.parent.split("::")[:2]
+    stack = stack_part.rsplit(":", 1)[-1]
+    return [f"urn:pulumi:{alias.spec.stack or stack}::{alias.spec.project or project}::"
+            f"{alias.spec.type or request.type}::{alias.spec.name or request.name}"
+            for alias in request.aliases if alias.spec.noParent]
+
+
+class _Monitor(MockMonitor):
+    """Mock monitor that also records each resource's dependencies, parent and root aliases."""
+
+    def __init__(self, mocks: _Mocks) -> None:
+        super().__init__(mocks)
+        self.deployment = mocks.deployment
+
+    def RegisterResource(self, request: Any) -> Any:
+        response = super().RegisterResource(request)
+        resource = self.deployment.resources.get((request.type, request.name))
+        if resource:
+            resource.dependencies = sorted(
+                urn.rsplit("::", 1)[-1] for urn in request.dependencies)
+            resource.parent = request.parent.rsplit("::", 1)[-1]
+            resource.aliases = _root_aliases(request) if request.parent else []
+        return response
+
+
+def stack_file_config(stack: str) -> Dict[str, Any]:
+    """The ``config:`` block of ``Pulumi.<stack>.yaml``."""
+    with open(os.path.join(PROJECT_DIR, f"Pulumi.{stack}.yaml")) as handle:
+        return dict((yaml.safe_load(handle) or {}).get("config") or {})
+
+
+def _qualified(config: Mapping[str, Any]) -> Dict[str, str]:
+    # Config reaches a program as strings, objects as JSON.
+    return {
+        key if ":" in key else f"{PROJECT}:{key}": value if isinstance(value, str) else json.dumps(value)
+        for key, value in config.items()
+    }
+
+
+def _run(config: Mapping[str, Any], stack: str, preview: bool,
+         stack_outputs: Mapping[str, Mapping[str, Any]]) -> Deployment:
+    deployment = Deployment()
+    mocks = _Mocks(deployment, stack_outputs)
+    pulumi.runtime.set_all_config(_qualified(config))
+    pulumi.runtime.set_mocks(mocks, project=PROJECT, stack=stack, preview=preview, monitor=_Monitor(mocks))
+    try:
+        runpy.run_path(PROGRAM, run_name="__main__")
+    finally:
+        _sync_await(wait_for_rpcs())
+    return deployment
+
+
+def run_program(config: Mapping[str, Any], stack: str = "dev", preview: bool = False,
+                stack_outputs: Optional[Mapping[str, Mapping[str, Any]]] = None) -> Deployment:
+    """Evaluate the program with ``config`` (bare or namespaced keys).
+
+    ``stack_outputs`` maps a stack name to the outputs a ``StackReference``
+    to it reads.
+    """
+    os.environ.pop("PULUMI_CONFIG", None)
+    return contextvars.Context().run(_run, config, stack, preview, stack_outputs or {})
@@ -0,0 +1,84 @@
+"""ContidoBucket children against the root-level buckets of the baseline program."""
+
+import pytest
+
+from contido import settings
+from tests.harness import PROJECT, run_program, stack_file_config
+
+TAGS = {"application": "contido", "product": "contido_webapp", "client": "my-client", "iac": "pulumi"}
+ENCRYPTION = {"rules": [{"applyServerSideEncryptionByDefault": {"sseAlgorithm": "AES256"}}]}
+CORS = {"corsRules": [{"allowedHeaders": ["*"], "allowedMethods": ["HEAD", "GET", "PUT", "POST"],
+                       "allowedOrigins": ["*"], "exposeHeaders": []}]}
+PUBLIC_ACCESS = {"blockPublicAcls": True, "blockPublicPolicy": True, "ignorePublicAcls": True,
+                 "restrictPublicBuckets": True}
+VERSIONING = {"versioningConfiguration": {"status": "Enabled"}}
+
+_BUCKET = "aws:s3/bucket:Bucket"
+_ENCRYPTION = "aws:s3/bucketServerSideEncryptionConfiguration:BucketServerSideEncryptionConfiguration"
+_CORS = "aws:s3/bucketCorsConfiguration:BucketCorsConfiguration"
+_VERSIONING = "aws:s3/bucketVersioningV2:BucketVersioningV2"
+_PUBLIC_ACCESS = "aws:s3/bucketPublicAccessBlock:BucketPublicAccessBlock"
+_OWNERSHIP = "aws:s3/bucketOwnershipControls:BucketOwnershipControls"
+
+
+def _ownership(object_ownership):
+    return {"rule": {"objectOwnership": object_ownership}}
+
+
+# The bucket resources of the baseline __main__.py, in declaration order. The
+# only input that differs is the encryption ``rule=``, which never evaluated
+# against pulumi-aws v7 and became ``rules=[...]``.
+BASELINE = {
+    "upload": [(_ENCRYPTION, "encryption", ENCRYPTION), (_CORS, "cors", CORS),
+               (_PUBLIC_ACCESS, "public-access", PUBLIC_ACCESS),
+               (_OWNERSHIP, "ownership", _ownership("BucketOwnerEnforced"))],
+    "mam": [(_ENCRYPTION, "encryption", ENCRYPTION), (_CORS, "cors", CORS),
+            (_PUBLIC_ACCESS, "public-access", PUBLIC_ACCESS),
+            (_OWNERSHIP, "ownership", _ownership("BucketOwnerEnforced"))],
+    "asset": [(_ENCRYPTION, "encryption", ENCRYPTION), (_CORS, "cors", CORS),
+              (_PUBLIC_ACCESS, "public-access", PUBLIC_ACCESS),
+              (_OWNERSHIP, "ownership", _ownership("BucketOwnerEnforced"))],
+    "archive": [(_ENCRYPTION, "encryption", ENCRYPTION), (_VERSIONING, "versioning", VERSIONING),
+                (_PUBLIC_ACCESS, "public-access", PUBLIC_ACCESS),
+                (_OWNERSHIP, "ownership", _ownership("ObjectWriter"))],
+    "edit": [(_ENCRYPTION, "encryption", ENCRYPTION),
+             (_PUBLIC_ACCESS, "public-access", PUBLIC_ACCESS),
+             (_OWNERSHIP, "ownership", _ownership("BucketOwnerEnforced"))],
+}
+
+
+@pytest.fixture(scope="module", params=["dev", "prod"])
+def stack(request):
+    return request.param, run_program(stack_file_config(request.param), stack=request.param)
+
+
+def _root_urn(stack_name, type_, name):
+    return f"urn:pulumi:{stack_name}::{PROJECT}::{type_}::{name}"
+
+
+def test_baseline_children_keep_names_inputs_and_root_urns(stack):
+    stack_name, deployment = stack
+    assert sorted(BASELINE) == sorted(settings.BUCKETS)
+    for key, children in BASELINE.items():
+        bucket = deployment.get(_BUCKET, f"{key}-bucket")
+        assert bucket.inputs == {"bucket": f"contido-my-client-{key}-{stack_name}",
+                                 "tags": {**TAGS, "environment": stack_name}}
+        for type_, suffix, inputs in [(_BUCKET, "bucket", bucket.inputs)] + children:
+            name = f"{key}-{suffix}"
+            child = deployment.get(type_, name)
+            assert child.parent == key, name
+            assert child.aliases == [_root_urn(stack_name, type_, name)], name
+            if type_ != _BUCKET:
+                assert child.inputs == {"bucket": f"{key}-bucket-id", **inputs}, name
+
+
+def test_every_child_moves_from_the_root(stack):
+    stack_name, deployment = stack
+    components = {resource.name for resource in deployment.of_type("contido:storage:Bucket")}
+    assert components == set(settings.BUCKETS)
+    children = [resource for resource in deployment.resources.values() if resource.parent in components]
+    # Lifecycle rules and the upload notification come on top of the baseline.
+    assert {"upload-lifecycle", "upload-notification"} <= {child.name for child in children}
+    for child in children:
+        assert child.aliases == [_root_urn(stack_name, child.type, child.name)], child.name
+        assert child.name.startswith(f"{child.parent}-")
@@ -0,0 +1,193 @@
+"""Multi-stack fan-out: scheduling, summary and the per-stack workspace."""
+
+import os
+import threading
+import time
+
+import pytest
+import yaml
+from pulumi import automation as auto
+
+from contido import fanout
+from tests.harness import PROJECT, PROJECT_DIR
+
+SPECS = [fanout.StackSpec(name, {"client": name, "env": "dev"}) for name in ("a", "b", "c", "d", "e", "f")]
+
+
+class StubRunner:
+    """Stands in for ``run_stack``: records calls and the stacks in flight."""
+
+    def __init__(self, fail=(), raise_for=(), barrier=None):
+        self.fail = set(fail)
+        self.raise_for = set(raise_for)
+        self.barrier = barrier
+        self.started = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, spec, operation, log_path, backend_url):
+        with self._lock:
+            self.started.append(spec.name)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.barrier and len(self.started) <= self.barrier.parties:
+                self.barrier.wait(timeout=5)
+            time.sleep(0.01)
+            if spec.name in self.raise_for:
+                raise RuntimeError("pulumi CLI not found")
+            if spec.name in self.fail:
+                return fanout.StackResult(spec.name, "failed", 1.0, "error: update failed", log_path)
+            return fanout.StackResult(spec.name, "succeeded", 2.5, f"{operation}: create=3", log_path)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def test_worker_pool_is_bounded(tmp_path):
+    runner = StubRunner(barrier=threading.Barrier(3))
+    results = fanout.fan_out(SPECS, "preview", str(tmp_path), workers=3, runner=runner)
+    assert runner.max_in_flight == 3
+    assert [result.name for result in results] == [spec.name for spec in SPECS]
+    assert {result.status for result in results} == {"succeeded"}
+    assert results[0].log_path == os.path.join(str(tmp_path), "a.log")
+
+
+def test_fail_fast_skips_stacks_not_yet_started(tmp_path):
+    runner = StubRunner(fail={"b"})
+    results = fanout.fan_out(SPECS, "up", str(tmp_path), workers=1, fail_fast=True, runner=runner)
+    assert runner.started == ["a", "b"]
+    assert [result.status for result in results] == ["succeeded", "failed"] + ["skipped"] * 4
+    assert results[2].summary == "not started after an earlier failure"
+
+
+def test_continue_on_error_runs_every_stack(tmp_path):
+    runner = StubRunner(fail={"b"}, raise_for={"d"})
+    results = fanout.fan_out(SPECS, "up", str(tmp_path), workers=2, runner=runner)
+    assert sorted(runner.started) == [spec.name for spec in SPECS]
+    assert [result.status for result in results] == [
+        "succeeded", "failed", "succeeded", "failed", "succeeded", "succeeded"]
+    assert results[3].summary == "pulumi CLI not found"
+
+
+@pytest.mark.parametrize("kwargs", [{"operation": "destroy"}, {"workers": 0}])
+def test_invalid_arguments(tmp_path, kwargs):
+    with pytest.raises(ValueError):
+        fanout.fan_out(SPECS, **{"operation": "preview", "log_dir": str(tmp_path), "runner": StubRunner(), **kwargs})
+
+
+def test_summary_table():
+    results = [
+        fanout.StackResult("acme-prod", "succeeded", 12.34, "create=3, same=40"),
+        fanout.StackResult("globex-dev", "failed", 1.0, "error: update failed"),
+        fanout.StackResult("initech-dev", "skipped"),
+    ]
+    assert fanout.format_summary(results) == "\n".join([
+        "STACK        STATUS     SECONDS  CHANGES",
+        "acme-prod    succeeded     12.3  create=3, same=40",
+        "globex-dev   failed         1.0  error: update failed",
+        "initech-dev  skipped        0.0",
+    ])
+
+
+def test_manifest_merges_defaults(tmp_path):
+    path = tmp_path / "clients.yaml"
+    path.write_text(yaml.safe_dump({
+        "backend_url": "file://./.state",
+        "defaults": {"aws:region": "ap-south-1", "batch_size": 1},
+        "stacks": [{"name": "acme-prod", "config": {"client": "acme", "batch_size": 25}}],
+    }))
+    manifest = fanout.load_manifest(str(path))
+    # Relative to the manifest, not to the temporary workspaces.
+    assert manifest.backend_url == f"file://{tmp_path}/.state"
+    assert manifest.stacks == [
+        fanout.StackSpec("acme-prod", {"aws:region": "ap-south-1", "batch_size": 25, "client": "acme"})]
+
+    path.write_text(yaml.safe_dump({"stacks": [{"name": "a"}, {"name": "a"}]}))
+    with pytest.raises(ValueError, match="duplicate stack 'a'"):
+        fanout.load_manifest(str(path))
+
+
+def test_stacks_run_outside_the_repo():
+    with fanout.isolated_workspace("acme-prod") as (work_dir, settings):
+        assert os.path.commonpath([work_dir, PROJECT_DIR]) != PROJECT_DIR
+        program = os.path.join(work_dir, settings.main)
+        assert os.path.realpath(program) == os.path.realpath(PROJECT_DIR)
+        assert os.path.isfile(os.path.join(program, "__main__.py"))
+        assert (settings.name, settings.runtime) == (PROJECT, "python")
+    assert not os.path.exists(work_dir)
+
+
+def test_relative_virtualenv_points_back_at_the_program(tmp_path):
+    (tmp_path / "Pulumi.yaml").write_text(yaml.safe_dump({
+        "name": "contido-infra-pulumi",
+        "main": "src",
+        "runtime": {"name": "python", "options": {"virtualenv": "venv"}},
+    }))
+    settings = fanout.project_settings(str(tmp_path))
+    assert settings.main == os.path.join(fanout.PROGRAM_LINK, "src")
+    assert settings.runtime.options == {"virtualenv": str(tmp_path / "venv")}
+
+
+@pytest.mark.parametrize("backend_url, expected", [
+    ("file://./.state", "file:///work/clients/.state"),
+    ("file://../state?no_legacy_layout=1", "file:///work/state?no_legacy_layout=1"),
+    ("file:///var/pulumi", "file:///var/pulumi"),
+    ("file://~/.pulumi-local", f"file://{os.path.expanduser('~')}/.pulumi-local"),
+    ("s3://contido-pulumi-state", "s3://contido-pulumi-state"),
+    (None, None),
+])
+def test_relative_file_backends_are_made_absolute(backend_url, expected):
+    assert fanout.absolute_backend_url(backend_url, "/work/clients") == expected
+
+
+def test_backend_url_flag_is_relative_to_the_current_directory(tmp_path, monkeypatch):
+    manifest_dir = tmp_path / "manifests"
+    manifest_dir.mkdir()
+    (manifest_dir / "clients.yaml").write_text(yaml.safe_dump({
+        "backend_url": "file://./.state", "stacks": [{"name": "acme-prod"}]}))
+    calls = []
+    monkeypatch.setattr(fanout, "fan_out", lambda specs, operation, log_dir, **kwargs: calls.append(kwargs) or [])
+    monkeypatch.chdir(tmp_path)
+
+    fanout.main([str(manifest_dir / "clients.yaml"), "preview"])
+    fanout.main(["manifests/clients.yaml", "preview", "--backend-url", "file://./cli-state"])
+    assert [call["backend_url"] for call in calls] == [
+        f"file://{manifest_dir}/.state", f"file://{tmp_path}/cli-state"]
+
+
+class _RecordingStack:
+    def __init__(self):
+        self.config = None
+
+    def set_all_config(self, config):
+        self.config = {key: value.value for key, value in config.items()}
+
+    def preview(self, on_output):
+        on_output("Previewing update (acme-prod)")
+        return type("PreviewResult", (), {"change_summary": {auto.OpType.CREATE: 3, auto.OpType.SAME: 40}})()
+
+
+def test_run_stack_keeps_file_state_outside_the_workspace(tmp_path, monkeypatch):
+    stack = _RecordingStack()
+    workspaces = []
+
+    def create_or_select_stack(stack_name, work_dir, opts):
+        workspaces.append((stack_name, work_dir, opts))
+        return stack
+
+    monkeypatch.setattr(auto, "create_or_select_stack", create_or_select_stack)
+    monkeypatch.chdir(tmp_path)
+    spec = fanout.StackSpec("acme-prod", {"client": "acme", "batch_size": 25})
+    result = fanout.run_stack(spec, "preview", str(tmp_path / "acme-prod.log"), backend_url="file://./.state")
+
+    assert (result.status, result.summary) == ("succeeded", "create=3, same=40")
+    [(stack_name, work_dir, opts)] = workspaces
+    assert stack_name == "acme-prod"
+    assert opts.env_vars == {"PULUMI_BACKEND_URL": f"file://{tmp_path}/.state"}
+    assert opts.project_settings.main == fanout.PROGRAM_LINK
+    assert os.path.commonpath([work_dir, str(tmp_path)]) != str(tmp_path)
+    assert not os.path.exists(work_dir)
+    assert stack.config == {"client": "acme", "batch_size": "25"}
+    assert (tmp_path / "acme-prod.log").read_text() == "Previewing update (acme-prod)\n"
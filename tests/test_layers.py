@@ -0,0 +1,119 @@
+"""Base, edge and compute layer stacks and the single-stack migration."""
+
+import pytest
+
+from contido import layers, settings
+from tests.harness import run_program
+from tests.test_program import PROD_CONFIG
+
+BASE_STACK = "acme/contido-infra-pulumi/prod"
+
+# The `base` output of a deployed base stack
+BASE_OUTPUT = {
+    "buckets": {
+        key: {
+            "id": f"contido-my-client-{key}-prod",
+            "arn": f"arn:aws:s3:::contido-my-client-{key}-prod",
+            "bucket_regional_domain_name": f"contido-my-client-{key}-prod.s3.ap-south-1.amazonaws.com",
+        }
+        for key in settings.BUCKETS
+    },
+    "role_arn": "arn:aws:iam::909463554763:role/contido-my-client-prod-backend-common-role",
+    "queue_arns": {key: f"arn:aws:sqs:ap-south-1:909463554763:{key}" for key in settings.QUEUE_PROFILES},
+    "alarm_topic_arn": "arn:aws:sns:ap-south-1:909463554763:contido-my-client-prod-alarms",
+}
+
+
+def _run_layer(name):
+    layer = {"name": name} if name == "base" else {"name": name, "base_stack": BASE_STACK}
+    return run_program({**PROD_CONFIG, "layer": layer}, stack=f"prod-{name}",
+                       stack_outputs={BASE_STACK: {layers.BASE_OUTPUT: BASE_OUTPUT}})
+
+
+@pytest.fixture(scope="module")
+def stacks():
+    return {name: _run_layer(name) for name in layers.LAYERS}
+
+
+@pytest.fixture(scope="module")
+def single():
+    return run_program(PROD_CONFIG, stack="prod")
+
+
+def test_layers_partition_the_single_stack(stacks, single):
+    layered = [key for deployment in stacks.values() for key in deployment.resources
+               if key[0] != "pulumi:pulumi:StackReference"]
+    assert len(layered) == len(set(layered))
+    assert set(layered) - set(single.resources) == {("aws:cloudwatch/dashboard:Dashboard", "compute-dashboard")}
+    assert set(single.resources) <= set(layered)
+
+
+def test_edge_layer_reads_base_buckets(stacks):
+    edge = stacks["edge"]
+    assert len(edge.of_type("aws:cloudfront/distribution:Distribution")) == 3
+    assert edge["mam-bucket-policy"].inputs["bucket"] == "contido-my-client-mam-prod"
+    origin = edge["mam-proxy-cdn"].inputs["origins"][0]
+    assert origin["domainName"] == "contido-my-client-mam-prod.s3.ap-south-1.amazonaws.com"
+    assert not edge.of_type("aws:sqs/queue:Queue")
+
+
+def test_compute_layer_reads_base_role_and_queues(stacks):
+    compute = stacks["compute"]
+    assert compute["sync-service"].inputs["role"] == BASE_OUTPUT["role_arn"]
+    assert compute["sync-service-event"].inputs["eventSourceArn"] == BASE_OUTPUT["queue_arns"]["sync_service"]
+    assert compute["sync-service-duration-alarm"].inputs["alarmActions"] == [BASE_OUTPUT["alarm_topic_arn"]]
+    assert compute["compute-dashboard"].inputs["dashboardName"] == "contido-my-client-prod-compute"
+    assert not compute.of_type("aws:sns/topic:Topic")
+    assert not compute.of_type("aws:cloudfront/distribution:Distribution")
+
+
+def test_base_layer_keeps_queue_alarms_only(stacks):
+    base = stacks["base"]
+    assert "upload-queue-age-alarm" in base
+    assert "sync-service-duration-alarm" not in base
+    assert not base.of_type("aws:lambda/function:Function")
+
+
+def test_edge_layer_monitors_the_thumbnail_resizer():
+    resizing = {"image_uri": "909463554763.dkr.ecr.ap-south-1.amazonaws.com/thumbnail-resizer:1.0.0"}
+    edge = run_program({**PROD_CONFIG, "layer": {"name": "edge", "base_stack": BASE_STACK},
+                        "thumbnail_resizing": resizing}, stack="prod-edge",
+                       stack_outputs={BASE_STACK: {layers.BASE_OUTPUT: BASE_OUTPUT}})
+    assert edge["thumbnail-resizer-throttles-alarm"].inputs["alarmActions"] == [BASE_OUTPUT["alarm_topic_arn"]]
+    assert edge["edge-dashboard"].inputs["dashboardName"] == "contido-my-client-prod-edge"
+    assert not edge.of_type("aws:sns/topic:Topic")
+
+
+def test_moved_urns():
+    source = [
+        "urn:pulumi:prod::contido-infra-pulumi::pulumi:pulumi:Stack::contido-infra-pulumi-prod",
+        "urn:pulumi:prod::contido-infra-pulumi::pulumi:providers:aws::default_7_50_0",
+        "urn:pulumi:prod::contido-infra-pulumi::aws:cloudfront/distribution:Distribution::asset-cdn",
+        "urn:pulumi:prod::contido-infra-pulumi::aws:s3/bucketPolicy:BucketPolicy::asset-bucket-policy",
+        "urn:pulumi:prod::contido-infra-pulumi::aws:sqs/queue:Queue::upload-queue",
+    ]
+    preview = {"steps": [
+        {"op": "create", "urn": "urn:pulumi:prod-edge::contido-infra-pulumi::pulumi:pulumi:Stack::contido-infra-pulumi-prod-edge"},
+        {"op": "create", "urn": "urn:pulumi:prod-edge::contido-infra-pulumi::pulumi:providers:aws::default_7_50_0"},
+        {"op": "create", "urn": "urn:pulumi:prod-edge::contido-infra-pulumi::pulumi:pulumi:StackReference::base"},
+        {"op": "create", "urn": "urn:pulumi:prod-edge::contido-infra-pulumi::aws:cloudfront/distribution:Distribution::asset-cdn"},
+        {"op": "create", "urn": "urn:pulumi:prod-edge::contido-infra-pulumi::aws:s3/bucketPolicy:BucketPolicy::asset-bucket-policy"},
+        {"op": "create", "urn": "urn:pulumi:prod-edge::contido-infra-pulumi::aws:route53/record:Record::asset-record"},
+    ]}
+    assert layers.moved_urns(preview, source) == [
+        "urn:pulumi:prod::contido-infra-pulumi::aws:cloudfront/distribution:Distribution::asset-cdn",
+        "urn:pulumi:prod::contido-infra-pulumi::aws:s3/bucketPolicy:BucketPolicy::asset-bucket-policy",
+    ]
+
+
+@pytest.mark.parametrize("step", [
+    {"op": "create"},
+    {"op": "create", "urn": None},
+    {"op": "create", "urn": "urn:pulumi:prod-edge"},
+    {"op": "create", "urn": "urn:pulumi:prod-edge::contido-infra-pulumi"},
+    {"op": "create", "urn": "not-a-urn"},
+])
+def test_moved_urns_skips_steps_without_a_resource_urn(step):
+    source = ["urn:pulumi:prod::contido-infra-pulumi::aws:cloudfront/distribution:Distribution::asset-cdn"]
+    preview = {"steps": [step, {"op": "create", "urn": source[0].replace("prod::", "prod-edge::", 1)}]}
+    assert layers.moved_urns(preview, source) == source
@@ -0,0 +1,96 @@
+"""Policy builder, and byte-for-byte equivalence with the hand-written policies it replaced."""
+
+import pytest
+
+from contido import policies
+from tests.harness import run_program
+
+CONFIG = {"client": "acme", "env": "dev", "aws:region": "ap-south-1", "account_id": "123456789012"}
+
+# The documents the program rendered with Output.concat before the builder,
+# under the same mock ARNs.
+HAND_WRITTEN = [
+    (("aws:iam/policy:Policy", "aspera-upload-access"), "policy",
+     '{"Version":"2012-10-17","Statement":[{"Effect":"Allow","Action":["s3:ListBucket","s3:ListBucketMultipartUploads"],"Resource":"arn:aws:s3:::contido-acme-upload-dev"},{"Effect":"Allow","Action":["s3:GetObject","s3:PutObject","s3:DeleteObject","s3:AbortMultipartUpload","s3:ListMultipartUploadParts"],"Resource":"arn:aws:s3:::contido-acme-upload-dev/*"}]}'),
+    (("aws:iam/policy:Policy", "asset-cdn-invalidation"), "policy",
+     '{"Version":"2012-10-17","Statement":[{"Sid":"VisualEditor0","Effect":"Allow","Action":["cloudfront:CreateInvalidation"],"Resource":"*"}]}'),
+    (("aws:iam/policy:Policy", "fe-asset-bucket-access"), "policy",
+     '{"Version":"2012-10-17","Statement":[{"Sid":"VisualEditor0","Effect":"Allow","Action":["s3:ListBucket"],"Resource":["arn:aws:mock:::asset-bucket"]},{"Sid":"VisualEditor1","Effect":"Allow","Action":["s3:GetObject","s3:PutObject","s3:DeleteObject","s3:PutObjectAcl"],"Resource":["arn:aws:mock:::asset-bucket/*"]}]}'),
+    (("aws:iam/policy:Policy", "lambda-basic-permissions"), "policy",
+     '{"Version":"2012-10-17","Statement":[{"Effect":"Allow","Action":"logs:CreateLogGroup","Resource":"arn:aws:logs:ap-south-1:123456789012:*"},{"Effect":"Allow","Action":["logs:CreateLogStream","logs:PutLogEvents"],"Resource":["arn:aws:logs:ap-south-1:123456789012:log-group:/aws/lambda/contido-acme-dev-*"]}]}'),
+    (("aws:iam/policy:Policy", "resources-access"), "policy",
+     '{"Version":"2012-10-17","Statement":[{"Sid":"1","Effect":"Allow","Action":["s3:ListBucket"],"Resource":["arn:aws:mock:::upload-bucket","arn:aws:mock:::mam-bucket","arn:aws:mock:::asset-bucket","arn:aws:mock:::archive-bucket","arn:aws:mock:::edit-bucket"]},{"Sid":"2","Effect":"Allow","Action":["s3:GetObject","s3:PutObject","s3:DeleteObject","s3:PutObjectAcl","s3:AbortMultipartUpload","s3:ListMultipartUploadParts"],"Resource":["arn:aws:mock:::upload-bucket/*","arn:aws:mock:::mam-bucket/*","arn:aws:mock:::asset-bucket/*","arn:aws:mock:::archive-bucket/*","arn:aws:mock:::edit-bucket/*"]},{"Sid":"3","Effect":"Allow","Action":["sqs:SendMessage","sqs:ReceiveMessage","sqs:DeleteMessage","sqs:GetQueueAttributes","sqs:SetQueueAttributes"],"Resource":["*"]}]}'),
+    (("aws:iam/policy:Policy", "secret-manager-access"), "policy",
+     '{"Version":"2012-10-17","Statement":[{"Effect":"Allow","Action":["secretsmanager:GetSecretValue"],"Resource":"*"},{"Effect":"Allow","Action":["kms:Decrypt"],"Resource":"*"}]}'),
+    (("aws:iam/role:Role", "backend-common-role"), "assumeRolePolicy",
+     '{"Version":"2012-10-17","Statement":[{"Effect":"Allow","Principal":{"Service":"lambda.amazonaws.com"},"Action":"sts:AssumeRole"}]}'),
+    (("aws:s3/bucketPolicy:BucketPolicy", "asset-bucket-policy"), "policy",
+     '{"Version":"2012-10-17","Statement":[{"Effect":"Allow","Principal":{"AWS":"iam_arn-asset-oai"},"Action":"s3:GetObject","Resource":"arn:aws:mock:::asset-bucket/*"}]}'),
+    (("aws:s3/bucketPolicy:BucketPolicy", "mam-bucket-policy"), "policy",
+     '{"Version":"2012-10-17","Statement":[{"Effect":"Allow","Principal":{"AWS":"iam_arn-mam-proxy-oai"},"Action":"s3:GetObject","Resource":"arn:aws:mock:::mam-bucket/*"},{"Effect":"Allow","Principal":{"AWS":"iam_arn-mam-thumbnail-oai"},"Action":"s3:GetObject","Resource":"arn:aws:mock:::mam-bucket/*"}]}'),
+    (("aws:sqs/queuePolicy:QueuePolicy", "archive-queue-policy"), "policy",
+     '{"Version":"2012-10-17","Statement":[{"Effect":"Allow","Principal":"*","Action":["sqs:SendMessage"],"Resource":"arn:aws:mock:::archive-queue","Condition":{"ArnEquals":{"aws:SourceArn":"arn:aws:mock:::archive-bucket"}}}]}'),
+    (("aws:sqs/queuePolicy:QueuePolicy", "client-delivery-queue-policy"), "policy",
+     '{"Version":"2012-10-17","Statement":[{"Effect":"Allow","Principal":"*","Action":["sqs:SendMessage"],"Resource":"arn:aws:mock:::client-delivery-queue","Condition":{"ArnEquals":{"aws:SourceArn":"arn:aws:mock:::archive-bucket"}}}]}'),
+    (("aws:sqs/queuePolicy:QueuePolicy", "mam-restore-queue-policy"), "policy",
+     '{"Version":"2012-10-17","Statement":[{"Effect":"Allow","Principal":"*","Action":["sqs:SendMessage"],"Resource":"arn:aws:mock:::mam-restore-queue","Condition":{"ArnEquals":{"aws:SourceArn":"arn:aws:mock:::mam-bucket"}}}]}'),
+    (("aws:sqs/queuePolicy:QueuePolicy", "upload-queue-policy"), "policy",
+     '{"Version":"2012-10-17","Statement":[{"Effect":"Allow","Principal":"*","Action":["sqs:SendMessage"],"Resource":"arn:aws:mock:::upload-queue","Condition":{"ArnEquals":{"aws:SourceArn":"arn:aws:mock:::upload-bucket"}}}]}'),
+]
+
+
+@pytest.fixture(scope="module")
+def deployment():
+    return run_program(CONFIG)
+
+
+@pytest.mark.parametrize("resource,field,expected", HAND_WRITTEN, ids=[key[1] for key, _, _ in HAND_WRITTEN])
+def test_policies_match_hand_written_json(deployment, resource, field, expected):
+    assert deployment.get(*resource).inputs[field] == expected
+
+
+def test_statement_keeps_string_and_list_forms():
+    assert policies.render([policies.statement("s3:GetObject", "*"), policies.statement(["s3:GetObject"], ["*"])]) == (
+        '{"Version":"2012-10-17","Statement":['
+        '{"Effect":"Allow","Action":"s3:GetObject","Resource":"*"},'
+        '{"Effect":"Allow","Action":["s3:GetObject"],"Resource":["*"]}]}')
+
+
+def test_merge_folds_actions_then_resources():
+    statements = [
+        policies.statement(["s3:GetObject"], "arn:aws:s3:::a/*"),
+        policies.statement(["s3:PutObject", "s3:GetObject"], "arn:aws:s3:::a/*"),
+        policies.statement(["s3:GetObject", "s3:PutObject"], "arn:aws:s3:::b/*"),
+        policies.statement(["s3:GetObject"], "arn:aws:s3:::a/*"),
+    ]
+    assert policies.merge_statements(statements) == [{
+        "Effect": "Allow",
+        "Action": ["s3:GetObject", "s3:PutObject"],
+        "Resource": ["arn:aws:s3:::a/*", "arn:aws:s3:::b/*"],
+    }]
+
+
+def test_merge_keeps_statements_with_different_sids():
+    statements = [policies.statement("s3:GetObject", "*", sid="A"), policies.statement("s3:PutObject", "*", sid="B")]
+    assert len(policies.merge_statements(statements)) == 2
+
+
+@pytest.mark.parametrize("build,message", [
+    (lambda: policies.statement("s3 GetObject", "*"), "not <service>:<action>"),
+    (lambda: policies.statement([], "*"), "at least one action"),
+    (lambda: policies.statement("s3:GetObject"), "resources or a principal"),
+    (lambda: policies.statement("s3:GetObject", "*", effect="allow"), "effect"),
+    (lambda: policies.statement("s3:GetObject", "*", sid="read-all"), "alphanumeric"),
+    (lambda: policies.render([policies.statement("s3:GetObject", "*", sid="A")] * 2), "duplicate Sids"),
+    (lambda: policies.render([policies.statement("s3:GetObject", "my-bucket")]), "not an ARN"),
+])
+def test_invalid_policies_are_rejected(build, message):
+    with pytest.raises(ValueError, match=message):
+        build()
+
+
+def test_size_limit():
+    statement = policies.statement("s3:GetObject", [f"arn:aws:s3:::bucket-{index}/*" for index in range(300)])
+    with pytest.raises(ValueError, match="over the 6144 character limit"):
+        policies.render([statement], limit=policies.MANAGED_POLICY_LIMIT)
+    assert policies.render([statement], limit=policies.BUCKET_POLICY_LIMIT)
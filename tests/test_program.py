@@ -0,0 +1,270 @@
+"""Resource graph of ``__main__.py`` for dev-like and prod-like stacks."""
+
+import collections
+import json
+import subprocess
+import sys
+
+import pytest
+
+from tests.harness import PROJECT_DIR, run_program, stack_file_config
+
+PROD_CONFIG = {
+    **stack_file_config("prod"),
+    "image_uri_sync": "909463554763.dkr.ecr.ap-south-1.amazonaws.com/sync-service:1.4.0",
+    "image_uri_ingest": "909463554763.dkr.ecr.ap-south-1.amazonaws.com/ingest-service:1.4.0",
+    "acm_certificate_arn": "arn:aws:acm:us-east-1:909463554763:certificate/0a1b2c3d",
+    "r53_zone_id": "Z0123456789ABCDEFGHIJ",
+    "upload_transfer_acceleration": True,
+    "sync_architecture": "arm64",
+    "ingest_memory_size": 3008,
+    "sync_deployment": {"publish": True, "provisioned_concurrency": 2},
+    "ingest_event_source": {"batch_size": 25, "maximum_batching_window_in_seconds": 10,
+                            "report_batch_item_failures": True},
+    "queues": {"sync_service": {"fifo": True, "content_based_deduplication": True}},
+    "monitoring": {"alarm_emails": ["media-ops@example.com"]},
+    "workers": {
+        "transcoding_start": {
+            "service": "arn:aws:ecs:ap-south-1:909463554763:service/contido-workers/transcoder",
+            "max_tasks": 20,
+            "target_latency_seconds": 300,
+            "seconds_per_message": 60,
+        },
+    },
+    "cdn": {"origin_access": "oac", "proxy": {"price_class": "PriceClass_200", "http_version": "http2and3"}},
+    "cdn_monitoring": {"alarm_actions": ["arn:aws:sns:us-east-1:909463554763:cdn-alerts"]},
+    "inventory": {},
+}
+
+
+@pytest.fixture(scope="module")
+def dev():
+    return run_program(stack_file_config("dev"), stack="dev")
+
+
+@pytest.fixture(scope="module")
+def prod():
+    return run_program(PROD_CONFIG, stack="prod")
+
+
+def _counts(deployment):
+    return collections.Counter(resource.type.rsplit(":", 1)[-1] for resource in deployment.resources.values())
+
+
+def test_dev_resource_counts(dev):
+    counts = _counts(dev)
+    assert len(dev) == 120
+    assert counts["Bucket"] == 10  # ContidoBucket components and their buckets
+    assert counts["Queue"] == 18
+    assert counts["Distribution"] == 3
+    assert counts["BucketNotification"] == 2
+    assert counts["Function"] == 0
+    assert counts["Record"] == 0
+
+
+def test_dev_names_follow_client_and_env(dev):
+    assert dev["upload-bucket"].inputs["bucket"] == "contido-my-client-upload-dev"
+    assert dev["sync-service-queue"].inputs["name"] == "contido-my-client-dev-sync-service"
+    assert dev["backend-common-role"].inputs["name"] == "contido-my-client-dev-backend-common-role"
+
+
+def test_dev_queue_tuning(dev):
+    # lambda-trigger profile: six times the 900 s function timeout.
+    assert dev["sync-service-queue"].inputs["visibilityTimeoutSeconds"] == 5400
+    assert dev["transfer-queue"].inputs["visibilityTimeoutSeconds"] == 1350
+    assert json.loads(dev["upload-queue"].inputs["redrivePolicy"]) == {
+        "deadLetterTargetArn": "arn:aws:mock:::upload-queue-dlq",
+        "maxReceiveCount": 5,
+    }
+
+
+def test_dev_cloudfront_defaults(dev):
+    for name in ("mam-proxy-cdn", "mam-thumbnail-cdn", "asset-cdn"):
+        distribution = dev[name].inputs
+        assert distribution["priceClass"] == "PriceClass_All"
+        assert distribution["httpVersion"] == "http2"
+        assert distribution["viewerCertificate"] == {"cloudfrontDefaultCertificate": True}
+
+
+def test_dev_dependencies(dev):
+    assert dev.depends_on("upload-notification", "upload-queue-policy")
+    assert dev.depends_on("mam-notification", "mam-restore-queue-policy")
+    assert dev.depends_on("mam-proxy-cdn", "mam-bucket-policy")
+    assert dev.depends_on("asset-cdn", "asset-bucket-policy")
+    assert dev.depends_on("upload-queue", "upload-queue-dlq")
+
+
+def test_s3_notification_routes():
+    routes = [
+        {"bucket": "archive", "queue": "archive", "prefix": "watchfolder/"},
+        {"bucket": "archive", "queue": "client_delivery", "prefix": "client_delivery/", "suffix": ".mxf"},
+    ]
+    deployment = run_program({**stack_file_config("dev"), "s3_notifications": routes})
+    queues = deployment["archive-notification"].inputs["queues"]
+    assert [(queue["filterPrefix"], queue.get("filterSuffix")) for queue in queues] == [
+        ("watchfolder/", None), ("client_delivery/", ".mxf")]
+    assert deployment.depends_on("archive-notification", "client-delivery-queue-policy")
+    assert deployment.depends_on("archive-notification", "archive-queue-policy")
+    # The stack's own upload route is replaced, not merged.
+    assert "upload-notification" not in deployment
+
+    without_routes = {key: value for key, value in stack_file_config("dev").items()
+                      if key != "contido-infra-pulumi:s3_notifications"}
+    assert not run_program(without_routes).of_type("aws:s3/bucketNotification:BucketNotification")
+
+
+def test_lifecycle_transitions_are_opt_in(dev):
+    for bucket in ("upload", "mam", "edit"):
+        assert [rule["id"] for rule in dev[f"{bucket}-lifecycle"].inputs["rules"]] == [
+            "abort-incomplete-multipart-uploads"]
+    assert [rule["id"] for rule in dev["archive-lifecycle"].inputs["rules"]] == [
+        "expire-noncurrent-versions", "abort-incomplete-multipart-uploads"]
+
+    lifecycle = {"mam": {"transitions": [{"prefix": "proxy/", "days": 0, "storage_class": "INTELLIGENT_TIERING"}]}}
+    rules = run_program({**stack_file_config("dev"), "lifecycle": lifecycle})["mam-lifecycle"].inputs["rules"]
+    assert rules == [{"id": "tier-proxy", "status": "Enabled", "filter": {"prefix": "proxy/"},
+                      "transitions": [{"days": 0.0, "storageClass": "INTELLIGENT_TIERING"}]}]
+
+
+def test_prod_resource_counts(prod):
+    counts = _counts(prod)
+    assert len(prod) == 165
+    assert counts["Function"] == 2
+    assert counts["EventSourceMapping"] == 2
+    assert counts["Record"] == 3
+    assert counts["OriginAccessIdentity"] == 0
+    assert counts["OriginAccessControl"] == 2
+    assert counts["MonitoringSubscription"] == 3
+
+
+def test_prod_lambdas(prod):
+    sync = prod["sync-service"].inputs
+    assert sync["imageUri"] == PROD_CONFIG["image_uri_sync"]
+    assert sync["architectures"] == ["arm64"]
+    assert sync["publish"] is True
+    assert prod["file-ingest-service"].inputs["memorySize"] == 3008
+    assert prod["sync-service-provisioned-concurrency"].inputs["provisionedConcurrentExecutions"] == 2
+    # The mapping invokes the alias, after the function exists.
+    assert prod["sync-service-event"].inputs["functionName"] == "arn:aws:mock:::sync-service-live"
+    assert prod.depends_on("sync-service-event", "sync-service")
+
+
+def test_event_source_batching_is_opt_in(prod):
+    sync = prod["sync-service-event"].inputs
+    assert sync["batchSize"] == 1
+    assert "functionResponseTypes" not in sync
+    ingest = prod["file-ingest-event"].inputs
+    assert (ingest["batchSize"], ingest["maximumBatchingWindowInSeconds"]) == (25, 10)
+    assert ingest["functionResponseTypes"] == ["ReportBatchItemFailures"]
+
+
+def test_prod_fifo_sync_queue(prod):
+    queue = prod["sync-service-queue"].inputs
+    assert queue["name"] == "contido-my-client-prod-sync-service.fifo"
+    assert queue["fifoThroughputLimit"] == "perMessageGroupId"
+    assert prod["sync-service-queue-dlq"].inputs["name"] == "contido-my-client-prod-sync-service-dlq.fifo"
+    assert "maximumBatchingWindowInSeconds" not in prod["sync-service-event"].inputs
+
+
+def test_prod_cloudfront(prod):
+    proxy = prod["mam-proxy-cdn"].inputs
+    assert proxy["priceClass"] == "PriceClass_200"
+    assert proxy["httpVersion"] == "http2and3"
+    assert proxy["viewerCertificate"]["acmCertificateArn"] == PROD_CONFIG["acm_certificate_arn"]
+    assert proxy["origins"][0]["originAccessControlId"] == "mam-oac-id"
+    # OAC bucket policies name the distributions, so they follow them.
+    assert prod.depends_on("mam-bucket-policy", "mam-proxy-cdn")
+    assert prod.depends_on("proxy-record", "mam-proxy-cdn")
+    alarms = [resource for resource in prod.of_type("aws:cloudwatch/metricAlarm:MetricAlarm")
+              if resource.name.endswith(("cache-hit-rate-alarm", "origin-latency-alarm", "5xx-rate-alarm"))]
+    assert len(alarms) == 9
+    assert {alarm.inputs["region"] for alarm in alarms} == {"us-east-1"}
+
+
+@pytest.mark.parametrize("origin_access, origin_signing, policy_principals", [
+    ("oai", "oai", {"AWS"}),
+    # The grant lands while the origins are unchanged ...
+    ("oac-grant", "oai", {"AWS", "Service"}),
+    # ... so switching the origins never meets a policy without it.
+    ("oac-migrate", "oac", {"AWS", "Service"}),
+    ("oac", "oac", {"Service"}),
+])
+def test_oac_rollout_steps(origin_access, origin_signing, policy_principals):
+    deployment = run_program({**stack_file_config("dev"), "cdn": {"origin_access": origin_access}})
+    for distribution, policy in (("mam-proxy-cdn", "mam-bucket-policy"), ("mam-thumbnail-cdn", "mam-bucket-policy"),
+                                 ("asset-cdn", "asset-bucket-policy")):
+        origin = deployment[distribution].inputs["origins"][0]
+        assert ("oac" if origin.get("originAccessControlId") else "oai") == origin_signing, distribution
+        assert ("s3OriginConfig" in origin) == (origin_signing == "oai"), distribution
+        statements = json.loads(deployment[policy].inputs["policy"])["Statement"]
+        assert {principal for statement in statements for principal in statement["Principal"]} == policy_principals
+        if "Service" in policy_principals:
+            granted = [statement["Condition"]["StringEquals"]["AWS:SourceArn"] for statement in statements
+                       if "Service" in statement["Principal"]]
+            assert [f"arn:aws:mock:::{distribution}" in arns for arns in granted] == [True], distribution
+    assert ("mam-oac" in deployment) == (origin_access != "oai")
+    assert ("mam-proxy-oai" in deployment) == (origin_access != "oac")
+
+
+def test_prod_worker_autoscaling(prod):
+    target = prod["transcoding-start-worker-target"].inputs
+    assert target["resourceId"] == "service/contido-workers/transcoder"
+    assert target["maxCapacity"] == 20
+    policy = prod["transcoding-start-worker-backlog-scaling"].inputs
+    assert policy["targetTrackingScalingPolicyConfiguration"]["targetValue"] == 5
+
+
+def test_prod_upload_acceleration(prod):
+    assert prod["upload-accelerate"].inputs["status"] == "Enabled"
+
+
+def test_prod_inventory_catalog(prod):
+    assert prod["mam-inventory"].inputs["destination"]["bucket"]["format"] == "Parquet"
+    assert prod.depends_on("archive-inventory", "reports-bucket-policy")
+    table = prod["mam-inventory-table"].inputs
+    assert table["databaseName"] == "contido_my_client_prod"
+    assert table["storageDescriptor"]["location"] == (
+        "s3://contido-my-client-reports-prod/inventory/contido-my-client-mam-prod/catalog/hive/")
+    workgroup = prod["inventory-workgroup"].inputs["configuration"]
+    assert workgroup["enforceWorkgroupConfiguration"] is True
+    assert workgroup["bytesScannedCutoffPerQuery"] == 10 * 1024 ** 3
+    assert "upload-inventory" not in prod
+
+
+def test_cdn_disabled():
+    # In a fresh interpreter, so the lazily imported CDN subsystem is observable.
+    script = ("import json, sys; from tests.harness import run_program; "
+              "deployment = run_program(json.loads(sys.argv[1])); "
+              "print(json.dumps([len(deployment), 'contido.subsystems.cdn' in sys.modules, "
+              "sorted({resource.type for resource in deployment.resources.values()})]))")
+    config = {**stack_file_config("dev"), "cdn": {"enabled": False}}
+    output = subprocess.run([sys.executable, "-c", script, json.dumps(config)],
+                            cwd=PROJECT_DIR, check=True, capture_output=True, text=True).stdout
+    resources, imported, types = json.loads(output.splitlines()[-1])
+    assert resources == 112
+    assert not imported
+    assert not [resource_type for resource_type in types if resource_type.startswith(("aws:cloudfront", "aws:route53"))]
+
+
+def test_replication_with_asset_failover():
+    deployment = run_program({**PROD_CONFIG, "replication": {"region": "eu-west-1", "asset_failover": True}},
+                             stack="prod")
+    replica = deployment["asset-replica-bucket"].inputs
+    assert (replica["bucket"], replica["region"]) == ("contido-my-client-asset-prod-eu-west-1", "eu-west-1")
+    assert deployment["asset-versioning"].inputs["versioningConfiguration"]["status"] == "Enabled"
+    assert deployment["asset-lifecycle"].inputs["rules"][0]["noncurrentVersionExpiration"]["noncurrentDays"] == 30
+    assert "upload-replication" not in deployment
+
+    rule = deployment["archive-replication"].inputs["rules"][0]
+    assert rule["destination"]["replicationTime"] == {"status": "Enabled", "time": {"minutes": 15}}
+    assert rule["destination"]["metrics"]["status"] == "Enabled"
+    assert rule["deleteMarkerReplication"]["status"] == "Enabled"
+    assert deployment.depends_on("archive-replication", "archive-versioning")
+    assert deployment.depends_on("archive-replication", "replication-policy")
+
+    distribution = deployment["asset-cdn"].inputs
+    group = distribution["originGroups"][0]
+    assert [member["originId"] for member in group["members"]] == ["myS3-asset-Origin", "myS3-asset-replica-Origin"]
+    assert distribution["defaultCacheBehavior"]["targetOriginId"] == group["originId"]
+    assert deployment["asset-replica-bucket-policy"].inputs["region"] == "eu-west-1"
+    assert deployment.depends_on("asset-replica-bucket-policy", "asset-cdn")
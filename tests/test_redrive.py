@@ -0,0 +1,168 @@
+"""DLQ redrive against an in-memory SQS stand-in."""
+
+import io
+import itertools
+import threading
+
+import pytest
+
+from contido import redrive
+
+DLQ = "https://sqs.mock/file-ingest-dlq"
+TARGET = "https://sqs.mock/file-ingest"
+
+
+class FakeSQS:
+    """The SQS client calls ``redrive`` makes, on in-memory queues.
+
+    Received messages are in flight until deleted; ``visibility_timeout=0``
+    makes the ones a thread left undeleted visible again on its next receive.
+    The target rejects bodies listed in ``reject``. With ``barrier`` set, the
+    first receive of each thread waits for the others, so a serial drain fails.
+    """
+
+    def __init__(self, messages, reject=(), visibility_timeout=None, barrier=None):
+        self.visible = {DLQ: list(messages), TARGET: []}
+        self.in_flight = {}
+        self.reject = set(reject)
+        self.visibility_timeout = visibility_timeout
+        self.barrier = barrier
+        self.receive_sizes = []
+        self.send_sizes = []
+        self.threads = set()
+        self._handles = itertools.count()
+        self._lock = threading.Lock()
+
+    def receive_message(self, QueueUrl, MaxNumberOfMessages, WaitTimeSeconds, MessageAttributeNames,
+                        AttributeNames):
+        assert 1 <= MaxNumberOfMessages <= redrive.BATCH_SIZE
+        if self.barrier and threading.get_ident() not in self.threads:
+            self.threads.add(threading.get_ident())
+            self.barrier.wait(timeout=5)
+        with self._lock:
+            if self.visibility_timeout == 0:
+                expired = [handle for handle, (owner, _) in self.in_flight.items() if owner == threading.get_ident()]
+                self.visible[QueueUrl].extend(self.in_flight.pop(handle)[1] for handle in expired)
+            batch = self.visible[QueueUrl][:MaxNumberOfMessages]
+            del self.visible[QueueUrl][:MaxNumberOfMessages]
+            self.receive_sizes.append(len(batch))
+            received = []
+            for message in batch:
+                handle = f"handle-{next(self._handles)}"
+                self.in_flight[handle] = (threading.get_ident(), message)
+                attributes = {name: message[name] for name in AttributeNames if name in message}
+                received.append({"MessageId": message["MessageId"], "ReceiptHandle": handle,
+                                 "Body": message["Body"], "Attributes": attributes})
+            return {"Messages": received} if received else {}
+
+    def send_message_batch(self, QueueUrl, Entries):
+        assert 1 <= len(Entries) <= redrive.BATCH_SIZE
+        successful, failed = [], []
+        with self._lock:
+            self.send_sizes.append(len(Entries))
+            for entry in Entries:
+                if entry["MessageBody"] in self.reject:
+                    failed.append({"Id": entry["Id"], "SenderFault": True, "Code": "InvalidParameterValue",
+                                   "Message": "rejected"})
+                    continue
+                message = {"MessageId": f"moved-{entry['Id']}", "Body": entry["MessageBody"]}
+                message.update({name: entry[name] for name in ("MessageGroupId", "MessageDeduplicationId")
+                                if name in entry})
+                self.visible[QueueUrl].append(message)
+                successful.append({"Id": entry["Id"]})
+        return {"Successful": successful, "Failed": failed}
+
+    def delete_message_batch(self, QueueUrl, Entries):
+        assert QueueUrl == DLQ and len(Entries) <= redrive.BATCH_SIZE
+        with self._lock:
+            for entry in Entries:
+                del self.in_flight[entry["ReceiptHandle"]]
+        return {"Successful": [{"Id": entry["Id"]} for entry in Entries]}
+
+    def remaining(self):
+        """Messages still on the dead-letter queue, visible or in flight."""
+        return self.visible[DLQ] + [message for _, message in self.in_flight.values()]
+
+
+def _messages(count, **attributes):
+    return [{"MessageId": f"m{index}", "Body": f"body-{index}", **attributes} for index in range(count)]
+
+
+def test_moves_everything_in_batches_of_ten():
+    sqs = FakeSQS(_messages(25))
+    result = redrive.redrive(sqs, DLQ, TARGET, workers=1)
+    assert sorted(result.moved) == sorted(f"m{index}" for index in range(25))
+    assert result.failed == {}
+    assert sqs.send_sizes == [10, 10, 5]
+    assert sqs.remaining() == []
+    assert [message["Body"] for message in sqs.visible[TARGET]] == [f"body-{index}" for index in range(25)]
+
+
+def test_workers_drain_in_parallel():
+    workers = 4
+    sqs = FakeSQS(_messages(200), barrier=threading.Barrier(workers))
+    result = redrive.redrive(sqs, DLQ, TARGET, workers=workers)
+    assert len(sqs.threads) == workers
+    assert len(result.moved) == 200 and len(set(result.moved)) == 200
+    assert sqs.remaining() == []
+
+
+@pytest.mark.parametrize("workers, limit, moved", [(1, 15, 15), (2, 10, 20), (3, 100, 50)])
+def test_limit_caps_messages_per_worker(workers, limit, moved):
+    sqs = FakeSQS(_messages(50))
+    result = redrive.redrive(sqs, DLQ, TARGET, workers=workers, limit=limit)
+    assert len(result.moved) == moved
+    assert len(sqs.remaining()) == 50 - moved
+    assert max(sqs.receive_sizes) <= redrive.BATCH_SIZE
+
+
+def test_fifo_group_and_deduplication_ids_pass_through():
+    messages = [{**message, "MessageGroupId": f"asset-{index % 3}", "MessageDeduplicationId": f"dedup-{index}"}
+                for index, message in enumerate(_messages(12))]
+    sqs = FakeSQS(messages)
+    redrive.redrive(sqs, DLQ, TARGET, workers=1)
+    assert [(message["MessageGroupId"], message["MessageDeduplicationId"]) for message in sqs.visible[TARGET]] == [
+        (f"asset-{index % 3}", f"dedup-{index}") for index in range(12)]
+
+
+def test_standard_messages_carry_no_fifo_ids():
+    sqs = FakeSQS(_messages(3))
+    redrive.redrive(sqs, DLQ, TARGET, workers=1)
+    assert all(set(message) == {"MessageId", "Body"} for message in sqs.visible[TARGET])
+
+
+def test_partial_send_failures_keep_draining_and_are_reported():
+    sqs = FakeSQS(_messages(30), reject={"body-3", "body-17"})
+    result = redrive.redrive(sqs, DLQ, TARGET, workers=1)
+    assert len(result.moved) == 28
+    assert sorted(result.failed) == ["m17", "m3"]
+    assert result.failed["m3"] == {"SenderFault": True, "Code": "InvalidParameterValue", "Message": "rejected"}
+    assert sorted(message["MessageId"] for message in sqs.remaining()) == ["m17", "m3"]
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_rejected_messages_that_reappear_stop_the_drain(workers):
+    # Rejected messages come straight back; the drain must still finish.
+    sqs = FakeSQS(_messages(40), reject={"body-0", "body-25"}, visibility_timeout=0)
+    result = redrive.redrive(sqs, DLQ, TARGET, workers=workers)
+    assert len(result.moved) == 38
+    assert sorted(result.failed) == ["m0", "m25"]
+    assert sorted(message["MessageId"] for message in sqs.remaining()) == ["m0", "m25"]
+
+
+def test_redrive_queues_exits_non_zero_on_failures():
+    pairs = {"file_ingest": {"dlq_url": DLQ, "queue_url": TARGET}}
+    out = io.StringIO()
+    assert redrive.redrive_queues(FakeSQS(_messages(5)), pairs, ["file_ingest"], out=out) == 0
+    assert out.getvalue() == "file_ingest: moved 5 message(s), 0 failed\n"
+
+    out = io.StringIO()
+    sqs = FakeSQS(_messages(5), reject={"body-2"})
+    assert redrive.redrive_queues(sqs, pairs, ["file_ingest"], workers=1, out=out) == 1
+    assert out.getvalue() == "file_ingest: moved 4 message(s), 1 failed\n  m2: InvalidParameterValue rejected\n"
+
+
+@pytest.mark.parametrize("kwargs", [{"workers": 0}, {"limit": 0}])
+def test_invalid_arguments(kwargs):
+    with pytest.raises(ValueError):
+        redrive.redrive(FakeSQS([]), DLQ, TARGET, **kwargs)
@@ -0,0 +1,162 @@
+"""Typed stack config: validation rules and the offline stack-file check."""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from contido import settings
+from tests.harness import PROJECT_DIR
+
+BASE = {"client": "acme", "env": "dev", "aws:region": "ap-south-1", "account_id": "123456789012"}
+
+
+def load(**overrides):
+    return settings.load_settings({**BASE, **overrides})
+
+
+def test_defaults():
+    stack = load()
+    assert stack.lambda_sizing.memory_size == 1024
+    # The baseline mapping: one message, no window, whole-batch retries
+    for event_source in (stack.sync_event_source, stack.ingest_event_source):
+        args = event_source.mapping_args()
+        assert (args["batch_size"], args["maximum_batching_window_in_seconds"]) == (1, None)
+        assert args["function_response_types"] is None
+    assert stack.queue_settings["sync_service"].visibility_timeout_seconds == 5400
+    assert stack.cdn_monitoring_settings is None
+
+
+def test_settings_are_slotted_and_frozen():
+    stack = load()
+    assert not hasattr(stack, "__dict__")
+    with pytest.raises(AttributeError):
+        stack.client = "other"
+
+
+def test_pulumi_string_values_are_coerced():
+    stack = load(memory_size="2048", upload_transfer_acceleration="true",
+                 monitoring='{"queue_depth": 50}')
+    assert stack.lambda_sizing.memory_size == 2048
+    assert stack.upload_transfer_acceleration is True
+    assert stack.monitoring_settings.queue_depth == 50
+
+
+def test_namespaced_keys_and_other_providers():
+    stack = settings.load_settings({
+        "contido-infra-pulumi:client": "acme",
+        "contido-infra-pulumi:env": "dev",
+        "contido-infra-pulumi:account_id": "123456789012",
+        "aws:region": "ap-south-1",
+        "aws:profile": "media",
+    })
+    assert stack.client == "acme"
+
+
+@pytest.mark.parametrize("overrides,message", [
+    ({"memroy_size": 512}, "unknown config keys"),
+    ({"memory_size": 0}, r"memory_size must be an integer in \[128, 10240\]"),
+    ({"memory_size": "lots"}, "memory_size must be an integer"),
+    ({"lambda_timeout": 901}, "lambda_timeout"),
+    ({"sync_architecture": "arm"}, "sync_architecture"),
+    ({"client": "Acme"}, "lowercase"),
+    ({"client": "a" * 50}, "S3 bucket name"),
+    ({"account_id": "1234"}, "12-digit"),
+    ({"aws:region": "mumbai"}, "aws:region"),
+    ({"acm_certificate_arn": "arn:aws:acm:ap-south-1:123456789012:certificate/x"}, "us-east-1"),
+    ({"image_uri_sync": "123456789012.dkr.ecr.eu-west-1.amazonaws.com/sync:1"}, "ECR image in ap-south-1"),
+    ({"sync_deployment": {"publish": True, "schedule": {"scale_up": 5, "scale_down": "cron(0 20 * * ? *)",
+                                                        "business_hours": 4, "off_hours": 1}}},
+     r"sync_deployment.schedule.scale_up must be a cron\(\), rate\(\) or at\(\) expression"),
+    ({"queues": {"uplod": {}}}, "unknown queues"),
+    ({"queues": {"upload": {"fifo": True}}}, "fifo is not supported"),
+    ({"queues": {"sync_service": {"fifo": True}}, "sync_event_source": {"batch_size": 20}}, "batch_size"),
+    ({"s3_notifications": [{"bucket": "upload", "queue": "transfer"}]}, "transfer"),
+    ({"s3_notifications": [{"bucket": "archive", "queue": "archive"},
+                           {"bucket": "archive", "queue": "client_delivery", "prefix": "restore/"}]}, "overlap"),
+    ({"s3_notifications": [{"bucket": "archive", "queue": "archive", "prefix": "media/", "suffix": ".mp4"},
+                           {"bucket": "archive", "queue": "client_delivery", "prefix": "media/", "suffix": "4"}]},
+     "overlap"),
+    ({"s3_notifications": [{"bucket": "archive", "queue": "archive", "prefix": "media/",
+                            "events": ["s3:ObjectCreated:*"]},
+                           {"bucket": "archive", "queue": "client_delivery", "prefix": "media/",
+                            "events": ["s3:ObjectCreated:Put"]}]}, "overlap"),
+    ({"cdn": {"origin_access": "public"}}, "origin_access"),
+    ({"cdn": {"enabled": "no"}}, "cdn.enabled must be a boolean"),
+    ({"cdn": {"enabled": False}, "cdn_monitoring": {}}, "cdn_monitoring requires the CDN"),
+    ({"inventory": {"buckets": ["media"]}}, "unknown bucket 'media'"),
+    ({"inventory": {"frequency": "Weekly", "report_retention_days": 7}}, r"report_retention_days must be an integer >= 8"),
+    ({"inventory": {"bytes_scanned_cutoff_mb": 1}}, "bytes_scanned_cutoff_mb"),
+    ({"replication": {"buckets": ["archive"]}}, "replication.region is required"),
+    ({"replication": {"region": "ap-south-1"}}, "must differ from the stack region"),
+    ({"replication": {"region": "eu-west-1", "buckets": ["media"]}}, "unknown bucket 'media'"),
+    ({"replication": {"region": "eu-west-1", "storage_class": "GLACIER", "asset_failover": True}}, "cannot serve GLACIER"),
+    ({"replication": {"region": "eu-west-1", "asset_failover": True}, "cdn": {"enabled": False}},
+     "asset_failover requires the CDN"),
+    ({"thumbnail_resizing": {}}, "thumbnail_resizing.image_uri is required"),
+    ({"thumbnail_resizing": {"image_uri": "123456789012.dkr.ecr.eu-west-1.amazonaws.com/resizer:1"}},
+     "ECR image in ap-south-1"),
+    ({"thumbnail_resizing": {"image_uri": "resizer:1", "widths": [640, 320]}}, "ascending"),
+    ({"thumbnail_resizing": {"image_uri": "resizer:1", "formats": ["gif"]}}, "formats must be among"),
+    ({"thumbnail_resizing": {"image_uri": "resizer:1", "timeout": 120}}, r"timeout must be an integer in \[1, 60\]"),
+    ({"thumbnail_resizing": {"image_uri": "resizer:1"}, "cdn": {"enabled": False}}, "thumbnail_resizing requires the CDN"),
+    ({"layer": {"name": "cdn"}}, "layer.name must be one of"),
+    ({"layer": {"name": "edge"}}, "layer.base_stack must be"),
+    ({"layer": {"name": "base", "base_stack": "prod"}}, "only used by the edge and compute layers"),
+    ({"layer": {"name": "edge", "base_stack": "prod"}, "cdn": {"enabled": False}}, "layer.name edge requires the CDN"),
+    ({"layer": {"name": "compute", "base_stack": "prod"}}, "layer.name compute requires image_uri_sync"),
+])
+def test_invalid_config_is_rejected(overrides, message):
+    with pytest.raises(ValueError, match=message):
+        load(**overrides)
+
+
+def test_disjoint_notification_routes_are_accepted():
+    stack = load(s3_notifications=[
+        {"bucket": "archive", "queue": "archive", "prefix": "watchfolder/"},
+        {"bucket": "archive", "queue": "client_delivery", "prefix": "client_delivery/"},
+        {"bucket": "archive", "queue": "archive", "prefix": "media/", "events": ["s3:ObjectRestore:Completed"]},
+        {"bucket": "archive", "queue": "client_delivery", "prefix": "media/", "suffix": ".mxf"},
+    ])
+    assert [route.queue for route in stack.notification_routes] == ["archive", "client_delivery", "archive",
+                                                                     "client_delivery"]
+    assert load().notification_routes == []
+
+
+def test_missing_required_keys():
+    with pytest.raises(ValueError, match=r"missing required config \['aws:region', 'account_id'\]"):
+        settings.load_settings({"client": "acme", "env": "dev"})
+
+
+def test_stack_files_validate():
+    assert settings.main([]) == 0
+
+
+@pytest.mark.parametrize("stack", ["dev", "prod"])
+def test_stack_files_route_uploads_and_mam_restores(stack):
+    stack_settings = settings.load_stack_file(os.path.join(PROJECT_DIR, f"Pulumi.{stack}.yaml"))
+    assert [(route.bucket, route.queue, route.events, route.prefix, route.suffix)
+            for route in stack_settings.notification_routes] == [
+        ("upload", "upload", ("s3:ObjectCreated:*",), "", ""),
+        ("mam", "mam_restore", ("s3:ObjectCreated:*",), "restore/", ""),
+        ("mam", "mam_restore", ("s3:ObjectRestore:*",), "", ""),
+    ]
+
+
+def test_validate_reports_bad_stack_file(tmp_path, capsys):
+    path = tmp_path / "Pulumi.broken.yaml"
+    path.write_text("config:\n  aws:region: ap-south-1\n  contido-infra-pulumi:client: acme\n")
+    assert settings.main([str(path)]) == 1
+    assert "missing required config ['env', 'account_id']" in capsys.readouterr().out
+
+
+def test_parsing_loads_no_aws_service_modules():
+    # pulumi_aws service modules load with the subsystems that declare resources.
+    script = ("import json, sys; from contido import settings; settings.load_settings(json.loads(sys.argv[1])); "
+              "print(json.dumps(sorted({name.split('.')[1] for name in sys.modules "
+              "if name.startswith('pulumi_aws.') and name.count('.') > 1})))")
+    output = subprocess.run([sys.executable, "-c", script, json.dumps(BASE)],
+                            cwd=PROJECT_DIR, check=True, capture_output=True, text=True).stdout
+    assert json.loads(output) == []
@@ -0,0 +1,95 @@
+"""On-demand thumbnail resizing: the CDN wiring and the viewer-request function."""
+
+import json
+import shutil
+import subprocess
+
+import pytest
+
+from contido import thumbnails
+from tests.harness import run_program
+from tests.test_program import PROD_CONFIG
+
+RESIZING = {"image_uri": "909463554763.dkr.ecr.ap-south-1.amazonaws.com/thumbnail-resizer:1.0.0"}
+
+
+def _run(mam_mode, **resizing):
+    config = {**PROD_CONFIG, "cdn": {**PROD_CONFIG["cdn"], "mam_mode": mam_mode},
+              "thumbnail_resizing": {**RESIZING, **resizing}}
+    return run_program(config, stack="prod")
+
+
+def test_thumbnail_distribution_fails_over_to_the_resizer():
+    deployment = _run("split")
+    distribution = deployment["mam-thumbnail-cdn"].inputs
+    origins = {origin["originId"]: origin for origin in distribution["origins"]}
+    resizer = origins["thumbnail-resizer-Origin"]
+    assert resizer["originPath"] == "/thumbnail"
+    assert resizer["originAccessControlId"] == "thumbnail-resizer-oac-id"
+    assert resizer["customOriginConfig"]["originReadTimeout"] == 30
+
+    group = distribution["originGroups"][0]
+    assert [member["originId"] for member in group["members"]] == ["myS3-mam-thumbnail-Origin", "thumbnail-resizer-Origin"]
+    assert group["failoverCriteria"]["statusCodes"] == [403, 404]
+    behavior = distribution["defaultCacheBehavior"]
+    assert behavior["targetOriginId"] == group["originId"]
+    assert behavior["functionAssociations"] == [
+        {"eventType": "viewer-request", "functionArn": "arn:aws:mock:::mam-thumbnail-cdn-resize"}]
+
+    assert deployment["thumbnail-resizer-oac"].inputs["originAccessControlOriginType"] == "lambda"
+    assert deployment["thumbnail-resizer-url"].inputs["authorizationType"] == "AWS_IAM"
+    assert deployment["mam-thumbnail-cdn-resizer-invoke-url"].inputs["sourceArn"] == "arn:aws:mock:::mam-thumbnail-cdn"
+    assert "mam-cdn-resizer-invoke" not in deployment
+    # The proxy distribution is untouched.
+    assert "originGroups" not in deployment["mam-proxy-cdn"].inputs
+
+
+def test_unified_distribution_resizes_under_thumbnail():
+    deployment = _run("unified", write_back=False)
+    distribution = deployment["mam-cdn"].inputs
+    resizer = [origin for origin in distribution["origins"] if origin["originId"] == "thumbnail-resizer-Origin"][0]
+    assert resizer.get("originPath", "") == ""
+    thumbnail_behaviors = [behavior for behavior in distribution["orderedCacheBehaviors"]
+                           if behavior["pathPattern"].startswith("thumbnail/")]
+    assert thumbnail_behaviors
+    assert {behavior["targetOriginId"] for behavior in thumbnail_behaviors} == {"thumbnail-resizing"}
+    assert distribution["defaultCacheBehavior"]["targetOriginId"] == "myS3-mam-proxy-Origin"
+    assert 'const PREFIX = "/thumbnail";' in deployment["mam-cdn-thumbnail-resize"].inputs["code"]
+
+    assert deployment["thumbnail-resizer"].inputs["environment"]["variables"]["WRITE_BACK"] == "false"
+    assert "s3:PutObject" not in deployment["thumbnail-resizer-policy"].inputs["policy"]
+
+
+def test_resizer_is_monitored():
+    deployment = _run("split")
+    alarm = deployment["thumbnail-resizer-duration-alarm"].inputs
+    assert alarm["dimensions"] == {"FunctionName": "contido-my-client-prod-thumbnail-resizer"}
+    assert alarm["alarmActions"] == ["arn:aws:mock:::monitoring-alarms"]
+    assert "thumbnail-resizer-throttles-alarm" in deployment
+    # No event source, so no concurrency cap to alarm on
+    assert "thumbnail-resizer-concurrency-alarm" not in deployment
+    assert "contido-my-client-prod-thumbnail-resizer" in deployment["monitoring-dashboard"].inputs["dashboardBody"]
+
+
+@pytest.mark.skipif(not shutil.which("node"), reason="needs node to run the CloudFront Function")
+@pytest.mark.parametrize("prefix, uri, query, accept, expected", [
+    ("", "/clip/poster.jpg", {"width": "300", "format": "webp"}, "", "/_resized/320/webp/clip/poster.jpg"),
+    ("", "/clip/poster.jpg", {"width": "5000"}, "", "/_resized/1280/original/clip/poster.jpg"),
+    ("", "/clip/poster.jpg", {"format": "auto"}, "image/webp,*/*", "/_resized/original/webp/clip/poster.jpg"),
+    ("", "/clip/poster.jpg", {"format": "gif"}, "", "/clip/poster.jpg"),
+    ("", "/clip/poster.jpg", {}, "", "/clip/poster.jpg"),
+    ("", "/_resized/999/webp/clip/poster.jpg", {}, "", 403),
+    ("/thumbnail", "/thumbnail/clip/poster.jpg", {"width": "160"}, "", "/thumbnail/_resized/160/original/clip/poster.jpg"),
+    ("/thumbnail", "/clip.mp4", {"width": "160"}, "", "/clip.mp4"),
+])
+def test_viewer_request_normalizes_width_and_format(prefix, uri, query, accept, expected):
+    code = thumbnails.viewer_request_code(thumbnails.ResizingSettings(image_uri="unused"), prefix)
+    event = {"request": {"uri": uri, "querystring": {key: {"value": value} for key, value in query.items()},
+                         "headers": {"accept": {"value": accept}} if accept else {}}}
+    script = code + f"const result = handler({json.dumps(event)});\n" \
+        "console.log(JSON.stringify(result.statusCode || [result.uri, result.querystring]));"
+    output = json.loads(subprocess.run(["node", "-e", script], check=True, capture_output=True, text=True).stdout)
+    if expected == 403:
+        assert output == 403
+    else:
+        assert output == [expected, {}]